@@ -0,0 +1,3 @@
+# Microbenchmarks of the hot paths, kept out of the runtime modules:
+#   python -m benchmarks.<module> [args]
+# Correctness is covered by the tests (see tests/); these only print timings.
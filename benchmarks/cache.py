@@ -0,0 +1,21 @@
+import sys
+import time
+
+from src.cache import ResponseCache
+
+# Cost of a repeated action parse, served from the cache instead of the network:
+#   python -m benchmarks.cache [lookups]
+if __name__ == "__main__":
+    lookups = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    cache = ResponseCache("benchmark", max_entries=1024, ttl=60)
+    prompt = [
+        {"role": "system", "content": "You are a combat action parser. Available skills: Fire Bolt (magic)"},
+        {"role": "user", "content": "Player says: 'attack the goblin'"}
+    ]
+    cache.put(cache.fingerprint(prompt, max_tokens=400), '{"action": "attack", "confidence": 0.9}')
+
+    start = time.perf_counter()
+    for _ in range(lookups):
+        cache.get(cache.fingerprint(prompt, max_tokens=400))
+    elapsed = time.perf_counter() - start
+    print(f"{lookups} cached parses: {elapsed / lookups * 1e6:.2f} us each, stats {cache.stats()}")
@@ -0,0 +1,35 @@
+import random
+import re
+import sys
+import time
+
+from src.dice import roll, roll_many
+
+# Microbenchmarks against the previous roll_dice (regex on every roll):
+#   python -m benchmarks.dice [rolls]
+if __name__ == "__main__":
+    rolls = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    def legacy_roll_dice(expr):
+        match = re.match(r"(\d+)d(\d+)([+-]\d+)?", expr.replace(" ", ""))
+        if not match:
+            return 0
+        n = int(match.group(1))
+        die = int(match.group(2))
+        mod = int(match.group(3)) if match.group(3) else 0
+        rolled = [random.randint(1, die) for _ in range(n)]
+        return sum(rolled) + mod, rolled
+
+    def bench(fn, expr):
+        start = time.perf_counter()
+        for _ in range(rolls):
+            fn(expr)
+        return (time.perf_counter() - start) / rolls * 1e9
+
+    for expr in ("1d20", "2d6+3", "10d6", "4d6kh3", "1d8+1d6-1"):
+        legacy = f"{bench(legacy_roll_dice, expr):7.0f} ns" if "k" not in expr and expr.count("d") == 1 else "   n/a    "
+        compiled = bench(roll, expr)
+        start = time.perf_counter()
+        roll_many(expr, rolls)
+        bulk = (time.perf_counter() - start) / rolls * 1e9
+        print(f"{expr:10} legacy {legacy} | compiled {compiled:6.0f} ns | roll_many {bulk:5.1f} ns per roll")
@@ -0,0 +1,39 @@
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+from src.effects import EffectPipeline, pipelines
+
+# Cost of one damage roll, walking the document vs with the compiled pipeline:
+#   python -m benchmarks.effects [uses]
+if __name__ == "__main__":
+    uses = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    json_path = Path(__file__).resolve().parent.parent / "src" / "json_exp"
+    skills = json.loads((json_path / "skill.json").read_text(encoding="utf-8"))
+    items = json.loads((json_path / "item.json").read_text(encoding="utf-8"))
+    docs = [d for d in skills + items if any(e["kind"] == "damage" for e in d.get("effects", []))]
+
+    # The previous skill_damage / weapon_base_damage + hit_check mana sum
+    def legacy(doc):
+        mana_cost = sum(e.get("mana_cost", 0) for e in doc.get("effects", []))
+        total, all_rolls = 0, []
+        for effect in doc.get("effects", []):
+            if effect["kind"] == "damage":
+                match = re.match(r"(\d+)d(\d+)([+-]\d+)?", effect["value"].replace(" ", ""))
+                rolls = [random.randint(1, int(match.group(2))) for _ in range(int(match.group(1)))]
+                total += sum(rolls) + (int(match.group(3)) if match.group(3) else 0)
+                all_rolls.extend(rolls)
+        return mana_cost, total, all_rolls
+
+    def compiled(doc):
+        effects = pipelines.get("Skills", doc)
+        return (effects.mana_cost,) + EffectPipeline.roll(effects.damage)
+
+    for label, fn in (("document walk", legacy), ("pipeline", compiled)):
+        start = time.perf_counter()
+        for i in range(uses):
+            fn(docs[i % len(docs)])
+        print(f"{label:14} {(time.perf_counter() - start) / uses * 1e9:6.0f} ns per use ({len(docs)} documents)")
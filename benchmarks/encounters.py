@@ -0,0 +1,42 @@
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+from src.encounters import EncounterIndex
+from src.enemies import EnemyTemplate
+
+# Spawn selection cost against the filtered copies of the old spawn_enemy, by bestiary size:
+#   python -m benchmarks.encounters [spawns]
+if __name__ == "__main__":
+    spawns = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    base = json.loads((Path(__file__).resolve().parent.parent / "src" / "json_exp" / "enemies.json").read_text(encoding="utf-8"))
+    generator = random.Random(3)
+
+    def legacy_spawn(bestiary, level):
+        all_enemies = bestiary.copy()
+        if generator.random() < 0.5 and level >= 2:
+            weak = [e for e in all_enemies if e["level"] == 1] or [e for e in all_enemies if e["level"] <= level]
+            return [generator.choice(weak) for _ in range(generator.randint(2, min(3, level)))]
+        possible = [e for e in all_enemies if e["level"] <= min(level, 10)] or [e for e in all_enemies if e["level"] == 1]
+        return [generator.choice(possible)]
+
+    for size in (len(base), 1000, 100000):
+        bestiary = [dict(base[i % len(base)], name=f"{base[i % len(base)]['name']} {i}") for i in range(size)]
+        templates = [EnemyTemplate(doc) for doc in bestiary]
+        index = EncounterIndex(lambda: templates)
+        start = time.perf_counter()
+        index.table("forest", 1)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(spawns):
+            legacy_spawn(bestiary, 1 + i % 10)
+        legacy = (time.perf_counter() - start) / spawns * 1e6
+        start = time.perf_counter()
+        for i in range(spawns):
+            index.spawn("Dark Forest", 1 + i % 10, generator)
+        indexed = (time.perf_counter() - start) / spawns * 1e6
+        print(f"{size:6} enemies: filtered copies {legacy:8.1f} us | index {indexed:5.1f} us per spawn "
+              f"(build {build * 1000:.0f} ms)")
@@ -0,0 +1,45 @@
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from src.enemies import templates
+
+# Spawn cost and memory of 10k concurrent encounters, template.copy() vs instances:
+#   python -m benchmarks.enemies [encounters]
+if __name__ == "__main__":
+    encounters = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    docs = json.loads((Path(__file__).resolve().parent.parent / "src" / "json_exp" / "enemies.json").read_text(encoding="utf-8"))
+    templates.load(docs)
+    generator = random.Random(7)
+
+    def legacy_spawn(template):
+        enemy = template.copy()
+        if isinstance(enemy["max_hp"], dict):
+            enemy["current_hp"] = generator.randint(enemy["max_hp"]["min"], enemy["max_hp"]["max"])
+            enemy["max_hp"] = enemy["current_hp"]
+        else:
+            enemy["current_hp"] = enemy["max_hp"]
+        return enemy
+
+    def fights(spawn, pool):
+        # 1 to 3 enemies per encounter, like spawn_enemy
+        return [[spawn(generator.choice(pool)) for _ in range(1 + i % 3)] for i in range(encounters)]
+
+    for label, spawn, pool in (("template.copy()", legacy_spawn, docs),
+                               ("EnemyInstance", lambda t: t.spawn(generator), templates.all())):
+        start = time.perf_counter()
+        fights(spawn, pool)
+        elapsed = time.perf_counter() - start
+        spawned = sum(1 + i % 3 for i in range(encounters))
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        live = fights(spawn, pool)
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        print(f"{label:16} spawn {elapsed / spawned * 1e9:5.0f} ns | {encounters} encounters "
+              f"({spawned} enemies): {used / 1024:7.0f} KiB, {used / spawned:4.0f} B per enemy")
+        del live
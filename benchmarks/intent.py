@@ -0,0 +1,29 @@
+import json
+import sys
+import time
+from pathlib import Path
+
+from src.intent import engine_for
+
+# Classification cost and network share on the labelled corpus (json_exp/intent_corpus.json);
+# the accuracy itself is asserted by tests/test_intent.py:
+#   python -m benchmarks.intent [threshold]
+if __name__ == "__main__":
+    threshold = float(sys.argv[1]) if len(sys.argv) > 1 else 0.6
+    json_path = Path(__file__).resolve().parent.parent / "src" / "json_exp"
+    corpus = json.loads((json_path / "intent_corpus.json").read_text(encoding="utf-8"))
+    skills_db = {s["name"]: s for s in json.loads((json_path / "skill.json").read_text(encoding="utf-8"))}
+    items_db = {i["name"]: i for i in json.loads((json_path / "item.json").read_text(encoding="utf-8"))}
+
+    loadout = corpus["loadout"]
+    engine = engine_for([skills_db[n] for n in loadout["skills"]], [items_db[n] for n in loadout["inventory"]])
+    cases = corpus["cases"]
+
+    start = time.perf_counter()
+    results = [engine.classify(case["input"], enemy_count=loadout["enemies"]) for case in cases]
+    elapsed = time.perf_counter() - start
+
+    local = sum(intent.confidence >= threshold for intent in results)
+    print(f"{len(cases)} inputs, threshold {threshold}")
+    print(f"resolved without the network: {local}/{len(cases)} ({local / len(cases):.0%})")
+    print(f"{elapsed / len(cases) * 1e6:.1f} us per input")
@@ -0,0 +1,45 @@
+import os
+import random
+import re
+import sys
+import time
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+from src.catalog import normalize_name
+from src.migrations import migrate_catalog_names
+
+# Lookup latency of the old $regex query against name_lc equality, on a growing catalog.
+# Needs a real MongoDB (CONNECTION_STRING in src/.env); uses a scratch database.
+#   python -m benchmarks.migrations [size ...]
+if __name__ == "__main__":
+    load_dotenv()
+    sizes = [int(a) for a in sys.argv[1:]] or [100, 1000, 10000, 20000]
+    client = MongoClient(os.getenv("CONNECTION_STRING"))
+    db = client["ADABenchmark"]
+    lookups = 200
+
+    for size in sizes:
+        db.drop_collection("Items")
+        db["Items"].insert_many([{"name": f"Bench Item {i}", "description": "benchmark"} for i in range(size)])
+        migrate_catalog_names(db)
+        names = [f"bench item {random.randrange(size)}" for _ in range(lookups)]
+
+        start = time.perf_counter()
+        for name in names:
+            db["Items"].find_one({"name": {"$regex": f"^{re.escape(name)}$", "$options": "i"}})
+        regex = (time.perf_counter() - start) / lookups
+
+        start = time.perf_counter()
+        for name in names:
+            db["Items"].find_one({"name_lc": normalize_name(name)})
+        indexed = (time.perf_counter() - start) / lookups
+
+        start = time.perf_counter()
+        list(db["Items"].find({"name_lc": {"$in": [normalize_name(n) for n in names]}}))
+        batched = (time.perf_counter() - start) / lookups
+
+        print(f"{size:>6} items: $regex {regex * 1e3:7.2f} ms | name_lc {indexed * 1e3:6.2f} ms | $in batch {batched * 1e3:6.3f} ms per lookup")
+
+    client.drop_database("ADABenchmark")
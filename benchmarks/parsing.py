@@ -0,0 +1,37 @@
+import json
+import re
+import time
+from pathlib import Path
+
+from src.parsing import extract_object
+
+# Outputs parsed locally vs with the old greedy regex, on the fixture corpus
+# (json_exp/malformed_outputs.json, asserted by tests/test_parsing.py):
+#   python -m benchmarks.parsing
+if __name__ == "__main__":
+    corpus_path = Path(__file__).resolve().parent.parent / "src" / "json_exp" / "malformed_outputs.json"
+    cases = json.loads(corpus_path.read_text(encoding="utf-8"))
+
+    def greedy(text):
+        match = re.search(r"\{.*\}", text, re.DOTALL)
+        if not match:
+            raise ValueError("no object")
+        return json.loads(match.group())
+
+    def parsed(parser):
+        ok = 0
+        start = time.perf_counter()
+        for case in cases:
+            try:
+                parser(case["output"])
+                ok += 1
+            except ValueError:
+                pass
+        return ok, (time.perf_counter() - start) / len(cases) * 1e6
+
+    parseable = sum(1 for case in cases if not case.get("expect_failure"))
+    old_ok, old_us = parsed(greedy)
+    new_ok, new_us = parsed(extract_object)
+    print(f"{len(cases)} model outputs, {parseable} with an object to recover")
+    print(f"greedy regex: {old_ok} parsed, {len(cases) - old_ok} repair calls, {old_us:.1f} us per output")
+    print(f"scanner:      {new_ok} parsed, {len(cases) - new_ok} repair calls, {new_us:.1f} us per output")
@@ -0,0 +1,49 @@
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+from src.similarity import SimilarityIndex
+
+# Microbenchmark against the per-call refit of brain.find_most_similar_item:
+#   python -m benchmarks.similarity [catalog_size] [queries]
+if __name__ == "__main__":
+    os.environ.setdefault("OPENROUTER_API_KEY", "benchmark")
+    from src.brain import find_most_similar_item
+
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    base = json.loads((Path(__file__).resolve().parent.parent / "src" / "json_exp" / "item.json").read_text(encoding="utf-8"))
+    words = " ".join(d["description"] for d in base).split()
+    rng = random.Random(7)
+    catalog = [
+        {"name": f"{rng.choice(base)['name']} {i}", "description": " ".join(rng.choices(words, k=12))}
+        for i in range(size)
+    ]
+    queries = [" ".join(rng.choices(words, k=6)) for _ in range(n_queries)]
+    subset = catalog[:5]  # e.g. a character inventory
+
+    start = time.perf_counter()
+    index = SimilarityIndex(catalog)
+    fit_time = time.perf_counter() - start
+
+    for label, candidates in (("full catalog", catalog), ("5 candidates", subset)):
+        start = time.perf_counter()
+        for q in queries:
+            find_most_similar_item(q, candidates)
+        refit = (time.perf_counter() - start) / n_queries
+
+        start = time.perf_counter()
+        for q in queries:
+            index.query(q, candidates)
+        indexed = (time.perf_counter() - start) / n_queries
+
+        print(f"{label:>13}: refit {refit * 1e3:8.3f} ms/query | index {indexed * 1e3:8.3f} ms/query | x{refit / indexed:.1f}")
+
+    start = time.perf_counter()
+    index.top_k(queries, k=3)
+    batched = (time.perf_counter() - start) / n_queries
+    print(f"{'batched top-3':>13}: index {batched * 1e3:8.3f} ms/query (one-off fit: {fit_time * 1e3:.1f} ms for {size} docs)")
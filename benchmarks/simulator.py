@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+
+from src.simulator import Simulator, load_archetypes, load_catalog
+
+# Win rates and time to kill of every class preset and skill against every enemy, and
+# the simulator throughput (its rules are covered by tests/test_simulator.py):
+#   python -m benchmarks.simulator [fights_per_matchup] [mongo]
+if __name__ == "__main__":
+    fights = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    if len(sys.argv) > 2 and sys.argv[2] == "mongo":
+        from dotenv import load_dotenv
+        from pymongo import MongoClient
+
+        load_dotenv()
+        catalog = load_catalog("mongo", MongoClient(os.getenv("CONNECTION_STRING"))["ADADatabase"])
+    else:
+        catalog = load_catalog()
+
+    simulator = Simulator(catalog, seed=42)
+    archetypes = load_archetypes()
+    enemies = sorted(catalog["Enemies"].values(), key=lambda e: e.get("cr", 0))
+
+    total = 0
+    start = time.perf_counter()
+    for archetype in archetypes:
+        print(f"\n{archetype['class']} ({archetype['weapon']}, {', '.join(archetype['skills'])})")
+        for skill in [None] + archetype["skills"]:
+            for enemy in enemies:
+                report = simulator.run(archetype, enemy["name"], fights=fights, skill=skill)
+                total += fights
+                ttk = report["rounds_to_kill"]
+                histogram = report["hit_damage_histogram"]
+                mean_hit = (sum(d * c for d, c in enumerate(histogram)) / sum(histogram)) if histogram else 0
+                print(f"  {skill or 'weapon':15} vs {enemy['name']:12} CR {enemy.get('cr', '?'):>2}: "
+                      f"win {report['win_rate']:6.1%}  ttk p10/p50/p90 {ttk['p10']}/{ttk['p50']}/{ttk['p90']}  "
+                      f"hit avg {mean_hit:4.1f}  taken {report['damage_taken_mean']:5.1f}")
+    elapsed = time.perf_counter() - start
+    print(f"\n{total} fights in {elapsed:.1f}s ({total / elapsed:,.0f} fights/s)")
@@ -1,4 +1,9 @@
 #!/usr/bin/env python3
+# Patch the standard library before anything else is imported, so the blocking
+# network calls (OpenAI, MongoDB) yield to the other rooms instead of stalling the hub
+import eventlet
+eventlet.monkey_patch()
+
 import sys
 import os
 
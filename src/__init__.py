@@ -34,11 +34,25 @@ def create_app(test_config=None):
     users_col.create_index('Email', unique=True)
     users_col.create_index('Username', unique=True)
 
+    # Normalized, uniquely indexed name_lc on Items/Skills/Enemies (idempotent)
+    from .migrations import migrate_catalog_names
+    migrate_catalog_names(app.db)
+
+    # In-memory cache of Items/Skills/Enemies/Classes, refreshed when MongoDB changes
+    from .catalog import catalog
+    catalog.init_app(app)
+
     # ensure the instance folder exists
     try:
         os.makedirs(app.instance_path)
     except OSError:
         pass
+
+    # Content-addressed avatars (instance/avatars or GridFS), moved out of Character documents
+    from .avatars import avatar_store
+    from .migrations import migrate_avatars
+    avatar_store.init_app(app)
+    migrate_avatars(app.db, avatar_store)
     
     socketio.init_app(app)
 
@@ -58,6 +72,9 @@ def create_app(test_config=None):
         from .selection import bp as selection_bp
         app.register_blueprint(selection_bp)
 
+        from .avatars import bp as avatars_bp
+        app.register_blueprint(avatars_bp)
+
         app.add_url_rule('/', endpoint='landing')
 
     # @app.route('/test-db')
@@ -73,5 +90,17 @@ def create_app(test_config=None):
     def debug():
          print(app.url_for(('auth.login')))
          return 'Hello world'
+
+    # Hit rates of the response caches (see cache.py)
+    @app.route('/debug/caches')
+    def debug_caches():
+        from .cache import cache_stats
+        return cache_stats()
+
+    # Latencies, error rates and circuits of the models (see router.py)
+    @app.route('/debug/models')
+    def debug_models():
+        from .brain import llm
+        return llm.router.report()
     
     return app
@@ -0,0 +1,136 @@
+import hashlib
+import io
+import os
+import re
+
+import gridfs
+from flask import Blueprint, abort, current_app, make_response, request
+from PIL import Image
+
+from . import global_config
+
+# Content-addressed avatar store.
+# Avatars used to live as base64 JPEG strings inside the Character documents, and were
+# copied into every 'user_joined'/'connected' payload. Now an avatar is stored once,
+# under the sha256 of its JPEG bytes, together with its thumbnails; documents and socket
+# payloads only carry that hash and the browser fetches /avatars/<hash>[/<size>].
+# The content of a hash never changes, so the responses are cacheable forever.
+
+_DIGEST = re.compile(r"[0-9a-f]{64}")
+FULL_SIZE = 0   # size key of the original image
+
+
+def encode_jpeg(img, max_side=None):
+    img = img.copy()
+    if img.mode in ("RGBA", "P", "LA"):
+        img = img.convert("RGB")
+    if max_side:
+        img.thumbnail((max_side, max_side))
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=70, optimize=True)
+    return buffer.getvalue()
+
+
+class FilesystemBackend:
+    """Files under root/<first two hex chars>/<hash>_<size>.jpg"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, digest, size):
+        return os.path.join(self.root, digest[:2], f"{digest}_{size}.jpg")
+
+    def exists(self, digest, size):
+        return os.path.exists(self._path(digest, size))
+
+    def write(self, digest, size, data):
+        path = self._path(digest, size)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written next to the target then renamed: a reader never sees a partial file
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def read(self, digest, size):
+        try:
+            with open(self._path(digest, size), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+
+class GridFSBackend:
+    """Files in the 'avatars' GridFS bucket of the app database, named <hash>_<size>"""
+
+    def __init__(self, db):
+        self._fs = gridfs.GridFS(db, collection="avatars")
+
+    def exists(self, digest, size):
+        return self._fs.exists(filename=f"{digest}_{size}")
+
+    def write(self, digest, size, data):
+        self._fs.put(data, filename=f"{digest}_{size}", content_type="image/jpeg")
+
+    def read(self, digest, size):
+        grid_out = self._fs.find_one({"filename": f"{digest}_{size}"})
+        return grid_out.read() if grid_out else None
+
+
+class AvatarStore:
+    def __init__(self):
+        self.backend = None
+        self.sizes = ()
+
+    def init_app(self, app):
+        config = global_config.config
+        if config["AVATAR_BACKEND"] == "gridfs":
+            self.backend = GridFSBackend(app.db)
+        else:
+            self.backend = FilesystemBackend(config["AVATAR_DIR"] or os.path.join(app.instance_path, "avatars"))
+        self.sizes = tuple(config["AVATAR_THUMBNAIL_SIZES"])
+        app.avatar_store = self
+
+    def put(self, img):
+        """Stores a PIL image and its thumbnails, returns the hash. Storing the same image twice is a no-op."""
+        data = encode_jpeg(img)
+        digest = self.put_bytes(data)
+        for size in self.sizes:
+            if not self.backend.exists(digest, size):
+                self.backend.write(digest, size, encode_jpeg(img, max_side=size))
+        return digest
+
+    # Stores already encoded JPEG bytes (full size only), returns the hash
+    def put_bytes(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        if not self.backend.exists(digest, FULL_SIZE):
+            self.backend.write(digest, FULL_SIZE, data)
+        return digest
+
+    def get(self, digest, size=FULL_SIZE):
+        if not _DIGEST.fullmatch(digest or "") or (size != FULL_SIZE and size not in self.sizes):
+            return None
+        return self.backend.read(digest, size)
+
+
+avatar_store = AvatarStore()
+
+
+bp = Blueprint('avatars', __name__, url_prefix='/avatars')
+
+@bp.route('/<digest>')
+@bp.route('/<digest>/<int:size>')
+def avatar(digest, size=FULL_SIZE):
+    etag = f"{digest}_{size}"
+    # The hash is the content: a revalidation never needs to read the image
+    if etag in request.if_none_match:
+        response = make_response("", 304)
+    else:
+        data = current_app.avatar_store.get(digest, size)
+        if data is None:
+            abort(404)
+        response = make_response(data)
+        response.mimetype = 'image/jpeg'
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
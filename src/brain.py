@@ -1,4 +1,3 @@
-from openai import OpenAI
 from dotenv import load_dotenv
 from enum import Enum
 from sklearn.feature_extraction.text import TfidfVectorizer
@@ -8,6 +7,8 @@ import time
 import re
 import json
 import random
+import uuid
+import copy
 from bson.objectid import ObjectId
 
 from flask import (
@@ -16,6 +17,25 @@ from flask import (
 
 from pathlib import Path
 
+from .session import GameSession, SessionStore
+from .llm import LLMClient, LLMUnavailable
+from .streaming import NarrationExtractor
+from .similarity import IndexRegistry
+from . import global_config
+from .catalog import catalog
+from .prompt import PromptBuilder
+from .memory import MemoryCompactor
+from .cache import response_cache
+from .intent import engine_for
+from .parsing import extract_object, conform, json_schema
+from .pipeline import TurnTimer, SpeculativeStream
+from .scheduler import PartyCombat, TurnScheduler
+from . import dice
+from .dice import DiceError, compile_dice
+from .effects import EffectPipeline, pipelines
+from .enemies import EnemyInstance, templates as enemy_templates
+from .encounters import EncounterIndex
+
 
 # Load JSON databases for testing purposes
 #! Deprecated: we now use MongoDB for skills/items/enemies/classes
@@ -29,12 +49,6 @@ class_path = json_path / "classes.json"
 # Load the .env file -> so it takes the api key (remember to create it)
 load_dotenv()
 
-# Client OpenRouter
-client = OpenAI(
-    base_url="https://openrouter.ai/api/v1",
-    api_key=os.getenv("OPENROUTER_API_KEY")
-)
-
 # Fall back to call if another free model is not available
 # Updated list of free models (as of Feb 2026)
 # If the app fails chose another free model from https://openrouter.ai/models?filter=free
@@ -42,6 +56,13 @@ FREE_MODELS = [
     "arcee-ai/trinity-large-preview:free"
 ]
 
+# Client OpenRouter (OPENROUTER_BASE_URL can point to any OpenAI-compatible server)
+llm = LLMClient(
+    base_url=os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
+    api_key=os.getenv("OPENROUTER_API_KEY"),
+    models=FREE_MODELS
+)
+
 # Global variables for long-term memory management 
 system_rules =  {
             "role": "system",
@@ -108,86 +129,172 @@ INSTRUCTIONS:
 
 
 
-turn_count = 0
-recent_history = []
-#! Make sure to change the start point, so you can get the places from the approved database
-long_term_memory = "The character is located in the Initial Tavern. No relevant events so far."
+# Fields of the system_rules answer, with the value used when the model leaves one out
+NARRATION_SCHEMA = {
+    "narration": "",
+    "found_items": [],
+    "lost_items": [],
+    "location": None,
+    "quest": None,
+    "max_hp_change": 0,
+    "xp_gained": 0,
+    "gold_change": 0,
+    "encounter": False
+}
+# Sent as response_format to the models that support structured output (see llm.py)
+NARRATION_JSON_SCHEMA = json_schema("narration", NARRATION_SCHEMA)
+
+# Narrator prompts: identical static prefix for every turn of every room (see prompt.py)
+narrator_prompt = PromptBuilder([system_rules, alignment_prompt])
+
+# Per-session state (turn count, history, memory, character, location...) lives in session.py
 mana_regen_per_turn = 5  # Adjust regeneration rate if desired
-state = {"location": "Taverna Iniziale", "quest": "Nessuna"}
-
-# 3 tries for models distanced by a 2 second delay each one then fallback to the next one
-def narrate(history, retries=3, delay=2):
-    for model in FREE_MODELS:
-        for attempt in range(retries):
-            try:
-                response = client.chat.completions.create(
-                    model=model,
-                    messages=history,
-                    max_tokens=400,
-                    # temperature=0.7   # Tested but not used for now (https://openrouter.ai/docs/api/reference/parameters)
-                )
-                return response.choices[0].message.content
-            except Exception as e:
-                print(f"[WARN] Model {model} failed attempt {attempt+1}: {e}")
-                time.sleep(delay)
-        print(f"[INFO] Passing to next model...")
 
-    return "The narrator is temporarily out of voice. Please try again shortly."
+NARRATOR_OUT_OF_VOICE = "The narrator is temporarily out of voice. Please try again shortly."
+
+# Response caches (None when disabled for the call site, see RESPONSE_CACHES)
+action_cache = response_cache("action_parser")
+flavor_cache = response_cache("flavor")
+
+# 3 tries for models with a growing delay (starting at 2 seconds) then fallback to the next one
+# The waits are cooperative (eventlet) so a slow model does not stall the other rooms
+# cache: optional ResponseCache; `cacheable(text)` can refuse to store an answer (e.g. invalid JSON)
+# schema: JSON schema of the expected answer, enforced by the models that support it
+# call_type: routing class of the call ("strict", "flavor", "summary", "parser", see router.py)
+def narrate(history, retries=3, delay=2, max_tokens=400, cache=None, cacheable=None, schema=None, call_type="default"):
+    key = None
+    if cache is not None:
+        params = {"max_tokens": max_tokens, "schema": schema["name"]} if schema else {"max_tokens": max_tokens}
+        key = cache.fingerprint(history, **params)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    try:
+        text = llm.complete(history, max_tokens=max_tokens, retries=retries, backoff=delay, json_schema=schema,
+                            call_type=call_type)
+        if key is not None and text and (cacheable is None or cacheable(text)):
+            cache.put(key, text)
+        return text
+    except LLMUnavailable as e:
+        print(f"[ERROR] Narration failed: {e}")
+
+    return NARRATOR_OUT_OF_VOICE
+
+
+# Same as narrate() but yields the text while the model writes it (for the live chat)
+def narrate_stream(history, max_tokens=400, schema=None, call_type="default"):
+    try:
+        yield from llm.stream(history, max_tokens=max_tokens, json_schema=schema, call_type=call_type)
+    except LLMUnavailable as e:
+        print(f"[ERROR] Narration stream failed: {e}")
+        yield NARRATOR_OUT_OF_VOICE
 
 
-# We cannot trust the model to always return valid JSON, so we need to extract it from the text
+# We cannot trust the model to always return valid JSON, so we need to extract it from the text.
+# Fences, chatter, trailing commas, single quotes, truncated tails... are fixed locally (see parsing.py)
 def extract_json(text):
-    # I stole this, don't judge me. Regrex are black magic to me! :-(
-    match = re.search(r'\{.*\}', text, re.DOTALL)
-    if not match:
-        raise ValueError("No found JSON object in the text")
-    return json.loads(match.group())
+    data, fixes = extract_object(text)
+    if fixes:
+        print(f"[INFO] Model JSON fixed locally: {', '.join(sorted(fixes))}")
+    return data
+
+
+def _is_json(text):
+    try:
+        extract_object(text)
+        return True
+    except ValueError:
+        return False
 
 
-def narrate_strict(history, retries=2):
+# on_narration(delta): if given, the first attempt is streamed and the "narration"
+# field is forwarded while the rest of the JSON object is still being generated.
+# The answer always has every field of NARRATION_SCHEMA; models with structured output
+# are held to NARRATION_JSON_SCHEMA, the others are parsed tolerantly and asked to
+# repair their output only when no object can be recovered from it.
+def narrate_strict(history, retries=2, on_narration=None):
     history = [system_rules] + history
 
-    for _ in range(retries):
-        output = narrate(history)
+    output = ""
+    for attempt in range(retries):
+        if on_narration and attempt == 0:
+            output = _stream_strict(history, on_narration)
+        else:
+            output = narrate(history, schema=NARRATION_JSON_SCHEMA, call_type="strict")
+        if not output.strip() or NARRATOR_OUT_OF_VOICE in output:
+            # No model answered (see narrate): nothing to parse or repair, try again
+            continue
         try:
-            return extract_json(output)
-        except:
-            # Ask the model to repair JSON
-            repair = narrate([
-                {
-                    "role": "system",
-                    "content": "Fix the following text into valid JSON ONLY. Do not add any text."
-                },
-                {"role": "user", "content": output}
-            ])
-            try:
-                return extract_json(repair)
-            except:
-                continue
+            data = extract_json(output)
+        except ValueError:
+            if output.strip() and "{" not in output:
+                # Plain prose: it is the narration, nothing to repair
+                data = {"narration": output.strip()}
+            else:
+                # Last resort: ask the model to repair JSON
+                repair = narrate([
+                    {
+                        "role": "system",
+                        "content": "Fix the following text into valid JSON ONLY. Do not add any text."
+                    },
+                    {"role": "user", "content": output}
+                ], call_type="strict")
+                try:
+                    data = extract_json(repair)
+                except ValueError:
+                    continue
+
+        data, filled = conform(data, NARRATION_SCHEMA)
+        if filled:
+            print(f"[INFO] Narration fields defaulted: {', '.join(filled)}")
+        return data
 
     # Hard fallback (never crash the game)
-    return {
-        "narration": output,
-        "found_items": [],
-        "lost_items": [],
-        "location": None,
-        "quest": None,
-        "max_hp_change": 0,
-        "xp_gained": 0,
-        "gold_change": 0,
-        "encounter": False
-    }
+    data, _ = conform({"narration": output.strip() or NARRATOR_OUT_OF_VOICE}, NARRATION_SCHEMA)
+    return data
+
+
+def _stream_strict(history, on_narration):
+    extractor = NarrationExtractor()
+    output = []
+    for delta in narrate_stream(history, schema=NARRATION_JSON_SCHEMA, call_type="strict"):
+        output.append(delta)
+        text = extractor.feed(delta)
+        if text:
+            on_narration(text)
+    return "".join(output)
 
 
-def narrate_flavor(prompt, max_tokens=300):
-    response = narrate([
+# on_delta(delta): if given, the narration is streamed while it is generated
+# cache: flavor_cache by default (disabled unless RESPONSE_CACHES says otherwise)
+def narrate_flavor(prompt, max_tokens=300, on_delta=None, cache=flavor_cache):
+    messages = [
         {
             "role": "system",
             "content": "You are a cinematic fantasy narrator. No JSON. No rules."
         },
         {"role": "user", "content": prompt}
-    ])
-    return response
+    ]
+    if on_delta is None:
+        return narrate(messages, max_tokens=max_tokens, cache=cache, call_type="flavor")
+
+    key = None
+    if cache is not None:
+        key = cache.fingerprint(messages, max_tokens=max_tokens)
+        cached = cache.get(key)
+        if cached is not None:
+            on_delta(cached)
+            return cached
+
+    response = []
+    for delta in narrate_stream(messages, max_tokens=max_tokens, call_type="flavor"):
+        response.append(delta)
+        on_delta(delta)
+    text = "".join(response)
+    if key is not None and text and NARRATOR_OUT_OF_VOICE not in text:
+        cache.put(key, text)
+    return text
 
 
 
@@ -202,16 +309,12 @@ def narrate_flavor(prompt, max_tokens=300):
 # Returns a concise summary of the adventure to be used in future turns
 def summarise_memory(long_memory, recent_history):
     messages = [
-            {"role": "system", "content": "You are a reporter. Summarise the most important facts of the adventure."},
+            {"role": "system", "content": "You are a reporter. Summarise the most important facts of the adventure in at most 200 words. Output only the summary."},
             {"role": "user", "content": f"Current memory: {long_memory}\n Recent events: {recent_history}\n Update memory with new facts."}
         ]
 
-    # Call the model to get the summary
-    summary = narrate(messages)
-    summary = narrate_flavor(
-        f"Current memory:\n{long_memory}\n\nRecent events:\n{recent_history}\n\nUpdate memory with new facts."
-    )
-    return summary[:1000] # Limit summary length
+    # One model call; the length is asked in the prompt instead of cutting the text
+    return narrate(messages, call_type="summary")
 
 
 
@@ -225,17 +328,14 @@ def create_character_from_description(description: str) -> dict:
     # --- 1. CARICAMENTO DATI DAL DATABASE ---
     try:
         # Carichiamo solo le skill di livello 1 per la creazione (RISPARMIO TOKEN)
-        skills_cursor = current_app.db['Skills'].find({"min_lv": {"$lte": 1}})
-        skills_db = list(skills_cursor)
+        # (dalla cache in memoria dei cataloghi, vedi catalog.py)
+        skills_db = [s for s in catalog.all('Skills') if s.get("min_lv", 0) <= 1]
 
         # Carichiamo tutti gli oggetti per la ricerca di similarità
-        items_cursor = current_app.db['Items'].find({})
-        items_db = list(items_cursor)
+        items_db = catalog.all('Items')
 
-        # Carichiamo le classi (se esiste la collezione Classes, altrimenti fallback o errore gestito)
-        # Nota: Se non hai una collezione 'Classes' nel DB, assicurati di crearla o usare una lista statica qui.
-        classes_cursor = current_app.db['Classes'].find({}) if 'Classes' in current_app.db.list_collection_names() else []
-        classes_db = list(classes_cursor)
+        # Carichiamo le classi (se la collezione Classes è vuota o non esiste si usa il fallback sotto)
+        classes_db = catalog.all('Classes')
         
         # Fallback se il DB classi è vuoto (usa una lista base per evitare crash)
         if not classes_db:
@@ -302,7 +402,7 @@ def create_character_from_description(description: str) -> dict:
     ] 
 
     try:
-        output = narrate(prompt)
+        output = narrate(prompt, call_type="character")
         print(f"[DEBUG] AI Character Output: {output[:100]}...") # Debug log
         character = extract_json(output)
 
@@ -356,7 +456,7 @@ def create_character_from_description(description: str) -> dict:
     # Arma Principale
     inventory = []
     if combat_items:
-        best_weapon, _ = find_most_similar_item(character["description"], combat_items)
+        best_weapon, _ = most_similar_in_catalog("Items", character["description"], combat_items)
         inventory.append(best_weapon["name"])
         character["equipped_weapon"] = best_weapon["name"]
     else:
@@ -367,15 +467,17 @@ def create_character_from_description(description: str) -> dict:
     extra_items_added = 0
     MAX_EXTRA_ITEMS = 3
 
-    while extra_items_added < MAX_EXTRA_ITEMS and utility_items_pool:
-        next_item, _ = find_most_similar_item(character["description"], utility_items_pool)
-        
+    # Una sola query top-k sull'indice (una in più per eventuali duplicati dell'arma)
+    ranked = catalog_indexes.get("Items").top_k(
+        [character["description"]], k=MAX_EXTRA_ITEMS + len(inventory), candidates=utility_items_pool
+    )[0]
+
+    for next_item, _ in ranked:
+        if extra_items_added >= MAX_EXTRA_ITEMS:
+            break
         if next_item["name"] not in inventory:
             inventory.append(next_item["name"])
             extra_items_added += 1
-        
-        # Rimuovi dalla pool locale per evitare duplicati nel loop
-        utility_items_pool.remove(next_item)
 
     character["inventory"] = inventory
 
@@ -384,7 +486,7 @@ def create_character_from_description(description: str) -> dict:
     
     if character["class"] not in existing_class_names:
         if classes_db:
-            most_similar_class, _ = find_most_similar_item(character["class"], classes_db)
+            most_similar_class, _ = most_similar_in_catalog("Classes", character["class"], classes_db)
             character["class"] = most_similar_class["name"]
         else:
             character["class"] = "Warrior" # Fallback estremo
@@ -421,6 +523,74 @@ def find_most_similar_item(description, items):
     return items[max_index], similarity_scores[max_index]
 
 
+# Precomputed TF-IDF indexes over the Items/Skills/Classes collections (see similarity.py)
+# Fitted once per worker on first use; call catalog_indexes.invalidate() when a catalog changes
+# The documents come from the catalog cache, and an index is dropped whenever its catalog reloads
+catalog_indexes = IndexRegistry(loader=catalog.all)
+catalog.on_change(catalog_indexes.invalidate)
+catalog.on_change(pipelines.invalidate)
+
+
+# Like find_most_similar_item, but only transforms the text against the catalog index.
+# Candidates that are not in the catalog (e.g. the fallback class list) use the one-off refit.
+def most_similar_in_catalog(catalog, text, candidates):
+    best, score = catalog_indexes.get(catalog).query(text, candidates)
+    if best is None:
+        return find_most_similar_item(text, candidates)
+    return best, score
+
+
+# World knowledge for one turn: the catalog entries closest to what the player is doing
+# (input, location, quest, inventory) instead of every item and skill name of the DB.
+def world_knowledge_prompt(user_input, state, character):
+    query = " ".join([
+        user_input,
+        state.get("location") or "",
+        state.get("quest") or "",
+        " ".join(character.get("inventory", []))
+    ])
+    config = global_config.config
+    sections = []
+    for catalog_name, label, k in (("Items", "Existing Items", config["WORLD_KNOWLEDGE_ITEMS"]),
+                                   ("Skills", "Existing Spells/Skills", config["WORLD_KNOWLEDGE_SKILLS"])):
+        try:
+            ranked = catalog_indexes.get(catalog_name).top_k([query], k=k)[0]
+        except Exception as e:
+            print(f"[ERROR] World knowledge retrieval failed for {catalog_name}: {e}")
+            ranked = []
+        sections.append(f"{label}: [{', '.join(doc['name'] for doc, _ in ranked)}]")
+
+    return {
+        "role": "system",
+        "content": (
+            "WORLD KNOWLEDGE (the entries relevant to this scene):\n"
+            + "\n".join(sections) + "\n"
+            "IMPORTANT:\n"
+            "- Only allow the player to find items in this list.\n"
+            "- Ensure used skills match a name in the list."
+        )
+    }
+
+
+# found_items proposed by the narrator, checked against the whole Items catalog (not only
+# the entries shown in the prompt). Returns the canonical names; unknown items are dropped.
+def validate_found_items(names):
+    valid = []
+    for name in names:
+        if not isinstance(name, str) or not name.strip():
+            continue
+        item = catalog.get("Items", name)
+        if item is None:
+            best, score = catalog_indexes.get("Items").query(name)
+            if best is not None and score >= global_config.config["FOUND_ITEM_MATCH_THRESHOLD"]:
+                item = best
+        if item is None:
+            print(f"[WARN] Narrator proposed an unknown item, ignored: {name}")
+            continue
+        valid.append(item["name"])
+    return valid
+
+
 
 # Example of approved classes (obviously this should be taken from the database)
 #? OR we shoud just create a local classes file
@@ -436,34 +606,27 @@ def find_most_similar_item(description, items):
 # if we want to add more complexity to attack we can add area-radius (so it can hit multiple enemies)
 
 def roll_d6():
-    return random.randint(1, 6)
+    return dice.rng().randint(1, 6)
 
 def roll_d8():
-    return random.randint(1, 8)
+    return dice.rng().randint(1, 8)
 
 def roll_d12():
-    return random.randint(1, 12)
+    return dice.rng().randint(1, 12)
 
 def roll_d20():
-    return random.randint(1, 20)
+    return dice.rng().randint(1, 20)
 
 # it takes a dice expression like "2d6+3" and returns the result of the roll
 # Return -> Rolls: [4, 6], Total: 13
 # Rolls for narration and total for calculations
+# The expression is compiled once and cached (see dice.py), rolls use the RNG of the turn
 def roll_dice(expr: str):
-    # Also black magic :-)
-    match = re.match(r"(\d+)d(\d+)([+-]\d+)?", expr.replace(" ", ""))
-    if not match:
-        return 0
-    #         V  <- group 1 is the number of dice, group 2 is the die type, group 3 is the modifier (if any)
-    n =   int(match.group(1))
-    die = int(match.group(2))
-    mod = int(match.group(3)) if match.group(3) else 0
-
-    rolls = [random.randint(1, die) for _ in range(n)]  # Roll the dice
-    total = sum(rolls) + mod
-
-    return total, rolls
+    try:
+        return dice.roll(expr)
+    except DiceError as e:
+        print(f"[WARN] {e}")
+        return 0, []
 
 
 # Stat modifier calculation (D&D style)
@@ -488,18 +651,20 @@ def hit_check(attacker: dict, defender: dict, skill: dict = None, weapon_item: d
         cast_via_wand = skill.get("_cast_via_wand", False)
 
         if not cast_via_wand:
-            mana_cost = sum(e.get("mana_cost", 0) for e in skill.get("effects", []))
+            mana_cost = pipelines.get("Skills", skill).mana_cost
             if attacker["mana"] < mana_cost:
                 return False
             attacker["mana"] = update_stat(attacker["mana"], -mana_cost, 0)
 
         return True
 
-    # Physical attacks
+    # Physical attacks: a weapon document or a compiled enemy attack
     if weapon_item is None:
         return False
+    if not isinstance(weapon_item, EffectPipeline):
+        weapon_item = pipelines.get("Items", weapon_item)
 
-    sub_type = weapon_item.get("subType", "melee")
+    sub_type = weapon_item.sub_type
 
     if sub_type == "ranged":
         attack_stat = attacker["stats"]["DEX"]
@@ -513,15 +678,9 @@ def hit_check(attacker: dict, defender: dict, skill: dict = None, weapon_item: d
 
 
 
+# The effects are compiled once per catalog document (see effects.py)
 def skill_damage(skill, character):
-    total = 0
-    all_rolls = []
-
-    for effect in skill.get("effects", []):
-        if effect["kind"] == "damage":
-            dmg_total, rolls = roll_dice(effect["value"])
-            all_rolls.extend(rolls)
-            total += dmg_total
+    total, all_rolls = EffectPipeline.roll(pipelines.get("Skills", skill).damage)
 
     scaling = stat_scaling(skill["type"], character["stats"])
     total += scaling
@@ -529,64 +688,41 @@ def skill_damage(skill, character):
     return {"total": max(0, total), "rolls": all_rolls, "scaling": scaling}
 
 def skill_buff(skill, character):
-    total = 0
-    all_rolls = []
-    duration = 0
-
-    for effect in skill.get("effects", []):
-        if effect["kind"] == "buff":
-            buff_total, rolls = roll_dice(effect["value"])
-            all_rolls.extend(rolls)
-            total += buff_total
-            if "duration" in effect:
-                duration, _ = roll_dice(effect["duration"])
+    buffs = pipelines.get("Skills", skill).buff
+    total, all_rolls = EffectPipeline.roll(buffs)
+    duration = EffectPipeline.duration(buffs)
 
     return {"total": total, "rolls": all_rolls, "duration": duration}
 
 
 def skill_debuff(skill, character):
-    total = 0
-    all_rolls = []
-    duration = 0
-
-    for effect in skill.get("effects", []):
-        if effect["kind"] == "debuff":
-            debuff_total, rolls = roll_dice(effect["value"])
-            all_rolls.extend(rolls)
-            total += debuff_total
-            if "duration" in effect:
-                duration, _ = roll_dice(effect["duration"])
+    debuffs = pipelines.get("Skills", skill).debuff
+    total, all_rolls = EffectPipeline.roll(debuffs)
+    duration = EffectPipeline.duration(debuffs)
 
     return {"total": total, "rolls": all_rolls, "duration": duration}
 
 
 def weapon_base_damage(weapon_item: dict) -> int:
-    total = 0
-    all_rolls = []
-
-    for effect in weapon_item.get("effects", []):
-        if effect["kind"] == "damage":
-            dmg, rolls = roll_dice(effect["value"])
-            total += dmg
-            all_rolls.extend(rolls)
+    total, all_rolls = EffectPipeline.roll(pipelines.get("Items", weapon_item).damage)
 
     return {"total": total, "rolls": all_rolls}
 
 
-# Decide who starts combat using DEX.
-def determine_initiative(player: dict, enemy: dict):
-    while True:
-        player_roll = roll_d20() + stat_modifier(player["stats"]["DEX"])
-        enemy_roll  = roll_d20() + stat_modifier(enemy["stats"]["DEX"])
+# Turn order of any number of actors: d20 + DEX modifier, rolled once.
+# Ties go to the higher DEX, then to a coin flip (no rerolls).
+def initiative_order(actors):
+    rolls = [
+        (roll_d20() + stat_modifier(actor["stats"]["DEX"]), actor["stats"]["DEX"], dice.rng().random(), i)
+        for i, actor in enumerate(actors)
+    ]
+    print("[INITIATIVE] " + " | ".join(f"{actors[i]['name']} rolls {roll}" for roll, _, _, i in rolls))
+    return [actors[i] for _, _, _, i in sorted(rolls, reverse=True)]
 
-        print(f"[INITIATIVE] {player['name']} rolls {player_roll} | {enemy['name']} rolls {enemy_roll}")
 
-        if player_roll > enemy_roll:
-            return [player, enemy]
-        elif enemy_roll > player_roll:
-            return [enemy, player]
-        else:
-            print("[INITIATIVE] Tie! Rerolling...")
+# Decide who starts combat using DEX.
+def determine_initiative(player: dict, enemy: dict):
+    return initiative_order([player, enemy])
 
 
 # Perform an attack (weapon or skill) and return combat result.
@@ -655,7 +791,7 @@ def use_item(character, real_name, items):
         return False, "Item not found"
 
     real_name = inventory_map[real_name]
-    item = next((i for i in items if i["name"] == real_name), None)
+    item = next((i for i in items if i["name"] == real_name), None) or get_item_by_name(real_name)
     if not item:
         return False, "Invalid item"
 
@@ -664,32 +800,21 @@ def use_item(character, real_name, items):
         character["equipped_weapon"] = item["name"]
         return True, f"You equip the {item['name']}."
 
-    # Healing or fixed effect
-    for effect in item.get("effects", []):
-        if effect["kind"] == "heal":
-            value = str(effect["value"]).strip()
-
-            # Detect dice expression like 3d6+2
-            dice_pattern = r"^\d+d\d+([+-]\d+)?$"
-            if re.match(dice_pattern, value):
-                heal, rolls = roll_dice(value)
-                character["current_hp"] = update_stat(character["current_hp"], heal, 0, character["max_hp"])
-                return True, f"You heal for {heal} HP (rolls: {rolls})"
-            else:
-                # Treat as fixed number
-                try:
-                    heal = int(value)
-                except:
-                    heal = 0
-                character["current_hp"] = update_stat(character["current_hp"], heal, 0, character["max_hp"])
-                return True, f"You heal for {heal} HP."
+    # Healing or fixed effect (a dice expression like 3d6+2 or a constant)
+    effects = pipelines.get("Items", item)
+    if effects.heal:
+        heal, rolls = EffectPipeline.roll(effects.heal[:1])
+        character["current_hp"] = update_stat(character["current_hp"], heal, 0, character["max_hp"])
+        if rolls:
+            return True, f"You heal for {heal} HP (rolls: {rolls})"
+        return True, f"You heal for {heal} HP."
 
     # Handle consumable uses
     if "uses" in item and item["uses"] > 0:
-        item["uses"] -= 1
-        if item["uses"] == 0:
+        uses_left = item["uses"] - 1
+        if uses_left == 0:
             character["inventory"].remove(real_name)
-        return True, f"Used {real_name}, {item['uses']} uses left"
+        return True, f"Used {real_name}, {uses_left} uses left"
 
     # Default: remove consumable
     character["inventory"].remove(real_name)
@@ -708,17 +833,9 @@ Args:
 def get_db_item_names_list(item_type=None):
 
     try:
-        # Prepara il filtro query
-        query = {}
-        if item_type:
-            query["itemType"] = item_type
-
-        # Query ottimizzata: Proiezione solo sul campo 'name' e esclusione di '_id'
-        # Questo riduce drasticamente il traffico di rete tra App e DB
-        cursor = current_app.db['Items'].find(query, {"name": 1, "_id": 0})
-        
-        # Estrae i nomi dal cursore
-        names = [doc["name"] for doc in cursor]
+        # Nomi dalla cache dei cataloghi: nessuna query al DB
+        names = [doc["name"] for doc in catalog.all('Items')
+                 if not item_type or doc.get("itemType") == item_type]
         
         # Unisce in una singola stringa separata da virgole (formato ideale per i prompt AI)
         return ", ".join(names)
@@ -729,10 +846,8 @@ def get_db_item_names_list(item_type=None):
 
 
 
-# Parse free-text player input using AI and return one of the four actions
-def get_action_from_ai(user_input: str, character: dict) -> str:
-    print(f"\n[AI Parser] Analyzing: '{user_input}'")
-    
+# Skill and item documents the character can use in combat
+def combat_loadout(character):
     # Get character's actual skills and items
     character_skills = character.get("skills", [])
     character_items = character.get("inventory", [])
@@ -750,14 +865,41 @@ def get_action_from_ai(user_input: str, character: dict) -> str:
         item = get_item_by_name(item_name, ITEMS_DB)
         if item:
             available_items.append(item)
+    return available_skills, available_items
+
+
+# What the intent engine alone makes of the input (no model call)
+def guess_intent(user_input, character, enemy_count=None, loadout=None):
+    available_skills, available_items = loadout or combat_loadout(character)
+    return engine_for(available_skills, available_items).classify(user_input, enemy_count)
+
+
+# Parse free-text player input and return one of the four actions (or "target").
+# The rule-based intent engine answers first; the model is only asked when it is unsure.
+# loadout / intent: already computed by the caller (see combat_loop_modular)
+def get_action_from_ai(user_input: str, character: dict, enemy_count: int = None, loadout=None, intent=None) -> str:
+    print(f"\n[AI Parser] Analyzing: '{user_input}'")
+    available_skills, available_items = loadout or combat_loadout(character)
     
     print(f"[AI Parser] Character has {len(available_skills)} skills: {[s['name'] for s in available_skills]}")
     print(f"[AI Parser] Character has {len(available_items)} items: {[i['name'] for i in available_items]}")
+
+    if intent is None:
+        intent = engine_for(available_skills, available_items).classify(user_input, enemy_count)
+    print(f"[AI Parser] Intent engine: {intent}")
+    if intent.confidence >= global_config.config["INTENT_CONFIDENCE_THRESHOLD"] or intent.action == "target":
+        if intent.action == "use skill":
+            character["_selected_skill"] = intent.target
+        elif intent.action == "use item":
+            character["_selected_item"] = intent.target
+        elif intent.action == "target":
+            character["_selected_target"] = intent.target
+        return intent.action
     
     # Check if input matches any skill
     if available_skills:
         # Find the most similar skill to user input
-        best_skill, skill_similarity = find_most_similar_item(user_input, available_skills)
+        best_skill, skill_similarity = most_similar_in_catalog("Skills", user_input, available_skills)
         print(f"[AI Parser] Best skill match: '{best_skill['name']}' (similarity: {skill_similarity:.2f})")
         
         if skill_similarity > 0.3:  # Good enough match
@@ -769,7 +911,7 @@ def get_action_from_ai(user_input: str, character: dict) -> str:
     
     # Check if input matches any item
     if available_items:
-        best_item, item_similarity = find_most_similar_item(user_input, available_items)
+        best_item, item_similarity = most_similar_in_catalog("Items", user_input, available_items)
         print(f"[AI Parser] Best item match: '{best_item['name']}' (similarity: {item_similarity:.2f})")
         
         if item_similarity > 0.3:
@@ -777,21 +919,6 @@ def get_action_from_ai(user_input: str, character: dict) -> str:
             character["_selected_item"] = best_item["name"]
             return "use item"
     
-    # Check for attack keywords
-    attack_keywords = ["attack", "hit", "strike", "slash", "shoot", "swing", "bash", "bow", "sword", "arrow", "melee"]
-    user_input_lower = user_input.lower()
-    for keyword in attack_keywords:
-        if keyword in user_input_lower:
-            print(f"[AI Parser] Detected attack keyword: '{keyword}'")
-            return "attack"
-    
-    # Check for run keywords
-    run_keywords = ["run", "flee", "escape", "retreat", "withdraw", "leave"]
-    for keyword in run_keywords:
-        if keyword in user_input_lower:
-            print(f"[AI Parser] Detected run keyword: '{keyword}'")
-            return "run"
-    
     # Fallback: Ask AI to decide
     print("[AI Parser] Using AI to decide action...")
     
@@ -823,7 +950,8 @@ Example: {{"action": "use skill", "target_skill": "Fire Bolt", "confidence": 0.8
     ]
     
     try:
-        raw = narrate(prompt)
+        # Same input with the same skills and items: answered by the cache, no network call
+        raw = narrate(prompt, cache=action_cache, cacheable=_is_json, call_type="parser")
         parsed = extract_json(raw)
         action = parsed.get("action", "attack").lower()
         
@@ -849,19 +977,15 @@ Example: {{"action": "use skill", "target_skill": "Fire Bolt", "confidence": 0.8
 # Sostituisce la vecchia funzione che usava la lista locale
 def get_item_by_name(name: str, items_db=None): 
     """
-    Cerca i dettagli completi di un oggetto nel DB dato il nome.
-    Ignora 'items_db' se passato per retro-compatibilità, usa MongoDB.
+    Cerca i dettagli completi di un oggetto nel catalogo dato il nome.
+    Ignora 'items_db' se passato per retro-compatibilità, usa la cache dei cataloghi.
     """
     if not name:
         return None
         
     try:
-        # Cerca l'oggetto nel DB (case insensitive con regex)
-        # Esempio: "longbow" trova "Longbow"
-        item = current_app.db['Items'].find_one(
-            {"name": {"$regex": f"^{name}$", "$options": "i"}}
-        )
-        return item
+        # Case insensitive: "longbow" trova "Longbow"
+        return catalog.get('Items', name)
     except Exception as e:
         print(f"[ERROR] Item lookup failed for '{name}': {e}")
         return None
@@ -878,10 +1002,8 @@ def get_skill_by_name(name: str, skills_db=None, player_level=None):
         return None
 
     try:
-        # Cerca la skill nel DB (Case Insensitive)
-        skill = current_app.db['Skills'].find_one(
-            {"name": {"$regex": f"^{name}$", "$options": "i"}}
-        )
+        # Cerca la skill nel catalogo (Case Insensitive)
+        skill = catalog.get('Skills', name)
 
         if not skill:
             return None
@@ -928,6 +1050,23 @@ except Exception as e:
     print(f"[ERROR] Failed to load enemies.json: {e}")
     ENEMIES_DB = []
 
+# Frozen enemy templates, attacks compiled, ahead of the first fight (see enemies.py)
+enemy_templates.load(ENEMIES_DB)
+
+
+# Bestiary of the encounter tables: the Enemies catalog, or enemies.json while it is empty
+def load_enemy_templates():
+    docs = catalog.all("Enemies")
+    if not docs:
+        print("[WARN] Enemies catalog is empty, spawning from enemies.json")
+        docs = ENEMIES_DB
+    enemy_templates.load(docs)
+    return enemy_templates.all()
+
+
+encounter_index = EncounterIndex(loader=load_enemy_templates)
+catalog.on_change(encounter_index.invalidate)
+
 
 
 
@@ -956,23 +1095,18 @@ def combat_loop(player, enemies, items, state, mode="manual", similarity_thresho
         #! ================= PLAYER TURN =================
         user_input = input("\nDescribe your action (or 'target X' to switch enemy): ").strip()
         
+        # Parse player action (intent engine first, AI when unsure)
+        action = get_action_from_ai(user_input, player, len(alive_enemies))
+
         # Check if player wants to switch target
-        if user_input.lower().startswith("target "):
-            try:
-                target_num = int(user_input.split()[1])
-                if 1 <= target_num <= len(alive_enemies):
-                    current_enemy_index = target_num - 1
-                    print(f"Switched target to {alive_enemies[current_enemy_index]['name']}")
-                    continue
-                else:
-                    print(f"Invalid target number. Choose 1-{len(alive_enemies)}")
-                    continue
-            except (ValueError, IndexError):
-                print("Usage: 'target X' where X is enemy number")
-                continue
-        
-        # Parse player action with intelligent AI
-        action = get_action_from_ai(user_input, player)
+        if action == "target":
+            target_idx = player.pop("_selected_target", None)
+            if target_idx is None:
+                print(f"Invalid target number. Choose 1-{len(alive_enemies)}")
+            else:
+                current_enemy_index = target_idx
+                print(f"Switched target to {alive_enemies[current_enemy_index]['name']}")
+            continue
         
         # Clear previous selections
         selected_skill = player.pop("_selected_skill", None)
@@ -1004,7 +1138,10 @@ def combat_loop(player, enemies, items, state, mode="manual", similarity_thresho
                 if not skill:
                     combat_text = f"Skill '{selected_skill}' not found!"
                 else:
+                    # Catalog documents are read-only: local copies carry the flag and usages
+                    skill = dict(skill)
                     weapon_item = get_item_by_name(player["equipped_weapon"], items)
+                    weapon_item = dict(weapon_item) if weapon_item else None
 
                     # Wand-based casting (no mana, consumes usages)
                     if (
@@ -1150,71 +1287,13 @@ def combat_loop(player, enemies, items, state, mode="manual", similarity_thresho
 
 
 
-# Spawn an enemy based on level budget system
-# Returns a copy of an enemy template with randomized HP
+# Spawn the enemies of an encounter for a location and a player level
+# Returns EnemyInstances (see enemies.py) drawn from the encounter tables (see encounters.py)
 def spawn_enemy(location_type="wilderness", player_level=1):
-    # Get all enemies at or below player level
-    all_enemies = ENEMIES_DB.copy()
-    
-    if not all_enemies:
-        print("[ERROR] No enemies loaded from enemies.json")
-        return []
-    
-    # Decide: multiple weak enemies or single stronger enemy?
-    choice = random.random()
-    
-    if choice < 0.5 and player_level >= 2:
-        # Spawn multiple weak enemies (e.g., 2 level 1 goblins)
-        num_enemies = random.randint(2, min(3, player_level))
-        weak_enemies = [e for e in all_enemies if e["level"] == 1]
-        
-        if not weak_enemies:
-            weak_enemies = [e for e in all_enemies if e["level"] <= player_level]
-        
-        spawned_enemies = []
-        for _ in range(num_enemies):
-            enemy_template = random.choice(weak_enemies)
-            enemy = enemy_template.copy()
-            
-            # Randomize HP - handle both old and new JSON formats
-            if "max_hp" in enemy:
-                if isinstance(enemy["max_hp"], dict):
-                    # New format: {"min": X, "max": Y}
-                    min_hp = enemy["max_hp"]["min"]
-                    max_hp = enemy["max_hp"]["max"]
-                    enemy["current_hp"] = random.randint(min_hp, max_hp)
-                    enemy["max_hp"] = enemy["current_hp"]
-                else:
-                    # Old format: just a number
-                    enemy["current_hp"] = enemy["max_hp"]
-            
-            spawned_enemies.append(enemy)
-        
-        return spawned_enemies
-    else:
-        # Spawn single enemy at player's level or slightly below
-        max_enemy_level = min(player_level, 10)
-        possible_enemies = [e for e in all_enemies if e["level"] <= max_enemy_level]
-        
-        if not possible_enemies:
-            possible_enemies = [e for e in all_enemies if e["level"] == 1]
-        
-        enemy_template = random.choice(possible_enemies)
-        enemy = enemy_template.copy()
-        
-        # Randomize HP - handle both old and new JSON formats
-        if "max_hp" in enemy:
-            if isinstance(enemy["max_hp"], dict):
-                # New format: {"min": X, "max": Y}
-                min_hp = enemy["max_hp"]["min"]
-                max_hp = enemy["max_hp"]["max"]
-                enemy["current_hp"] = random.randint(min_hp, max_hp)
-                enemy["max_hp"] = enemy["current_hp"]
-            else:
-                # Old format: just a number
-                enemy["current_hp"] = enemy["max_hp"]
-        
-        return [enemy]  # Return as list for consistency
+    enemies = encounter_index.spawn(location_type, player_level)
+    if not enemies:
+        print("[ERROR] No enemies to spawn: the bestiary is empty")
+    return enemies
 
 # Simple AI for enemy to choose an action
 # Returns: ("attack", attack_index) or ("skill", skill_name) or ("item", item_name)
@@ -1225,7 +1304,7 @@ def enemy_choose_action(enemy, player):
     available_attacks = enemy["attacks"]
     
     # Simple random selection from all available attacks
-    attack_index = random.randint(0, len(available_attacks) - 1)
+    attack_index = dice.rng().randint(0, len(available_attacks) - 1)
     return ("attack", attack_index)
 
 
@@ -1233,33 +1312,20 @@ def enemy_choose_action(enemy, player):
 def execute_enemy_action(enemy, player, action_type, action_data):
     if action_type == "attack":
         attack_index = action_data
-        if attack_index < len(enemy.get("attacks", [])):
-            attack = enemy["attacks"][attack_index]
-            
-            # Prepare attack data structure
-            attack_data = {
-                "type": "attack",
-                "effects": attack["effects"]
-            }
+        # Compiled attacks of the enemy (see effects.py)
+        attacks = enemy.template.attacks if isinstance(enemy, EnemyInstance) else pipelines.get("Enemies", enemy)
+        if attack_index < len(attacks):
+            attack = attacks[attack_index]
             
-            # Get weapon type from attack's subType field
-            weapon_item = {"subType": attack.get("subType", "melee")}
-            
-            # Use the proper hit_check function
-            hits = hit_check(enemy, player, skill=attack_data, weapon_item=weapon_item)
+            # The attack's subType (melee/ranged) picks the stat of the hit check
+            hits = hit_check(enemy, player, weapon_item=attack)
             
             if hits:
                 # Calculate damage using the proper dice roll
-                damage_result = roll_dice(attack["effects"][0]["value"])
-                if isinstance(damage_result, tuple):
-                    damage = damage_result[0]
-                    rolls = damage_result[1]
-                else:
-                    damage = damage_result
-                    rolls = []
+                damage, rolls = EffectPipeline.roll(attack.damage)
                 
                 # Apply appropriate stat scaling for damage
-                if weapon_item["subType"] == "ranged":
+                if attack.sub_type == "ranged":
                     stat_bonus = stat_modifier(enemy["stats"]["DEX"])
                 else:
                     stat_bonus = stat_modifier(enemy["stats"]["STR"])
@@ -1276,18 +1342,18 @@ def execute_enemy_action(enemy, player, action_type, action_data):
                 return {
                     "success": True,
                     "damage": total_damage,
-                    "attack_name": attack["name"],
+                    "attack_name": attack.name,
                     "rolls": rolls,
                     "stat_bonus": stat_bonus,
-                    "message": f"The {enemy['name']} uses {attack['name']} for {total_damage} damage!{stat_text}{rolls_text}"
+                    "message": f"The {enemy['name']} uses {attack.name} for {total_damage} damage!{stat_text}{rolls_text}"
                 }
             else:
                 # Miss
                 return {
                     "success": False,
                     "damage": 0,
-                    "attack_name": attack["name"],
-                    "message": f"The {enemy['name']} uses {attack['name']} but misses!"
+                    "attack_name": attack.name,
+                    "message": f"The {enemy['name']} uses {attack.name} but misses!"
                 }
 
     # Fallback
@@ -1386,10 +1452,7 @@ def get_db_item_names_list():
     Restituisce una stringa: "Longbow, Short Sword, Health Potion..."
     """
     try:
-        # Recupera solo il campo 'name', escludendo '_id'
-        cursor = current_app.db['Items'].find({}, {"name": 1, "_id": 0})
-        names = [doc["name"] for doc in cursor]
-        return ", ".join(names)
+        return ", ".join(catalog.names('Items'))
     except Exception as e:
         print(f"[ERROR] Impossibile recuperare nomi oggetti dal DB: {e}")
         return ""
@@ -1399,10 +1462,7 @@ def get_db_skill_names_list():
     Recupera solo i NOMI delle skill dal database per il contesto AI.
     """
     try:
-        # Recupera solo il campo 'name'
-        cursor = current_app.db['Skills'].find({}, {"name": 1, "_id": 0})
-        names = [doc["name"] for doc in cursor]
-        return ", ".join(names)
+        return ", ".join(catalog.names('Skills'))
     except Exception as e:
         print(f"[ERROR] Impossibile recuperare nomi skill dal DB: {e}")
         return ""
@@ -1411,39 +1471,116 @@ def get_db_skill_names_list():
 
 
 
-def main_modular(character_id, user_input):
-    global long_term_memory, turn_count, recent_history, character, state
+# One store per worker: sessions are keyed by (room, character_id)
+sessions = SessionStore(load_character=load_character, save_character=save_character)
+
+# Long-term memory summaries, one model call per compaction, off the request path
+memory_compactor = MemoryCompactor(
+    complete=lambda messages, max_tokens: llm.complete(messages, max_tokens=max_tokens, call_type="summary")
+)
+
+
+# Output entry for a narration: plain text, or (if it was streamed) a dict carrying
+# the stream id so the chat can replace the live message with the final text
+def narration_output(text, stream_id=None):
+    if stream_id is None:
+        return text
+    return {"type": "narration", "stream_id": stream_id, "text": text}
+
+
+# Gives a narration its own stream id and binds on_chunk(stream_id, delta) to it
+def open_narration_stream(on_chunk):
+    if on_chunk is None:
+        return None, None
+    stream_id = str(uuid.uuid4())
+    return stream_id, lambda delta: on_chunk(stream_id, delta)
+
+
+# Narrator messages of a world turn; the player's input is added to the session history
+def world_turn_history(session, user_input, room):
+    session.add_message("user", user_input)
 
-    state.setdefault("in_combat", False)
-    state.setdefault("combat_enemies", None)
+    # Static rules first, then memory, sheet, state and the world knowledge retrieved for this turn, recent history last
+    return narrator_prompt.build(
+        session.recent_history[-10:],
+        memory=session.long_term_memory,
+        character=session.character,
+        state=session.state,
+        knowledge=[world_knowledge_prompt(user_input, session.state, session.character)],
+        label=room
+    )
+
+
+AFTERMATH_INPUT = "The battle is over. I look around."
+
+
+# on_chunk(stream_id, delta): optional, streams every narration while it is generated
+def main_modular(character_id, user_input, room="default", on_chunk=None):
+    #! ================= LOAD SESSION =================
+    session = sessions.get(room, character_id)
+    if session is None:
+        return ["[ERROR] Character not found."]
 
+    # Every roll of the turn comes from the session RNG, so a session can be replayed
+    with dice.use_rng(session.rng):
+        return play_turn(session, user_input, room, on_chunk)
+
+
+def play_turn(session, user_input, room, on_chunk=None):
     output_buffer = []
+    timer = TurnTimer(room)
 
-    #! ================= LOAD CHARACTER =================
-    if turn_count == 0:
-        character_data = load_character(character_id)
-        if not character_data:
-            return ["[ERROR] Character not found."]
+    character = session.character
+    state = session.state
 
-        character = character_data
-        character.setdefault("current_hp", character.get("max_hp", 50))
+    if session.turn_count == 0 and not session.recent_history:
         output_buffer.append(f"Character '{character['name']}' loaded successfully.")
 
     #! ================= COMBAT TURN =================
+    # Room fights go through the turn scheduler (see scheduler.py)
+    room_fight = turn_scheduler.active(room)
+    if room_fight is not None:
+        if state["in_combat"] and session.character_id in room_fight.members:
+            output_buffer.extend(party_turn(room_fight, session, user_input, on_chunk))
+            return output_buffer
+        # A player of the room who is not fighting joins with their first action
+        if not state["in_combat"] and user_input:
+            output_buffer.extend(join_party_combat(room_fight, session))
+            output_buffer.extend(party_turn(room_fight, session, user_input, on_chunk))
+            return output_buffer
+
+    aftermath = None
     if state["in_combat"]:
+        # On victory the aftermath narration starts while the last round is narrated
+        # (not streamed: it must not overtake the round narration in the chat)
+        def prefetch_aftermath():
+            nonlocal aftermath
+            # The fight is over for the narrator: the world prompt must not show it going on
+            # (the combat loop keeps its own reference to the enemies)
+            state["in_combat"] = False
+            state["combat_enemies"] = None
+            with timer.stage("prompt"):
+                history = world_turn_history(session, AFTERMATH_INPUT, room)
+            aftermath = timer.spawn("world narration", narrate_strict, history)
+
         # Pass empty list for items if using DB getter inside loop
         is_finished, victory, logs = combat_loop_modular(
             character,
             state["combat_enemies"],
             [], 
             user_input,
-            state
+            state,
+            on_chunk=on_chunk,
+            timer=timer,
+            on_victory=prefetch_aftermath
         )
 
         output_buffer.extend(logs)
 
         if not is_finished:
             # Combat is NOT over -> Return logs and wait for next player input
+            sessions.commit(session)
+            timer.report()
             return output_buffer
 
         # === IF WE REACH HERE, COMBAT JUST ENDED ===
@@ -1452,60 +1589,59 @@ def main_modular(character_id, user_input):
 
         if not victory:
             output_buffer.append("Game Over.")
+            sessions.commit(session)
+            timer.report()
             return output_buffer
 
         # Victory! Set the input to force the AI to describe the aftermath
-        user_input = "The battle is over. I look around." 
+        user_input = AFTERMATH_INPUT
         
         # IMPORTANT: We do NOT return here. We let the code flow down 
         # to "NORMAL WORLD TURN" so the AI narrates the victory scene immediately.
 
     #! ================= NORMAL WORLD TURN =================
-    recent_history.append({"role": "user", "content": user_input})
-
-    # 1. Retrieve Item/Skill Names for Context
-    available_items_string = get_db_item_names_list()
-    available_skills_string = get_db_skill_names_list()
-
-    # 2. Context Injection
-    context_injection = {
-        "role": "system",
-        "content": f"""
-        WORLD KNOWLEDGE:
-        Existing Items: [{available_items_string}]
-        Existing Spells/Skills: [{available_skills_string}]
-        
-        IMPORTANT:
-        - Only allow the player to find items in this list.
-        - Ensure used skills match a name in the list.
-        """
-    }
-
-    history = [
-        system_rules,
-        alignment_prompt,
-        context_injection,
-        {"role": "system", "content": f"Memory: {long_term_memory}"},
-        {"role": "system", "content": f"Sheet: {character}"},
-        {"role": "system", "content": f"State: {state}"}
-    ] + recent_history[-10:]
+    if aftermath is None:
+        with timer.stage("prompt"):
+            history = world_turn_history(session, user_input, room)
 
     try:
-        data = narrate_strict(history)
-        recent_history.append({"role": "assistant", "content": data.get("narration", "")})
-        turn_count += 1
+        if aftermath is not None:
+            stream_id = None
+            data = aftermath.wait()
+        else:
+            stream_id, on_narration = open_narration_stream(on_chunk)
+            with timer.stage("world narration"):
+                data = narrate_strict(history, on_narration=on_narration)
+
+        # No narrator: the turn does not count (no encounter, no world update)
+        if data["narration"] == NARRATOR_OUT_OF_VOICE:
+            output_buffer.append(narration_output(data["narration"], stream_id))
+            timer.report()
+            return output_buffer
+
+        session.add_message("assistant", data.get("narration", ""))
+        session.turn_count += 1
 
         #! ================= COMBAT CHECK =================
         is_safe_zone = state["location"].lower() in [
             "tavern", "town", "city", "shop", "taverna iniziale"
         ]
-        random_trigger = random.random() < 0.2 and not is_safe_zone
+        random_trigger = dice.rng().random() < 0.2 and not is_safe_zone
 
         # Encounter logic + UI handling
         if data.get("encounter") or random_trigger:
             # output_buffer.append("\n[ALERT] Combat Initiated!")
 
             enemies = spawn_enemy(state["location"].lower(), character["level"])
+
+            # With other players in the room the encounter is a room fight they can join
+            # (see join_party_combat); alone, the solo path below keeps its speculation
+            others = [s for s in sessions.in_room(room) if s is not session and s.character]
+            if global_config.config["PARTY_COMBAT"] and others:
+                output_buffer.extend(start_party_combat(room, [session], enemies, state["location"]))
+                timer.report()
+                return output_buffer
+
             state["in_combat"] = True
             state["combat_enemies"] = enemies
 
@@ -1532,79 +1668,60 @@ def main_modular(character_id, user_input):
             )
 
             output_buffer.extend(logs)
+            sessions.commit(session)
+            timer.report()
             return output_buffer
 
         #! ================= WORLD UPDATES =================
         character["gold"] = update_stat(character["gold"], data.get("gold_change", 0))
         character["xp"] = update_stat(character["xp"], data.get("xp_gained", 0))
 
-        for item in data.get("found_items", []):
+        for item in validate_found_items(data.get("found_items", [])):
             character["inventory"].append(item)
             output_buffer.append(f"[ITEM FOUND] {item}")
 
-        if "location" in data:
+        if data.get("location"):
             state["location"] = data["location"]
-        if "quest" in data:
+        if data.get("quest"):
             state["quest"] = data["quest"]
 
         if data.get("narration"):
-            output_buffer.append(data["narration"])
+            output_buffer.append(narration_output(data["narration"], stream_id))
 
-        if turn_count % 10 == 0:
-            output_buffer.append("[SYSTEM] Ada is condensing memories...")
-            long_term_memory = summarise_memory(long_term_memory, recent_history)
+        # Condensed in the background, the player never waits for it (see memory.py)
+        if session.turn_count % global_config.config["MEMORY_COMPACT_EVERY"] == 0:
+            memory_compactor.schedule(session)
 
     except Exception as e:
         output_buffer.append(f"[NARRATOR ERROR]: {e}")
 
+    sessions.commit(session)
+    timer.report()
     return output_buffer
 
 
-def combat_loop_modular(player, enemies, items, user_input, state):
-    """
-    Processes ONE combat turn.
-    Returns: (is_finished, victory_or_none, message_list)
-    """
-    
-    # If starting fresh without input, just prompt
-    if not user_input:
-        return False, None, ["Combat begins! What will you do?"]
-
-    combat_log = []
+# Player action then enemy turns, on player and enemies (the target is player["_combat_target_idx"]).
+# Returns (turn_text, escaped)
+def resolve_combat_round(player, enemies, items, action, selected_skill=None, selected_item=None):
+    turn_text, escaped = player_turn(player, enemies, items, action, selected_skill, selected_item)
+    if escaped:
+        return turn_text, True
 
+    #! ================= ENEMY TURNS =================
     alive_enemies = [e for e in enemies if e["current_hp"] > 0]
 
-    if not alive_enemies:
-        # Send cleanup UI event
-        combat_log.append({
-            "type": "combat_data",
-            "in_combat": False,
-            "enemies": []
-        })
-        return True, True, ["The battlefield is silent. No enemies remain."]
-
-    target_idx = player.get("_combat_target_idx", 0)
-    if target_idx >= len(alive_enemies):
-        target_idx = 0
-    player["_combat_target_idx"] = target_idx
-
-    current_enemy = alive_enemies[target_idx]
+    for enemy in alive_enemies:
+        turn_text.append(enemy_turn(enemy, player))
 
-    #! ================= PLAYER TURN =================
-    if user_input.lower().startswith("target "):
-        try:
-            idx = int(user_input.split()[1]) - 1
-            if 0 <= idx < len(alive_enemies):
-                player["_combat_target_idx"] = idx
-                return False, None, [f"Target switched to {alive_enemies[idx]['name']}."]
-        except:
-            pass
-        return False, None, ["Invalid target command."]
+    return turn_text, False
 
-    action = get_action_from_ai(user_input, player)
 
-    selected_skill = player.pop("_selected_skill", None)
-    selected_item = player.pop("_selected_item", None)
+# The player's action against their target. Returns (turn_text, escaped)
+def player_turn(player, enemies, items, action, selected_skill=None, selected_item=None):
+    alive_enemies = [e for e in enemies if e["current_hp"] > 0]
+    # The target may have fallen to another party member earlier in the round
+    target_idx = player.get("_combat_target_idx", 0)
+    current_enemy = alive_enemies[target_idx if target_idx < len(alive_enemies) else 0]
 
     turn_text = []
 
@@ -1621,7 +1738,10 @@ def combat_loop_modular(player, enemies, items, user_input, state):
             if not skill:
                 turn_text.append(f"Failed to use '{selected_skill}'. (Level too low?)")
             else:
-                weapon = get_item_by_name(player["equipped_weapon"]) 
+                # Catalog documents are read-only: local copies carry the flag and usages
+                skill = dict(skill)
+                weapon = get_item_by_name(player["equipped_weapon"])
+                weapon = dict(weapon) if weapon else None
 
                 if weapon and weapon.get("subType") == "wand" and weapon.get("usages", 0) > 0:
                     weapon["usages"] -= 1
@@ -1640,31 +1760,24 @@ def combat_loop_modular(player, enemies, items, user_input, state):
     elif action == "run":
         roll = roll_d20() + stat_modifier(player["stats"]["DEX"])
         if roll >= 15:
-            # Send cleanup UI event
-            combat_log.append({
-                "type": "combat_data",
-                "in_combat": False,
-                "enemies": []
-            })
-            return True, True, ["You escape from combat!"]
+            return turn_text, True
         turn_text.append("You fail to escape!")
 
     if current_enemy["current_hp"] <= 0:
         turn_text.append(f"{current_enemy['name']} is defeated!")
         player["_combat_target_idx"] = 0
 
-    #! ================= ENEMY TURNS =================
-    alive_enemies = [e for e in enemies if e["current_hp"] > 0]
+    return turn_text, False
 
-    for enemy in alive_enemies:
-        action_type, action_data = enemy_choose_action(enemy, player)
-        result = execute_enemy_action(enemy, player, action_type, action_data)
-        turn_text.append(f"{enemy['name']}: {result['message']}")
 
-    #! ================= AI NARRATION =================
-    location = state.get("location", "Unknown Location")
-    narration = narrate_flavor(
-        f"""
+def enemy_turn(enemy, player):
+    action_type, action_data = enemy_choose_action(enemy, player)
+    result = execute_enemy_action(enemy, player, action_type, action_data)
+    return f"{enemy['name']}: {result['message']}"
+
+
+def combat_scene_prompt(location, player, turn_text):
+    return f"""
     Location: {location}
 
     Player HP: {player['current_hp']}/{player['max_hp']}
@@ -1676,9 +1789,146 @@ def combat_loop_modular(player, enemies, items, user_input, state):
     - Describe the fight taking place in the specified location.
     - Do NOT invent forests, dungeons, or outdoor settings unless stated.
     """
+
+
+# Player fields a plain attack round can change (hit check, enemy attacks, target)
+SPECULATIVE_PLAYER_FIELDS = ("current_hp", "mana", "_combat_target_idx")
+
+
+# Copies the state of a speculative round into the real objects (same identities:
+# the session and state["combat_enemies"] keep pointing at them). Only the fields the
+# round changes are copied: the parser may have set others on the real player meanwhile.
+def _adopt(real, speculative):
+    if isinstance(real, EnemyInstance):
+        real.adopt(speculative)
+        return
+    for field in SPECULATIVE_PLAYER_FIELDS:
+        if field in speculative:
+            real[field] = speculative[field]
+        else:
+            real.pop(field, None)
+
+
+# timer: TurnTimer of the turn (see pipeline.py)
+# on_victory(): called as soon as the round is known to be won, before the round
+# narration is awaited, so the caller can start the next model call concurrently
+def combat_loop_modular(player, enemies, items, user_input, state, on_chunk=None, timer=None, on_victory=None):
+    """
+    Processes ONE combat turn.
+    Returns: (is_finished, victory_or_none, message_list)
+    """
+    
+    # If starting fresh without input, just prompt
+    if not user_input:
+        return False, None, ["Combat begins! What will you do?"]
+
+    timer = timer or TurnTimer("combat")
+    combat_log = []
+
+    alive_enemies = [e for e in enemies if e["current_hp"] > 0]
+
+    if not alive_enemies:
+        # Send cleanup UI event
+        combat_log.append({
+            "type": "combat_data",
+            "in_combat": False,
+            "enemies": []
+        })
+        return True, True, ["The battlefield is silent. No enemies remain."]
+
+    target_idx = player.get("_combat_target_idx", 0)
+    if target_idx >= len(alive_enemies):
+        target_idx = 0
+    player["_combat_target_idx"] = target_idx
+
+    location = state.get("location", "Unknown Location")
+    stream_id, on_delta = open_narration_stream(on_chunk)
+    turn_text = narration_thread = None
+
+    #! ================= PLAYER TURN =================
+    # An input the intent engine cannot settle goes to the model. Meanwhile the most
+    # likely outcome (a plain attack) is rolled on copies and already narrated; if the
+    # parser agrees, both are kept and the round costs one model call of wall time.
+    # The loadout and the intent engine's guess are computed once and handed to the parser
+    with timer.stage("guess"):
+        loadout = combat_loadout(player)
+        guess = guess_intent(user_input, player, len(alive_enemies), loadout=loadout)
+    speculate = (
+        global_config.config["TURN_SPECULATION"]
+        and guess.confidence < global_config.config["INTENT_CONFIDENCE_THRESHOLD"]
+        and guess.action == "attack"
     )
 
-    combat_log.append(narration)
+    if speculate:
+        parse = timer.spawn("parse", get_action_from_ai, user_input, player, len(alive_enemies),
+                            loadout=loadout, intent=guess)
+        # An attack round only writes top-level fields of the player: a shallow copy is enough
+        spec_player, spec_enemies = dict(player), copy.deepcopy(enemies)
+        # Rolled on a fork of the RNG too: a dropped guess leaves no trace in the sequence
+        spec_rng = random.Random()
+        spec_rng.setstate(dice.rng().getstate())
+        with timer.stage("speculative round"), dice.use_rng(spec_rng):
+            spec_text, _ = resolve_combat_round(spec_player, spec_enemies, items, "attack")
+        spec_stream = SpeculativeStream(on_delta) if on_delta else None
+        narration_thread = timer.spawn(
+            "speculative narration", narrate_flavor, combat_scene_prompt(location, spec_player, spec_text),
+            on_delta=spec_stream.feed if spec_stream else None
+        )
+        action = parse.wait()
+        if action == "attack":
+            print("[INFO] Speculative combat round confirmed by the parser")
+            if spec_stream:
+                spec_stream.confirm()
+            _adopt(player, spec_player)
+            for enemy, spec_enemy in zip(enemies, spec_enemies):
+                _adopt(enemy, spec_enemy)
+            dice.rng().setstate(spec_rng.getstate())
+            turn_text = spec_text
+        else:
+            print(f"[INFO] Speculative combat round dropped (parser said '{action}')")
+            if spec_stream:
+                spec_stream.cancel()
+            narration_thread.kill()
+            narration_thread = None
+    else:
+        with timer.stage("parse"):
+            action = get_action_from_ai(user_input, player, len(alive_enemies), loadout=loadout, intent=guess)
+
+    if action == "target":
+        idx = player.pop("_selected_target", None)
+        if idx is None:
+            return False, None, ["Invalid target command."]
+        player["_combat_target_idx"] = idx
+        return False, None, [f"Target switched to {alive_enemies[idx]['name']}."]
+
+    selected_skill = player.pop("_selected_skill", None)
+    selected_item = player.pop("_selected_item", None)
+
+    if turn_text is None:
+        with timer.stage("round"):
+            turn_text, escaped = resolve_combat_round(player, enemies, items, action, selected_skill, selected_item)
+        if escaped:
+            # Send cleanup UI event
+            combat_log.append({
+                "type": "combat_data",
+                "in_combat": False,
+                "enemies": []
+            })
+            return True, True, ["You escape from combat!"]
+
+    #! ================= AI NARRATION =================
+    if narration_thread is None:
+        narration_thread = timer.spawn(
+            "narration", narrate_flavor, combat_scene_prompt(location, player, turn_text), on_delta=on_delta
+        )
+
+    # Won: the caller's next call (the aftermath) runs while this narration is written
+    alive_after_turn = [e for e in enemies if e["current_hp"] > 0]
+    if not alive_after_turn and player["current_hp"] > 0 and on_victory:
+        on_victory()
+
+    narration = narration_thread.wait()
+    combat_log.append(narration_output(narration, stream_id))
 
     # 1. Player Defeated
     if player["current_hp"] <= 0:
@@ -1693,8 +1943,6 @@ def combat_loop_modular(player, enemies, items, user_input, state):
         return True, False, combat_log + ["You have been defeated."]
 
     # 2. Victory Check
-    alive_after_turn = [e for e in enemies if e["current_hp"] > 0]
-    
     if not alive_after_turn:
         total_xp = sum(e.get("cr", 1) * 10 for e in enemies)
         player["xp"] = update_stat(player["xp"], total_xp)
@@ -1736,17 +1984,195 @@ def combat_loop_modular(player, enemies, items, user_input, state):
 
 
 
+#! ================= PARTY COMBAT =================
+
+# Starts a room fight for the sessions of party (see scheduler.py)
+def start_party_combat(room, party, enemies, location):
+    ranked = initiative_order([s.character for s in party] + enemies)
+    keys = {id(s.character): ("player", s.character_id) for s in party}
+    keys.update({id(e): ("enemy", i) for i, e in enumerate(enemies)})
+
+    for s in party:
+        s.state["in_combat"] = True
+        s.state["combat_enemies"] = enemies
+        s.character["_combat_target_idx"] = 0
+
+    # The fight rolls from its own RNG, seeded from the session that met the enemies
+    combat = PartyCombat(
+        room, {s.character_id: s for s in party}, enemies, [keys[id(a)] for a in ranked],
+        random.Random(dice.rng().getrandbits(32)), location
+    )
+    turn_scheduler.start(combat)
+    for s in party:
+        sessions.commit(s)
+
+    order = ", ".join(actor["name"] for actor in ranked)
+    return [
+        party_combat_data(combat),
+        f"Combat begins! Turn order: {order}. What will you do? (the others in the room can join by acting)"
+    ]
+
+
+# A player of the room opts into its fight
+def join_party_combat(combat, session):
+    combat.join(session)
+    session.character["_combat_target_idx"] = 0
+    sessions.commit(session)
+    return [f"{session.character['name']} joins the fight!"]
+
+
+# A member's message during a room fight: the action is parsed here (in the member's own
+# request) and handed to the scheduler. The member who completes the round gets its
+# outputs, the others are told who the round is waiting for.
+def party_turn(combat, session, user_input, on_chunk=None):
+    player = session.character
+    # The session store may have resumed this session into a new object
+    combat.members[session.character_id] = session
+    combat.roster[session.character_id] = session
+
+    if not user_input:
+        return ["Combat is on! What will you do?"]
+
+    alive_enemies = [e for e in combat.enemies if e["current_hp"] > 0]
+    action = get_action_from_ai(user_input, player, len(alive_enemies))
+
+    if action == "target":
+        idx = player.pop("_selected_target", None)
+        if idx is None:
+            return ["Invalid target command."]
+        player["_combat_target_idx"] = idx
+        return [f"Target switched to {alive_enemies[idx]['name']}."]
+
+    submitted = (action, player.pop("_selected_skill", None), player.pop("_selected_item", None))
+    outputs = turn_scheduler.submit(combat.room, session.character_id, submitted, on_chunk)
+    if outputs is not None:
+        return outputs
+
+    waiting = combat.names(combat.waiting)
+    if not waiting:
+        return []   # the round was closed by its window meanwhile (delivered by on_round)
+    return [f"{player['name']} is ready. Waiting for {', '.join(waiting)} (at most {turn_scheduler.window}s)."]
+
+
+def party_combat_data(combat):
+    return {
+        "type": "combat_data",
+        "in_combat": not combat.finished,
+        "enemies": [] if combat.finished else [
+            {"name": e["name"], "current_hp": e["current_hp"], "max_hp": e["max_hp"]}
+            for e in combat.enemies if e["current_hp"] > 0
+        ],
+        # Every member's HP: each client keeps its own (see chat.js)
+        "party": [
+            {"character_id": cid, "name": s.character["name"],
+             "current_hp": s.character["current_hp"], "max_hp": s.character["max_hp"]}
+            for cid, s in combat.roster.items()
+        ]
+    }
+
+
+def party_scene_prompt(combat, turn_text):
+    party = ", ".join(
+        f"{s.character['name']} {s.character['current_hp']}/{s.character['max_hp']} HP" for s in combat.roster.values()
+    )
+    return f"""
+    Location: {combat.location}
+
+    Party: {party}
+
+    Combat round {combat.round}:
+    {chr(10).join(turn_text)}
+
+    IMPORTANT:
+    - Narrate the whole round in one scene, for the whole party, in the order of the events.
+    - Describe the fight taking place in the specified location.
+    - Do NOT invent forests, dungeons, or outdoor settings unless stated.
+    """
+
+
+# One round of a room fight, in initiative order, with the actions collected by the
+# scheduler ({character_id: (action, skill, item)}; members without one hesitate),
+# then one narration for the whole round
+def resolve_party_round(combat, actions, on_chunk=None):
+    timer = TurnTimer(f"{combat.room} round {combat.round}")
+    enemies = combat.enemies
+    turn_text = []
+
+    with dice.use_rng(combat.rng), timer.stage("round"):
+        for kind, key in combat.order:
+            if not any(e["current_hp"] > 0 for e in enemies):
+                break
+            if kind == "player":
+                session = combat.members.get(key)
+                if session is None or session.character["current_hp"] <= 0:
+                    continue
+                player = session.character
+                if key not in actions:
+                    turn_text.append(f"{player['name']} hesitates.")
+                    continue
+                lines, escaped = player_turn(player, enemies, [], *actions[key])
+                turn_text.extend(f"{player['name']}: {line}" for line in lines)
+                if escaped:
+                    turn_text.append(f"{player['name']} escapes from combat!")
+                    combat.remove(session.character_id)
+            else:
+                enemy = enemies[key]
+                targets = [s.character for s in combat.members.values() if s.character["current_hp"] > 0]
+                if enemy["current_hp"] <= 0 or not targets:
+                    continue
+                target = dice.rng().choice(targets)
+                turn_text.append(f"{enemy_turn(enemy, target)} (target: {target['name']})")
+                if target["current_hp"] <= 0:
+                    turn_text.append(f"{target['name']} falls!")
+
+    stream_id, on_delta = open_narration_stream(on_chunk)
+    with timer.stage("narration"):
+        narration = narrate_flavor(party_scene_prompt(combat, turn_text), on_delta=on_delta)
+    outputs = [narration_output(narration, stream_id)]
+
+    for session in list(combat.members.values()):
+        if session.character["current_hp"] <= 0:
+            outputs.append(f"{session.character['name']} has been defeated.")
+            combat.remove(session.character_id)
+
+    if not any(e["current_hp"] > 0 for e in enemies):
+        total_xp = sum(e.get("cr", 1) * 10 for e in enemies)
+        winners = list(combat.members.values())
+        for session in winners:
+            session.character["xp"] = update_stat(session.character["xp"], total_xp)
+            combat.remove(session.character_id)
+        outputs.append(f"Victory! {', '.join(s.character['name'] for s in winners)} gain {total_xp} XP.")
+        combat.finished = True
+    elif not combat.members:
+        if all(s.character["current_hp"] <= 0 for s in combat.roster.values()):
+            outputs.append("The party has been defeated. Game Over.")
+        else:
+            outputs.append("No one is left fighting: the enemies are still there.")
+        combat.finished = True
+
+    outputs.append(party_combat_data(combat))
+    for session in combat.roster.values():
+        sessions.commit(session)
+    timer.report()
+    return outputs
+
+
+turn_scheduler = TurnScheduler(resolve_round=resolve_party_round)
+
+
+
+
+
+
+
 #!!! character_id should be set externally before running main()
 
 # --- Game Loop ---
 def main(character_id):
-    # Python has to explicitly state that we are using the global variables (the serpent is cleraly not fit to be a C competitor :-P)
-    global long_term_memory
-    global turn_count
-    global recent_history
-    global mana_regen_per_turn
-    global character
-   
+    # The CLI plays a single local session (no room, nothing kept in the shared store)
+    session = GameSession("cli", character_id)
+    character = None
+
     print("=== ADA TI DA' IL BENVENUTO ===")
     # print("\nDescribe your character in your own words (free text):")
     # user_desc = input("> ")
@@ -1758,6 +2184,7 @@ def main(character_id):
     
     if character_data:
         character = character_data
+        session.character = character
         # Ensure current_hp exists for the session
         if "current_hp" not in character:
             character["current_hp"] = character.get("max_hp", 50)
@@ -1767,9 +2194,7 @@ def main(character_id):
         print("\n[ERROR] No character found in database")
 
 
-    state = {"location": "Taverna Iniziale", 
-             "quest": "Nessuna"
-    }
+    state = session.state
 
     # Choose combat mode
     print("\nChoose combat mode:")
@@ -1796,25 +2221,25 @@ def main(character_id):
             print("Game saved. Goodbye!")
             break
 
-        recent_history.append({"role": "user", "content": user_input})
+        session.add_message("user", user_input)
 
         # Refresh history with the latest recent_history every turn (with every enter command)
-        history = [
-            system_rules,
-            alignment_prompt,
-            {"role": "system", "content": f"Long-term memory: {long_term_memory}"},
-            {"role": "system", "content": f"Character sheet: {character}"},
-            {"role": "system", "content": f"State: {state}"},
-            {"role": "system", "content": f"The character's alignment is {character['alignment_righteousness']} {character['alignment_morality']}."}
-        ] + recent_history[-10:]  # last 10 messages (5 ai + 5 user = 5 completed turns) for context
+        history = narrator_prompt.build(
+            session.recent_history[-10:],  # last 10 messages (5 ai + 5 user = 5 completed turns) for context
+            memory=session.long_term_memory,
+            character=character,
+            state=state,
+            label="cli"
+        )
 
         try:
             data = narrate_strict(history)
 
             if "narration" in data:
-                recent_history.append({"role": "assistant", "content": data["narration"]})
+                session.add_message("assistant", data["narration"])
 
-            turn_count += 1
+            session.turn_count += 1
+            turn_count = session.turn_count
 
             #! ================= RANDOM ENCOUNTER LOGIC =================
             if (turn_count - last_combat_turn > combat_cooldown and 
@@ -1856,7 +2281,7 @@ def main(character_id):
             
             #! ================= NORMAL TURN PROCESSING =================
             # Add/remove items from inventory
-            for item in data.get("found_items", []):
+            for item in validate_found_items(data.get("found_items", [])):
                 if item not in character["inventory"]:
                     character["inventory"].append(item)
 
@@ -1877,9 +2302,9 @@ def main(character_id):
                 character["mana"] = update_stat(character["mana"], mana_regen_per_turn, 0)
 
             # Update the location and current quest
-            if "location" in data:
+            if data.get("location"):
                 state["location"] = data["location"]
-            if "quest" in data:
+            if data.get("quest"):
                 state["quest"] = data["quest"]
 
 
@@ -1909,8 +2334,8 @@ def main(character_id):
             # Every 10 messages (5 turns), summarise and update long-term memory
             if turn_count > 0 and turn_count % 10 == 0:
                 print("\n[SYSTEM] Ada is sorting through her memories...")
-                long_term_memory = summarise_memory(long_term_memory, recent_history)
-                print(f"[Memory Updated]: {long_term_memory[:100]}...")
+                session.long_term_memory = summarise_memory(session.long_term_memory, session.recent_history)
+                print(f"[Memory Updated]: {session.long_term_memory[:100]}...")
 
         except Exception as e:
             print(f"\n[NARRATOR ERROR] The master is confused: {e}")
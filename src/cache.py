@@ -0,0 +1,122 @@
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+
+from . import global_config
+
+# Response cache for repetitive model calls (combat action parsing, flavor text...).
+# Prompts are fingerprinted after normalisation (case, whitespace), entries live in a
+# bounded LRU with a TTL, and can be persisted to a sqlite file so a restart does not
+# start cold. Each call site has its own cache and its own settings (RESPONSE_CACHES);
+# a disabled site gets None and always calls the model.
+
+_caches = {}
+
+
+class ResponseCache:
+    def __init__(self, name, max_entries=1024, ttl=3600, path=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()   # key -> (expires_at, value), least recently used first
+        self.hits = 0
+        self.misses = 0
+        self._db = None
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS responses "
+                    "(site TEXT, key TEXT, value TEXT, expires_at REAL, PRIMARY KEY (site, key))"
+                )
+                self._db.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"[WARN] Response cache '{name}': persistence disabled ({e})")
+                self._db = None
+
+    @staticmethod
+    def fingerprint(messages, **params):
+        """Same key for prompts that only differ in case or whitespace."""
+        normalized = [(m["role"], " ".join(m["content"].split()).lower()) for m in messages]
+        payload = json.dumps([normalized, sorted(params.items())], ensure_ascii=False)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._load(key)
+        if entry is not None and entry[0] > now:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        if entry is not None:
+            self._entries.pop(key, None)
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        entry = (time.time() + self.ttl, value)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        if self._db is not None:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (self.name, key, value, entry[0])
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"[WARN] Response cache '{self.name}': write failed ({e})")
+
+    def _load(self, key):
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT expires_at, value FROM responses WHERE site = ? AND key = ?", (self.name, key)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        return (row[0], row[1]) if row else None
+
+    def clear(self):
+        self._entries.clear()
+        if self._db is not None:
+            self._db.execute("DELETE FROM responses WHERE site = ?", (self.name,))
+            self._db.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+def response_cache(site):
+    """The cache of a call site as configured in RESPONSE_CACHES, or None if it is disabled."""
+    if site not in _caches:
+        settings = global_config.config["RESPONSE_CACHES"].get(site, {})
+        if not settings.get("enabled"):
+            _caches[site] = None
+        else:
+            _caches[site] = ResponseCache(
+                site,
+                max_entries=settings.get("max_entries", 1024),
+                ttl=settings.get("ttl", 3600),
+                path=global_config.config["RESPONSE_CACHE_DB"] if settings.get("persist") else None
+            )
+    return _caches[site]
+
+
+def cache_stats():
+    return {site: cache.stats() for site, cache in _caches.items() if cache is not None}
@@ -0,0 +1,244 @@
+import hashlib
+from collections.abc import Mapping
+from types import MappingProxyType
+
+import eventlet
+from bson import json_util
+from flask import current_app
+from pymongo.errors import DuplicateKeyError
+
+from . import global_config
+
+# In-process cache of the game catalogs (Items, Skills, Enemies, Classes).
+# A combat turn used to run several case-insensitive $regex find_one per turn; the
+# catalogs are small and rarely change, so each worker keeps them in memory as
+# lowercase-name hash maps, loaded on first use (read-through).
+# Every reload bumps `epoch` and notifies the listeners (e.g. the TF-IDF indexes).
+# Changes made directly in MongoDB are picked up through a change stream, or by
+# polling when change streams are not available (standalone server, mongomock...).
+# The cached documents are frozen (read-only views, see freeze) and handed out as they
+# are: lookups used to deepcopy them. The few callers that write copy locally first.
+
+CATALOGS = ("Items", "Skills", "Enemies", "Classes")
+# Catalogs with the indexed `name_lc` field (see migrations.py)
+NAMED_CATALOGS = ("Items", "Skills", "Enemies")
+
+
+def normalize_name(name):
+    return name.strip().lower()
+
+
+def freeze(value):
+    """Read-only version of a document: dicts become mappingproxies, lists tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def thaw(value):
+    """Plain dicts and lists back from freeze()."""
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(v) for v in value]
+    return value
+
+
+def backfill_names(collection):
+    """
+    Sets `name_lc` on the documents of a named catalog that lack an up to date one
+    (documents written without it by external tools). Returns how many were updated.
+    """
+    stale = [
+        doc for doc in collection.find({}, {"name": 1, "name_lc": 1})
+        if isinstance(doc.get("name"), str) and doc.get("name_lc") != normalize_name(doc["name"])
+    ]
+    updated = 0
+    for doc in stale:
+        try:
+            collection.update_one({"_id": doc["_id"]}, {"$set": {"name_lc": normalize_name(doc["name"])}})
+            updated += 1
+        except DuplicateKeyError:
+            print(f"[WARN] {collection.name}: another document is already named '{doc['name']}', name_lc not set")
+    return updated
+
+
+class Catalog:
+    def __init__(self):
+        self.epoch = 0
+        self._by_name = {}      # catalog -> {normalized name: document}
+        self._missing = {}      # catalog -> names known not to exist (until the next reload)
+        self._fingerprints = {}
+        self._listeners = []
+        self._watcher = None
+
+    def init_app(self, app):
+        app.catalog = self
+        if global_config.config["CATALOG_AUTO_REFRESH"] and self._watcher is None:
+            self._watcher = eventlet.spawn(self._watch, app)
+
+    # callback(catalog_name) is called after a catalog has been reloaded
+    def on_change(self, callback):
+        self._listeners.append(callback)
+
+    def _documents(self, catalog):
+        if catalog not in self._by_name:
+            self._load(catalog)
+        return self._by_name.get(catalog, {})
+
+    # A failed load leaves the catalog unloaded: empty for this access, retried on the next
+    # one. Storing it empty would keep it empty until MongoDB reports a change.
+    def _load(self, catalog):
+        try:
+            docs = list(current_app.db[catalog].find({}))
+        except Exception as e:
+            print(f"[ERROR] Could not load the {catalog} catalog: {e}")
+            return
+        self._store(catalog, docs)
+
+    def _store(self, catalog, docs):
+        self._by_name[catalog] = {normalize_name(d["name"]): freeze(d) for d in docs if d.get("name")}
+        self._missing[catalog] = set()
+        self._fingerprints[catalog] = _fingerprint(docs)
+        self.epoch += 1
+        for callback in self._listeners:
+            callback(catalog)
+
+    def get(self, catalog, name):
+        """
+        Document by name (case insensitive), or None.
+        Returns the cached read-only document: copy it before changing it.
+        """
+        if not name:
+            return None
+        key = normalize_name(name)
+        doc = self._documents(catalog).get(key)
+        if doc is None:
+            doc = self._fetch(catalog, [key]).get(key)
+        return doc
+
+    def get_many(self, catalog, names):
+        """
+        {name: read-only document} for the names that exist. Cache misses are resolved with
+        a single `name_lc $in` query.
+        """
+        docs = self._documents(catalog)
+        keys = {name: normalize_name(name) for name in names if name}
+        found = {key: docs[key] for key in keys.values() if key in docs}
+        found.update(self._fetch(catalog, [k for k in keys.values() if k not in found]))
+        return {name: found[key] for name, key in keys.items() if key in found}
+
+    def lookup_fields(self, catalog, names, fields):
+        """
+        {name: {field: value}} for the names that exist, e.g. descriptions for the
+        character sheet. Cached entries answer first; the rest comes from a single
+        `name_lc $in` query projected on `fields` (those partial documents are not cached).
+        """
+        docs = self._documents(catalog)
+        missing = self._missing.setdefault(catalog, set())
+        result = {}
+        to_fetch = {}
+        for name in names:
+            if not name:
+                continue
+            key = normalize_name(name)
+            if key in docs:
+                result[name] = {f: docs[key][f] for f in fields if f in docs[key]}
+            elif key not in missing:
+                to_fetch.setdefault(key, []).append(name)
+
+        if to_fetch and catalog in NAMED_CATALOGS:
+            projection = {f: 1 for f in fields}
+            projection.update({"name_lc": 1, "_id": 0})
+            try:
+                for doc in current_app.db[catalog].find({"name_lc": {"$in": list(to_fetch)}}, projection):
+                    for name in to_fetch.pop(doc["name_lc"], []):
+                        result[name] = {f: doc[f] for f in fields if f in doc}
+                missing.update(to_fetch)
+            except Exception as e:
+                print(f"[ERROR] {catalog} batch lookup failed: {e}")
+        return result
+
+    # Read-through for documents added after the last reload: one indexed query for all
+    # the missing names; names that are not in MongoDB either are remembered as missing
+    def _fetch(self, catalog, keys):
+        missing = self._missing.setdefault(catalog, set())
+        keys = [k for k in set(keys) if k not in missing]
+        if not keys or catalog not in NAMED_CATALOGS:
+            return {}
+        try:
+            fetched = {d["name_lc"]: freeze(d) for d in current_app.db[catalog].find({"name_lc": {"$in": keys}})}
+        except Exception as e:
+            print(f"[ERROR] {catalog} lookup failed for {keys}: {e}")
+            return {}
+        if catalog in self._by_name:
+            self._by_name[catalog].update(fetched)
+        missing.update(k for k in keys if k not in fetched)
+        return fetched
+
+    def all(self, catalog):
+        """Every document of the catalog (read-only)."""
+        return list(self._documents(catalog).values())
+
+    def names(self, catalog):
+        return [d["name"] for d in self._documents(catalog).values()]
+
+    def contains(self, catalog, name):
+        return bool(name) and normalize_name(name) in self._documents(catalog)
+
+    # Drops a catalog (or all of them): the next access reloads it from MongoDB
+    def invalidate(self, catalog=None):
+        for name in ([catalog] if catalog else list(self._by_name)):
+            self._missing.pop(name, None)
+            if self._by_name.pop(name, None) is not None:
+                self.epoch += 1
+                for callback in self._listeners:
+                    callback(name)
+
+    #! ================= REFRESH =================
+
+    def _watch(self, app):
+        with app.app_context():
+            try:
+                # Needs a replica set (Atlas clusters are): one stream for the whole database
+                pipeline = [{"$match": {"ns.coll": {"$in": list(CATALOGS)}}}]
+                with current_app.db.watch(pipeline) as stream:
+                    print("[INFO] Catalog cache: listening to MongoDB change stream")
+                    for change in stream:
+                        name = change["ns"]["coll"]
+                        # Our own name_lc updates come back as changes: the next backfill is a no-op
+                        if name in NAMED_CATALOGS:
+                            backfill_names(current_app.db[name])
+                        self.invalidate(name)
+            except Exception as e:
+                print(f"[INFO] Catalog cache: change streams unavailable ({e}), polling instead")
+                self._poll()
+
+    def _poll(self):
+        interval = global_config.config["CATALOG_POLL_INTERVAL"]
+        while True:
+            eventlet.sleep(interval)
+            for catalog in list(self._by_name):
+                try:
+                    docs = list(current_app.db[catalog].find({}))
+                    if _fingerprint(docs) != self._fingerprints.get(catalog) and catalog in NAMED_CATALOGS:
+                        if backfill_names(current_app.db[catalog]):
+                            docs = list(current_app.db[catalog].find({}))
+                except Exception as e:
+                    print(f"[WARN] Catalog poll failed for {catalog}: {e}")
+                    continue
+                if _fingerprint(docs) != self._fingerprints.get(catalog):
+                    print(f"[INFO] Catalog {catalog} changed, reloading")
+                    self._store(catalog, docs)
+
+
+def _fingerprint(docs):
+    digest = hashlib.sha1()
+    for doc in sorted(docs, key=lambda d: str(d.get("_id"))):
+        digest.update(json_util.dumps(doc, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+catalog = Catalog()
@@ -5,10 +5,12 @@ from flask_socketio import SocketIO, emit, join_room, leave_room
 import json
 from bson.objectid import ObjectId
 from src import socketio
+from src import global_config
 from datetime import datetime
 import uuid
 
-from src.brain import main_modular
+from src.brain import main_modular, sessions, turn_scheduler
+from src.presence import presence
 
 #TODO
 # refactor with classes: es. message_obj should be class Message with get method that returns the object...
@@ -22,8 +24,8 @@ active_users = {}
 chat_rooms = {}
 
 class Message:
-    def __init__(self, text, type, room, sid=None):
-        self.message_id = str(uuid.uuid4())
+    def __init__(self, text, type, room, sid=None, message_id=None):
+        self.message_id = message_id or str(uuid.uuid4())
         self.timestamp = datetime.now().isoformat()
         self.sid = sid
         self.text = text
@@ -54,7 +56,7 @@ def handle_connect():
     character_id = request.args.get('character_id')
 
     user = current_app.db['Users'].find_one({"_id": ObjectId(user_id)})
-    character = current_app.db['Characters'].find_one({"_id": ObjectId(character_id)})
+    character = current_app.db['Characters'].find_one({"_id": ObjectId(character_id)}, {"avatar_hash": 1})
     
     if (not user):
         print("User not found in handle_connect")
@@ -63,7 +65,7 @@ def handle_connect():
         print("Character not found in handle_connect")
         return
     username = user["Username"]
-    avatar = character["avatar_base64"]
+    avatar_hash = character.get("avatar_hash")   # image served by /avatars/<hash>
     room = request.args.get('room', 'default')
     
     # Store connection info
@@ -72,30 +74,35 @@ def handle_connect():
         'character_id' : character_id,
         'username': username,
         'room': room,
-        'avatar_base64': avatar,
+        'avatar_hash': avatar_hash,
         'life_percentage' : 100
     }
     
     join_room(room)
     print(f'User {user_id}:{username} connected to room {room}')
     
-    # Notify others in the room
-    emit('user_joined', {
-        'timestamp': datetime.now().isoformat(),
-        'sid': request.sid,
-        'user_id': user_id,
-        'username': username,
-        'active_users' : active_users
-    }, room=room, skip_sid=request.sid)
+    # Notify others in the room (only the new player, see presence.py)
+    delta = presence.join(room, request.sid, active_users[request.sid])
+    emit('presence_delta', delta, room=room, skip_sid=request.sid)
     
-    # Send connection confirmation
+    # Send connection confirmation with the players of this room
     emit('connected', {
         'status': 'success',
         'message': 'Connected to chat server',
         'room': room,
-        'active_users' : active_users
+        'presence': presence.snapshot(room)
     })
 
+# A character leaves the game of a room (disconnect, room switch)
+def leave_game(room, character_id):
+    # Out of the room fight: the round may have been waiting only for this player
+    outputs = turn_scheduler.leave(room, character_id)
+    if outputs:
+        emit_responses(outputs, room)
+
+    # Write the game session back to MongoDB and free the memory
+    sessions.release(room, character_id)
+
 @socketio.on('disconnect')
 def handle_disconnect():
     if request.sid in active_users:
@@ -104,11 +111,11 @@ def handle_disconnect():
         
         del active_users[request.sid]
 
-        emit('user_left', {
-            'active_users': active_users,
-            'username': user_data['username'],
-            'timestamp': datetime.now().isoformat()
-        }, room=room)
+        leave_game(room, user_data['character_id'])
+
+        delta = presence.leave(room, request.sid)
+        if delta:
+            emit('presence_delta', delta, room=room)
         
         print(f'User {user_data["user_id"]} disconnected')
     
@@ -139,15 +146,37 @@ def handle_send_message(data):
 
     socketio.sleep(0.01)
 
-    # 2. Generate ADA Response
-    responses = generate_response(message.text, user_data["character_id"])
+    # 2. Generate ADA Response (narration is streamed live as 'narration_chunk' events)
+    on_chunk = None
+    if global_config.config["STREAM_NARRATION"]:
+        def on_chunk(stream_id, delta):
+            emit('narration_chunk', {
+                'message_id': stream_id,
+                'delta': delta,
+                'sid': SERVER_SID,
+                'room': room
+            }, room=room)
+            # Yield so the chunk leaves now instead of after the whole answer
+            socketio.sleep(0)
+
+    responses = generate_response(message.text, user_data["character_id"], room, on_chunk)
     
     # 3. Process Responses (THIS IS THE FIX)
+    emit_responses(responses, room)
+
+    emit('generated_answer', {})
+
+def emit_responses(responses, room):
     for response in responses:
         # Check if the response is a Data Dictionary (Combat Info)
         if isinstance(response, dict) and response.get("type") == "combat_data":
             # Emit a specific event for the Sidebar, NOT a chat message
             emit('combat_update', response, room=room)
+            update_life_percentage(room, response)
+
+        # Streamed narration: the final text replaces the live message with the same id
+        elif isinstance(response, dict) and response.get("type") == "narration":
+            server_send_message(text=response["text"], room=room, message_id=response["stream_id"])
         
         # Check if the response is a String (Narration)
         elif isinstance(response, str):
@@ -157,7 +186,39 @@ def handle_send_message(data):
             
             server_send_message(text=response, room=room)
 
-    emit('generated_answer', {})
+# A party round closed by its turn window (see scheduler.py) is emitted from the timer's
+# green thread, which runs in the request context of the round's first action
+def emit_party_round(room, outputs):
+    emit_responses(outputs, room)
+
+turn_scheduler.on_round = emit_party_round
+
+# A client that missed a presence delta (version gap) asks for the full room again
+@socketio.on('presence_sync')
+def handle_presence_sync(data=None):
+    if request.sid not in active_users:
+        return
+    emit('presence_snapshot', presence.snapshot(active_users[request.sid]['room']))
+
+def update_life_percentage(room, combat_data):
+    # Party fights carry the HP of every member
+    if combat_data.get('party'):
+        sids = {data['character_id']: sid for sid, data in active_users.items() if data['room'] == room}
+        for member in combat_data['party']:
+            if member['character_id'] in sids:
+                set_life_percentage(room, sids[member['character_id']], member['current_hp'], member['max_hp'])
+        return
+    hp, max_hp = combat_data.get('player_hp'), combat_data.get('player_max_hp')
+    set_life_percentage(room, request.sid, hp, max_hp)
+
+def set_life_percentage(room, sid, hp, max_hp):
+    if hp is None or not max_hp or sid not in active_users:
+        return
+    life_percentage = max(0, round(hp / max_hp * 100))
+    active_users[sid]['life_percentage'] = life_percentage
+    delta = presence.update(room, sid, life_percentage=life_percentage)
+    if delta:
+        emit('presence_delta', delta, room=room)
 
 @socketio.on('typing')
 def handle_typing(data):
@@ -186,26 +247,34 @@ def handle_join_room(data):
             'user_id': user_id,
             'room': old_room
         }, room=old_room)
+        delta = presence.leave(old_room, request.sid)
+        if delta:
+            emit('presence_delta', delta, room=old_room)
+        if old_room != room:
+            leave_game(old_room, active_users[request.sid]['character_id'])
     
     # Join new room
     join_room(room)
     active_users[request.sid]['room'] = room
+    delta = presence.join(room, request.sid, active_users[request.sid])
+    emit('presence_delta', delta, room=room, skip_sid=request.sid)
     
     emit('room_joined', {
         'room': room,
         'user_id': user_id,
-        'message': f'Joined room: {room}'
+        'message': f'Joined room: {room}',
+        'presence': presence.snapshot(room)
     })
 
-def server_send_message(text: str, room):
-    message = Message(text=text, type='server', room=room, sid=SERVER_SID)
+def server_send_message(text: str, room, message_id=None):
+    message = Message(text=text, type='server', room=room, sid=SERVER_SID, message_id=message_id)
     message_obj = message.getJSON()
     # Save to database here in the future
     
     emit('new_message', message_obj, room=room)
 
-def generate_response(user_input, character_id):
-    return main_modular(character_id=character_id, user_input=user_input)
+def generate_response(user_input, character_id, room, on_chunk=None):
+    return main_modular(character_id=character_id, user_input=user_input, room=room, on_chunk=on_chunk)
 
 # def get_users_in_room(room):
 #     """Get list of users in a room"""
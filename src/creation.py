@@ -5,11 +5,12 @@ from flask import (
 from . import global_config
 from . import brain
 from . import character
+from .catalog import catalog
+from .selection import invalidate_character_list
+from .avatars import avatar_store
 import json
-import base64
 import os
 from PIL import Image
-import io
 from bson.objectid import ObjectId
 
 bp = Blueprint('creation', __name__, url_prefix='/creation')
@@ -31,38 +32,25 @@ def creation():
         
     #character = character.Character(json=character_json)
     
-    # Retrieve item descriptions from the database
-    try:
-        item_col = current_app.db['Items']
-        items_descriptions = {}
-        for item in character_json.get('inventory', []):
-            item_data = item_col.find_one({"name": item})
-            if item_data and 'description' in item_data:
-                items_descriptions[item] = item_data['description']
-            else:
-                items_descriptions[item] = "No description available."
-    except Exception as e:
-        # print(f"Error retrieving item descriptions: {str(e)}")
-        items_descriptions = {item: "No description available." for item in character_json.get('inventory', [])}
+    # Item and skill descriptions: at most one round-trip per collection, whatever the inventory size
+    items_descriptions = resolve_descriptions('Items', character_json.get('inventory', []))
+    skills_descriptions = resolve_descriptions('Skills', character_json.get('skills', []))
 
+    return render_template('character_sheet/character_sheet.html', character=character_json, items_descriptions=items_descriptions, skills_descriptions=skills_descriptions)
 
-    # Retrieve skills descriptions from the database
+# {name: description} for the character sheet.
+# Served by the catalog cache; names it does not know are resolved with a single
+# projected $in query (name + description only) instead of one find_one per name.
+def resolve_descriptions(collection, names):
     try:
-        skill_col = current_app.db['Skills']
-        skills_descriptions = {}
-        for skill in character_json.get('skills', []):
-            skills_data = skill_col.find_one({"name": skill})
-            print("skills_data: ", skills_data)
-            if skills_data and 'description' in skills_data:
-                skills_descriptions[skill] = skills_data['description']
-            else:
-                skills_descriptions[skill] = "No description available."
+        found = catalog.lookup_fields(collection, names, ("description",))
     except Exception as e:
-        # print(f"Error retrieving skills descriptions: {str(e)}")
-        skills_descriptions = {skill: "No description available." for skill in character_json.get('skills', [])}
-
-
-    return render_template('character_sheet/character_sheet.html', character=character_json, items_descriptions=items_descriptions, skills_descriptions=skills_descriptions)
+        print(f"[ERROR] Could not retrieve {collection} descriptions: {e}")
+        found = {}
+    return {
+        name: found.get(name, {}).get("description", "No description available.")
+        for name in names
+    }
 
 @bp.route('/upload', methods=['POST'])
 def upload():
@@ -77,7 +65,7 @@ def upload():
     character = json.loads(character)  # Convert string back to object
     file = request.files.get('image')
 
-    image_string = None
+    avatar_hash = None
     
     if file:
         file_size = request.content_length
@@ -85,20 +73,17 @@ def upload():
         if file_size > 5 * 1024 * 1024:
             return jsonify({"error": "IMG file too big!"}), 400
 
-        img = Image.open(file)
-        if img.mode in ("RGBA", "P"):
-            img = img.convert("RGB")
-
-        buffer = io.BytesIO()
-        img.save(buffer, format="JPEG", quality=70, optimize=True)
-
-        image_string = base64.b64encode(buffer.getvalue()).decode('utf-8')
+        # Stored once (with its thumbnails) under its hash, the character only keeps the hash
+        try:
+            avatar_hash = avatar_store.put(Image.open(file))
+        except Exception as e:
+            return jsonify({"error": f"Invalid image: {str(e)}"}), 400
     else:
         print("no avatar provided")
     print(character)
 
     character['creator_id'] = g.user['_id']  # Link to User
-    character['avatar_base64'] = image_string
+    character['avatar_hash'] = avatar_hash
 
     try:
         # 4. Insert into Characters Collection
@@ -112,6 +97,7 @@ def upload():
             {"_id": g.user['_id']},
             {"$push": {"Characters": char_id}}
         )
+        invalidate_character_list(g.user['_id'])
         return jsonify({"success": True, "character_id": str(char_id)}), 201
     except Exception as e:
         return jsonify({"error": f"Database error: {str(e)}"}), 500
@@ -0,0 +1,138 @@
+import random
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+import numpy as np
+
+# Dice expressions.
+# roll_dice used to run a regex on every roll; now an expression is compiled once
+# (LRU cached) into a DiceExpr and rolled many times:
+#   "2d6+3"      dice and a modifier
+#   "d20"        one die
+#   "4d6kh3"     keep the 3 highest (kl: lowest)
+#   "1d8+1d6-1"  several terms, constants anywhere
+# roll() is the scalar path used by the game, roll_many() draws a whole NumPy vector
+# (simulator, statistics).
+# Rolls use the RNG of the current turn (use_rng): a seeded random.Random per game
+# session makes the fights of a session reproducible (see GameSession.rng).
+
+_TERM = re.compile(r"([+-]?)(?:(\d*)d(\d+)(?:(kh|kl)(\d+))?|(\d+))")
+
+_current_rng = ContextVar("dice_rng", default=random._inst)
+
+
+class DiceError(ValueError):
+    pass
+
+
+class DiceExpr:
+    __slots__ = ("text", "terms", "constant", "_single")
+
+    def __init__(self, text, terms, constant):
+        self.text = text
+        self.terms = terms          # (sign, count, sides, keep, keep_highest)
+        self.constant = constant
+        # Fast path: one term, no keep ("2d6+3")
+        self._single = terms[0][1:3] if len(terms) == 1 and terms[0][0] == 1 and terms[0][3] is None else None
+
+    def roll(self, rng=None):
+        """(total, rolls): the dice kept, for the narration, and the total with the modifiers."""
+        uniform = (rng or _current_rng.get()).random
+        if self._single is not None:
+            count, sides = self._single
+            rolls = [int(uniform() * sides) + 1 for _ in range(count)]
+            return sum(rolls) + self.constant, rolls
+
+        total = self.constant
+        kept = []
+        for sign, count, sides, keep, highest in self.terms:
+            rolls = [int(uniform() * sides) + 1 for _ in range(count)]
+            if keep is not None:
+                rolls = sorted(rolls, reverse=highest)[:keep]
+            total += sign * sum(rolls)
+            kept.extend(rolls)
+        return total, kept
+
+    def roll_many(self, n, generator=None):
+        """NumPy vector of n totals."""
+        generator = generator if generator is not None else np.random.default_rng()
+        totals = np.full(n, self.constant, dtype=np.int64)
+        for sign, count, sides, keep, highest in self.terms:
+            rolls = generator.integers(1, sides + 1, size=(n, count))
+            if keep is not None:
+                rolls = np.sort(rolls, axis=1)
+                rolls = rolls[:, count - keep:] if highest else rolls[:, :keep]
+            totals += sign * rolls.sum(axis=1)
+        return totals
+
+    @property
+    def minimum(self):
+        return self.constant + sum(sign * (keep or count) * (1 if sign > 0 else sides)
+                                   for sign, count, sides, keep, _ in self.terms)
+
+    @property
+    def maximum(self):
+        return self.constant + sum(sign * (keep or count) * (sides if sign > 0 else 1)
+                                   for sign, count, sides, keep, _ in self.terms)
+
+    def __repr__(self):
+        return f"DiceExpr({self.text!r})"
+
+
+@lru_cache(maxsize=1024)
+def compile_dice(expr):
+    """DiceExpr of an expression; raises DiceError if it is not one."""
+    text = str(expr).replace(" ", "").lower()
+    if not text:
+        raise DiceError("empty dice expression")
+    terms = []
+    constant = 0
+    position = 0
+    while position < len(text):
+        match = _TERM.match(text, position)
+        if not match or match.end() == position or (position and not match.group(1)):
+            raise DiceError(f"invalid dice expression: {expr!r}")
+        sign = -1 if match.group(1) == "-" else 1
+        if match.group(6) is not None:
+            constant += sign * int(match.group(6))
+        else:
+            count = int(match.group(2) or 1)
+            sides = int(match.group(3))
+            keep = int(match.group(5)) if match.group(4) else None
+            if sides < 1 or count < 1 or (keep is not None and not 0 < keep <= count):
+                raise DiceError(f"invalid dice expression: {expr!r}")
+            terms.append((sign, count, sides, keep, match.group(4) != "kl"))
+        position = match.end()
+    return DiceExpr(text, tuple(terms), constant)
+
+
+def is_dice(expr):
+    try:
+        compile_dice(expr)
+        return True
+    except DiceError:
+        return False
+
+
+def roll(expr, rng=None):
+    return compile_dice(expr).roll(rng)
+
+
+def roll_many(expr, n, generator=None):
+    return compile_dice(expr).roll_many(n, generator)
+
+
+def rng():
+    """The RNG of the current turn (the global one outside use_rng)."""
+    return _current_rng.get()
+
+
+@contextmanager
+def use_rng(generator):
+    token = _current_rng.set(generator)
+    try:
+        yield generator
+    finally:
+        _current_rng.reset(token)
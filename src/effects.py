@@ -0,0 +1,136 @@
+from .catalog import normalize_name
+from .dice import DiceError, compile_dice
+
+# Compiled effects of skills, items and enemy attacks.
+# The combat functions used to walk the raw "effects" lists of the catalog documents on
+# every use: filter by kind, sum the mana costs, parse the dice strings. A document is
+# now compiled once into an EffectPipeline: dice parsed, mana cost summed, effects split
+# by kind. Players, enemies and items share the same representation.
+# Pipelines are cached by (catalog, name) in `pipelines`; a catalog reload drops its
+# entries (see brain.py), the next use compiles the new version.
+
+SOURCES = ("Skills", "Items", "Enemies")
+
+
+class Effect:
+    __slots__ = ("kind", "target", "element", "dice", "duration", "mana_cost", "stat", "mode", "radius")
+
+    def __init__(self, doc):
+        self.kind = doc.get("kind")
+        self.target = doc.get("target")
+        self.element = doc.get("element")
+        self.dice = _compile_value(doc.get("value"))
+        self.duration = _compile_value(doc.get("duration"))
+        self.mana_cost = doc.get("mana_cost", 0)
+        self.stat = doc.get("stat")
+        self.mode = doc.get("mode")
+        self.radius = doc.get("radius", 0)
+
+    def __repr__(self):
+        return f"Effect({self.kind!r}, {self.dice.text if self.dice else None!r})"
+
+
+def _compile_value(value):
+    if value is None:
+        return None
+    try:
+        return compile_dice(value)
+    except DiceError:
+        print(f"[WARN] Effect value {value!r} is not a dice expression, it counts as 0")
+        return None
+
+
+class EffectPipeline:
+    """Effects of one skill, item or enemy attack, split by kind."""
+
+    __slots__ = ("name", "type", "sub_type", "mana_cost", "element", "damage", "heal", "buff", "debuff", "other")
+
+    def __init__(self, doc):
+        effects = [Effect(e) for e in doc.get("effects", [])]
+        self.name = doc.get("name")
+        self.type = doc.get("type")
+        self.sub_type = doc.get("subType", "melee")
+        self.mana_cost = sum(e.mana_cost for e in effects)
+        self.damage = tuple(e for e in effects if e.kind == "damage")
+        self.heal = tuple(e for e in effects if e.kind == "heal")
+        self.buff = tuple(e for e in effects if e.kind == "buff")
+        self.debuff = tuple(e for e in effects if e.kind == "debuff")
+        self.other = tuple(e for e in effects if e.kind not in ("damage", "heal", "buff", "debuff"))
+        self.element = next((e.element for e in effects if e.element), None)
+
+    @staticmethod
+    def roll(effects):
+        """(total, rolls) of the dice of effects."""
+        total = 0
+        rolls = []
+        for effect in effects:
+            if effect.dice is not None:
+                value, kept = effect.dice.roll()
+                total += value
+                rolls.extend(kept)
+        return total, rolls
+
+    @staticmethod
+    def duration(effects):
+        """Rolled duration of the last of effects that has one, 0 if none has."""
+        for effect in reversed(effects):
+            if effect.duration is not None:
+                return effect.duration.roll()[0]
+        return 0
+
+    def __repr__(self):
+        return f"EffectPipeline({self.name!r})"
+
+
+def compile_effects(doc):
+    """EffectPipeline of a skill, item or enemy attack document."""
+    return EffectPipeline(doc)
+
+
+def compile_attacks(enemy):
+    """Tuple of the EffectPipelines of an enemy's attacks, by attack index."""
+    return tuple(EffectPipeline(attack) for attack in enemy.get("attacks", []))
+
+
+def _compile(source, doc):
+    return compile_attacks(doc) if source == "Enemies" else compile_effects(doc)
+
+
+class PipelineCache:
+    """
+    Compiled pipelines by (source, name): an EffectPipeline for Skills and Items, the
+    tuple of attack pipelines for Enemies. Documents without a name are compiled on
+    every use.
+    """
+
+    def __init__(self):
+        self._entries = {}      # (source, normalized name) -> compiled entry
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, source, doc):
+        name = doc.get("name")
+        if not name:
+            return _compile(source, doc)
+        key = (source, normalize_name(name))
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _compile(source, doc)
+        return entry
+
+    def load(self, source, docs):
+        """Compiles a whole catalog ahead of its first use."""
+        for doc in docs:
+            if doc.get("name"):
+                self._entries[(source, normalize_name(doc["name"]))] = _compile(source, doc)
+
+    def invalidate(self, source=None):
+        if source is None:
+            self._entries.clear()
+        elif source in SOURCES:
+            for key in [k for k in self._entries if k[0] == source]:
+                del self._entries[key]
+
+
+pipelines = PipelineCache()
@@ -0,0 +1,156 @@
+import re
+from functools import lru_cache
+
+from . import dice, global_config
+
+# Encounter tables.
+# spawn_enemy used to copy the whole bestiary and filter it by level on every encounter,
+# and ignored the location. The enemies are now indexed once per catalog version by
+# (biome, level band): for every biome and every band an alias table (Vose) picks an
+# enemy in O(1), weighted by its "weight" (default 1), whatever the size of the bestiary.
+#   biome       from keywords of the location, whole words ("Dark Forest" -> forest); enemies list
+#               theirs in "biomes", an enemy without it lives everywhere
+#   level band  enemies whose level and CR are <= the band (the player level, capped at
+#               ENCOUNTER_MAX_LEVEL); an empty band falls back to the weakest enemies
+# Groups are drawn against a CR budget (the player level): every member is picked from
+# the band of at most half the budget left, so a group is a pack of weaker enemies.
+# The index is dropped when the Enemies catalog changes and rebuilt on the next spawn.
+
+DEFAULT_BIOME = "wilderness"
+# Whole words (with their plurals) or phrases: "mine" must not match "determined"
+BIOME_KEYWORDS = {
+    "town": ("town", "towns", "city", "cities", "village", "villages", "tavern", "taverns", "shop", "shops",
+             "market", "markets", "street", "streets", "taverna", "taverne", "citta", "città", "villaggio",
+             "villaggi", "locanda", "locande", "mercato", "mercati", "strada", "strade"),
+    "forest": ("forest", "forests", "wood", "woods", "woodland", "grove", "groves", "jungle", "jungles",
+               "foresta", "foreste", "bosco", "boschi", "selva", "selve"),
+    "cave": ("cave", "caves", "cavern", "caverns", "mine", "mines", "tunnel", "tunnels", "dungeon", "dungeons",
+             "crypt", "crypts", "underground", "grotta", "grotte", "caverna", "caverne", "miniera", "miniere",
+             "sotterraneo", "sotterranei", "sotterranea", "sotterranee", "sotto terra", "cripta", "cripte"),
+    "mountain": ("mountain", "mountains", "peak", "peaks", "cliff", "cliffs", "volcano", "volcanoes", "hill",
+                 "hills", "montagna", "montagne", "monte", "monti", "picco", "picchi", "vulcano", "vulcani",
+                 "collina", "colline"),
+    "swamp": ("swamp", "swamps", "marsh", "marshes", "bog", "bogs", "palude", "paludi", "acquitrino",
+              "acquitrini"),
+    "ruins": ("ruin", "ruins", "temple", "temples", "castle", "castles", "tower", "towers", "rovina", "rovine",
+              "tempio", "templi", "castello", "castelli", "torre", "torri"),
+    "wilderness": ("road", "roads", "plain", "plains", "field", "fields", "wilderness", "desert", "deserts",
+                   "pianura", "pianure", "campo", "campi", "deserto", "deserti"),
+}
+
+_WORD = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=1024)
+def biome_of(location):
+    """Biome of a free-text location (the first biome with one of its keywords as a word or phrase)."""
+    text = f" {' '.join(_WORD.findall((location or '').lower()))} "
+    for biome, keywords in BIOME_KEYWORDS.items():
+        if any(f" {keyword} " in text for keyword in keywords):
+            return biome
+    return DEFAULT_BIOME
+
+
+class AliasTable:
+    """Weighted choice in O(1) (Vose's alias method)."""
+
+    __slots__ = ("items", "prob", "alias")
+
+    def __init__(self, items, weights):
+        n = len(items)
+        total = float(sum(weights))
+        scaled = [w * n / total for w in weights]
+        self.items = tuple(items)
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Leftovers are 1 up to rounding errors
+
+    def __len__(self):
+        return len(self.items)
+
+    def sample(self, rng=None):
+        # One uniform draw: the integer part picks the column, the fraction the side
+        x = (rng or dice.rng()).random() * len(self.items)
+        i = int(x)
+        return self.items[i] if x - i < self.prob[i] else self.items[self.alias[i]]
+
+
+class EncounterIndex:
+    """
+    Alias tables of enemy templates (see enemies.py) by (biome, level band).
+
+    Args:
+        loader: callable() -> list of EnemyTemplate, called on the first spawn after
+                each invalidation
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._tables = None     # (biome, band) -> AliasTable
+        self.max_band = 1
+
+    # Call when the Enemies catalog changes (catalog.on_change); other catalogs are ignored
+    def invalidate(self, name=None):
+        if name in (None, "Enemies"):
+            self._tables = None
+
+    def _build(self):
+        enemies = [e for e in self._loader() if e.doc.get("weight", 1) > 0]
+        self._tables = {}
+        if not enemies:
+            return
+        self.max_band = global_config.config["ENCOUNTER_MAX_LEVEL"]
+        biomes = set(BIOME_KEYWORDS)
+        for biome in biomes:
+            living = [e for e in enemies if biome in e.doc.get("biomes", biomes)] or enemies
+            weakest = min(max(e.level, e.cr) for e in living)
+            for band in range(1, self.max_band + 1):
+                members = [e for e in living if e.level <= band and e.cr <= band]
+                if not members:
+                    members = [e for e in living if max(e.level, e.cr) == weakest]
+                self._tables[(biome, band)] = AliasTable(members, [e.doc.get("weight", 1) for e in members])
+        print(f"[INFO] Encounter index: {len(enemies)} enemies, {len(self._tables)} tables")
+
+    def table(self, location, level):
+        if self._tables is None:
+            self._build()
+        band = max(1, min(int(level), self.max_band))
+        return self._tables.get((biome_of(location), band))
+
+    def single(self, location, level, rng=None):
+        """Template of one enemy for a player of that level, None if there are no enemies."""
+        table = self.table(location, level)
+        return table.sample(rng) if table else None
+
+    def group(self, location, budget, max_size=None, rng=None):
+        """Templates of a pack whose CRs add up to at most budget (at least one enemy)."""
+        max_size = max_size or global_config.config["ENCOUNTER_MAX_GROUP"]
+        group = []
+        remaining = budget
+        while remaining > 0 and len(group) < max_size:
+            table = self.table(location, max(1, remaining // 2))
+            if not table:
+                break
+            enemy = table.sample(rng)
+            if group and enemy.cr > remaining:
+                break
+            group.append(enemy)
+            remaining -= enemy.cr
+        return group
+
+    def spawn(self, location, level, rng=None):
+        """EnemyInstances of one encounter: a group (from level 2) or a single enemy."""
+        rng = rng or dice.rng()
+        if level >= 2 and rng.random() < global_config.config["ENCOUNTER_GROUP_CHANCE"]:
+            templates = self.group(location, level, rng=rng)
+        else:
+            templates = [self.single(location, level, rng)]
+        return [t.spawn(rng) for t in templates if t is not None]
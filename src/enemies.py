@@ -0,0 +1,172 @@
+import copy
+from collections.abc import Mapping
+from types import MappingProxyType
+
+from . import dice
+from .catalog import freeze, thaw
+from .effects import compile_attacks
+
+# Enemy templates and instances.
+# spawn_enemy used to hand out template.copy(): a full dict per enemy, with "stats" and
+# "attacks" still shared with ENEMIES_DB, so a write to a nested field changed the
+# template for every room. A template is now frozen once (read-only mappings and tuples,
+# attacks compiled, see effects.py) and an EnemyInstance only holds what changes during
+# a fight: current_hp, max_hp and the status effects. Everything else is read through
+# from the template; writing any other key stores it on the instance (copy-on-write).
+# Instances read like the old dicts (enemy["name"], enemy.get("cr", 1)...) and are saved
+# in the session as {"template": name, ...} (see session.py).
+
+
+class EnemyTemplate:
+    __slots__ = ("name", "doc", "attacks", "level", "cr")
+
+    def __init__(self, doc):
+        self.name = doc["name"]
+        self.doc = freeze(doc)
+        self.attacks = compile_attacks(doc)
+        self.level = doc.get("level", 1)
+        self.cr = doc.get("cr", 1)
+
+    def spawn(self, rng=None):
+        """New instance with randomized HP ({"min", "max"} range) or the fixed max_hp."""
+        hp = self.doc.get("max_hp", 1)
+        if isinstance(hp, MappingProxyType):
+            hp = (rng or dice.rng()).randint(hp["min"], hp["max"])
+        return EnemyInstance(self, hp)
+
+    def __repr__(self):
+        return f"EnemyTemplate({self.name!r})"
+
+
+class EnemyInstance(Mapping):
+    """One enemy of one fight, read like a dict."""
+
+    __slots__ = ("template", "current_hp", "max_hp", "status", "_overrides")
+    MUTABLE = frozenset(("current_hp", "max_hp", "status"))
+
+    def __init__(self, template, hp, status=(), overrides=None):
+        self.template = template
+        self.current_hp = hp
+        self.max_hp = hp
+        self.status = status            # status effects (dicts); replaced, never mutated
+        self._overrides = overrides     # other keys written on this instance, None if none
+
+    def __getitem__(self, key):
+        if key in self.MUTABLE:
+            return getattr(self, key)
+        if self._overrides is not None and key in self._overrides:
+            return self._overrides[key]
+        return self.template.doc[key]
+
+    def __setitem__(self, key, value):
+        if key in self.MUTABLE:
+            setattr(self, key, value)
+            return
+        if self._overrides is None:
+            self._overrides = {}
+        self._overrides[key] = value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in self.MUTABLE or key in self.template.doc or (self._overrides is not None and key in self._overrides)
+
+    def __iter__(self):
+        yield from self.template.doc
+        for key in self.MUTABLE:
+            if key not in self.template.doc:
+                yield key
+        for key in self._overrides or ():
+            if key not in self.template.doc and key not in self.MUTABLE:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __copy__(self):
+        return self.__deepcopy__()
+
+    # The template is shared, only the per-instance fields are copied
+    def __deepcopy__(self, memo=None):
+        clone = EnemyInstance(self.template, self.current_hp, self.status, copy.deepcopy(self._overrides, memo))
+        clone.max_hp = self.max_hp
+        return clone
+
+    def adopt(self, other):
+        """Takes the per-instance fields of other (a copy of this enemy)."""
+        self.current_hp = other.current_hp
+        self.max_hp = other.max_hp
+        self.status = other.status
+        self._overrides = other._overrides
+
+    def to_document(self):
+        doc = {"template": self.template.name, "current_hp": self.current_hp, "max_hp": self.max_hp,
+               "status": [dict(s) for s in self.status]}
+        if self._overrides:
+            doc["overrides"] = self._overrides
+        return doc
+
+    def __repr__(self):
+        return f"EnemyInstance({self.template.name!r}, {self.current_hp}/{self.max_hp})"
+
+
+class TemplateRegistry:
+    """
+    Enemy templates by name. A load merges into the known templates: an enemy dropped
+    from the bestiary (or from enemies.json when the catalog takes over) no longer
+    spawns, but the enemies of saved sessions still find their template.
+    """
+
+    def __init__(self):
+        self._templates = {}
+        self._current = ()      # names of the last load, the bestiary
+
+    def __len__(self):
+        return len(self._current)
+
+    def load(self, docs):
+        loaded = {doc["name"]: EnemyTemplate(doc) for doc in docs if doc.get("name")}
+        self._templates.update(loaded)
+        self._current = tuple(loaded)
+
+    def get(self, name):
+        return self._templates.get(name)
+
+    def all(self):
+        return [self._templates[name] for name in self._current]
+
+    def instance_from_document(self, doc):
+        """
+        EnemyInstance of a saved enemy. Sessions saved before the templates stored the
+        whole enemy dict: its own template is rebuilt from it if the name is unknown.
+        """
+        template = self.get(doc.get("template", doc.get("name")))
+        if template is None:
+            if "template" in doc:
+                print(f"[WARN] Unknown enemy template '{doc['template']}', enemy dropped")
+                return None
+            template = EnemyTemplate({k: v for k, v in doc.items() if k != "current_hp"})
+        enemy = EnemyInstance(template, doc.get("current_hp", 0), tuple(doc.get("status", ())),
+                              doc.get("overrides"))
+        enemy.max_hp = doc.get("max_hp", enemy.current_hp)
+        return enemy
+
+
+templates = TemplateRegistry()
+
+
+def enemies_to_documents(enemies):
+    if enemies is None:
+        return None
+    return [e.to_document() if isinstance(e, EnemyInstance) else e for e in enemies]
+
+
+def enemies_from_documents(docs):
+    if docs is None:
+        return None
+    enemies = (templates.instance_from_document(doc) for doc in docs)
+    return [e for e in enemies if e is not None]
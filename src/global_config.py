@@ -1,3 +1,71 @@
 config = {
-    "SHEET_DEBUGGING" : False
-}
\ No newline at end of file
+    "SHEET_DEBUGGING" : False,
+    "STREAM_NARRATION" : True,      # send narration token by token ('narration_chunk' events)
+
+    # Game sessions (see session.py)
+    "SESSION_MAX_ACTIVE" : 500,     # sessions kept in memory per worker
+    "SESSION_IDLE_TTL" : 30 * 60,   # seconds before an idle session is flushed and dropped
+    "SESSION_FLUSH_EVERY" : 5,      # turns between write-backs to MongoDB
+    "RECENT_HISTORY_LIMIT" : 20,    # messages kept per session (10 turns)
+
+    # Long-term memory compaction (see memory.py)
+    "MEMORY_COMPACT_EVERY" : 10,        # turns between two background compactions
+    "MEMORY_MAX_CHUNKS" : 4,            # chunk summaries kept before rolling them into the epoch summary
+    "MEMORY_SUMMARY_WORDS" : 120,       # target length of a chunk summary (epoch summary: twice as long)
+    "MEMORY_COMPACTION_WORKERS" : 2,    # green threads running compactions
+    "MEMORY_MAX_PENDING_EVENTS" : 100,  # messages waiting for a compaction, per session
+
+    # LLM client (see llm.py)
+    "LLM_MAX_CONCURRENCY_PER_MODEL" : 8,   # in-flight calls per model
+    "LLM_RETRIES" : 3,                     # attempts per model before falling back
+    "LLM_BACKOFF" : 2,                     # seconds, doubled at every retry
+    "LLM_CALL_DEADLINE" : 45,              # seconds for a whole narrate() call, fallbacks included
+    "LLM_STRUCTURED_OUTPUT" : True,        # send response_format to the models that advertise it
+    "LLM_CAPABILITY_TTL" : 3600,           # seconds before the model list is probed again
+
+    # Model routing (see router.py)
+    "LLM_LATENCY_WINDOW" : 50,             # latest calls per model and call type used for p50/p95
+    "LLM_BREAKER_FAILURES" : 3,            # failures in a row that open the circuit of a model
+    "LLM_BREAKER_COOLDOWN" : 30,           # seconds an open circuit skips the model
+    "LLM_HEDGING" : True,                  # ask a second model when the first is slower than its p95
+    "LLM_HEDGE_MIN_DELAY" : 3.0,           # seconds, never hedge earlier than this
+
+    # Response caches per call site (see cache.py)
+    "RESPONSE_CACHES" : {
+        "action_parser" : {"enabled": True, "max_entries": 2048, "ttl": 24 * 3600, "persist": True},
+        "flavor" : {"enabled": False, "max_entries": 512, "ttl": 10 * 60, "persist": False},  # creative text: keep it fresh
+    },
+    "RESPONSE_CACHE_DB" : None,     # sqlite file for the persisted caches, None = memory only
+
+    # Narrator prompt (see prompt.py)
+    "PROMPT_TOKEN_BUDGET" : 6000,   # estimated tokens; the oldest history messages are dropped beyond it
+    "PROMPT_REPORT" : True,         # log the token count of every prompt
+    "WORLD_KNOWLEDGE_ITEMS" : 25,   # catalog items retrieved into the prompt per turn
+    "WORLD_KNOWLEDGE_SKILLS" : 15,  # catalog skills retrieved into the prompt per turn
+    "FOUND_ITEM_MATCH_THRESHOLD" : 0.5,  # min similarity to map an invented found item to a catalog item
+
+    # Combat intent engine (see intent.py)
+    "INTENT_CONFIDENCE_THRESHOLD" : 0.6,  # below it, the combat action parser asks the model
+
+    # Turn pipeline (see pipeline.py)
+    "TURN_SPECULATION" : True,      # roll and narrate the likely combat round while the model parses the input
+    "TURN_TIMINGS" : True,          # log the duration of every stage of a turn
+
+    # Encounters (see encounters.py)
+    "ENCOUNTER_MAX_LEVEL" : 10,     # highest level band: stronger players meet the same enemies
+    "ENCOUNTER_GROUP_CHANCE" : 0.5, # chance of a group (from level 2) instead of a single enemy
+    "ENCOUNTER_MAX_GROUP" : 3,      # max enemies in a group
+
+    # Party combat (see scheduler.py)
+    "PARTY_COMBAT" : True,          # players in the same room fight an encounter together
+    "PARTY_TURN_WINDOW" : 20,       # seconds a round waits for the missing actions after the first one
+
+    # Catalog cache (see catalog.py)
+    "CATALOG_AUTO_REFRESH" : True,  # follow MongoDB changes (change stream, or polling as fallback)
+    "CATALOG_POLL_INTERVAL" : 60,   # seconds between polls when change streams are unavailable
+
+    # Avatar store (see avatars.py)
+    "AVATAR_BACKEND" : "filesystem",        # "filesystem" or "gridfs"
+    "AVATAR_DIR" : None,                    # filesystem root, defaults to <instance folder>/avatars
+    "AVATAR_THUMBNAIL_SIZES" : [64, 256]    # px, longest side; generated at upload
+}
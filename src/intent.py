@@ -0,0 +1,218 @@
+import difflib
+import re
+from collections import OrderedDict
+
+# Deterministic combat intent engine.
+# Turns "I cast fire bolt on the second one" into an action without asking the model:
+#   - a token trie built from the character's own skill and item names (and their
+#     distinctive words) finds the names mentioned in the input in one pass;
+#   - fuzzy matching (difflib) catches typos like "firbolt" or "helth potion";
+#   - verb lists decide between attack / run / skill / item when no name is given.
+# Every answer comes with a confidence; get_action_from_ai only asks the model below
+# INTENT_CONFIDENCE_THRESHOLD. Engines are compiled once per skill/inventory set.
+
+ATTACK_WORDS = ("attack", "hit", "strike", "slash", "shoot", "swing", "bash", "stab", "punch",
+                "kick", "fight", "charge", "smash", "cut", "fire an arrow", "melee")
+RUN_WORDS = ("run", "flee", "escape", "retreat", "withdraw", "run away", "get away", "leave")
+CAST_WORDS = ("cast", "channel", "invoke", "conjure", "spell", "use")
+ITEM_WORDS = ("drink", "quaff", "consume", "eat", "use", "apply", "throw", "drink from")
+# Words too generic to point at a single name on their own
+STOP_WORDS = {"of", "the", "a", "an", "and", "to", "with", "on", "at", "my"}
+
+ORDINALS = {"first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5, "last": -1}
+_TARGET = re.compile(
+    r"^(?:target|switch(?: target)?(?: to)?|focus(?: on)?|aim(?: at)?)\s+(?:the\s+|enemy\s+|#)?"
+    r"(\d+|first|second|third|fourth|fifth|last)\b"
+)
+
+# Confidence of each kind of evidence
+FULL_NAME = 1.0
+UNIQUE_WORD = 0.75
+SHARED_WORD = 0.55
+FUZZY_WEIGHT = 0.85
+VERB_BONUS = 0.05
+RUN_CONFIDENCE = 0.9
+ATTACK_CONFIDENCE = 0.85
+
+
+def normalize(text):
+    return re.sub(r"[^a-z0-9]+", " ", text.lower().replace("'", "")).split()
+
+
+class Intent:
+    __slots__ = ("action", "target", "confidence", "reason")
+
+    def __init__(self, action, target=None, confidence=0.0, reason=""):
+        self.action = action          # "attack", "use skill", "use item", "run", "target"
+        self.target = target          # skill/item name, or enemy index for "target"
+        self.confidence = confidence
+        self.reason = reason
+
+    def __repr__(self):
+        return f"Intent({self.action!r}, {self.target!r}, {self.confidence:.2f}, {self.reason!r})"
+
+
+class KeywordTrie:
+    """Token trie: finds every known phrase in a token list, longest match first at each position."""
+
+    _END = object()
+
+    def __init__(self):
+        self._root = {}
+        self.max_length = 0
+
+    def add(self, tokens, payload):
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault(self._END, []).append(payload)
+        self.max_length = max(self.max_length, len(tokens))
+
+    def find(self, tokens):
+        """Yields (position, length, payloads)."""
+        for start in range(len(tokens)):
+            node = self._root
+            best = None
+            for end in range(start, min(len(tokens), start + self.max_length)):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                if self._END in node:
+                    best = (start, end - start + 1, node[self._END])
+            if best:
+                yield best
+
+
+class IntentEngine:
+    """
+    Args:
+        skills: skill documents the character can use (name, type)
+        items: item documents of the inventory (name, itemType)
+    """
+
+    def __init__(self, skills, items):
+        self.names = {}     # normalized name -> (kind, canonical name, document)
+        self._names = KeywordTrie()
+        self._verbs = KeywordTrie()
+
+        for kind, docs in (("skill", skills), ("item", items)):
+            for doc in docs:
+                tokens = normalize(doc["name"])
+                if tokens:
+                    self.names[" ".join(tokens)] = (kind, doc["name"], doc)
+                    self._names.add(tokens, (FULL_NAME, kind, doc["name"]))
+
+        # Single distinctive words of the names ("bolt", "potion"); verbs excluded so
+        # "strike the goblin" is an attack and not Power Strike
+        verbs = {w for w in ATTACK_WORDS + RUN_WORDS if " " not in w}
+        owners = {}
+        for key, (kind, name, _) in self.names.items():
+            for token in set(key.split()):
+                if token not in STOP_WORDS and token not in verbs and token != key:
+                    owners.setdefault(token, []).append((kind, name))
+        for token, named in owners.items():
+            weight = UNIQUE_WORD if len(named) == 1 else SHARED_WORD
+            for kind, name in named:
+                self._names.add([token], (weight, kind, name))
+
+        for label, words in (("attack", ATTACK_WORDS), ("run", RUN_WORDS),
+                             ("cast", CAST_WORDS), ("item", ITEM_WORDS)):
+            for word in words:
+                self._verbs.add(word.split(), label)
+
+        self._squashed = {key.replace(" ", ""): key for key in self.names}
+        self._single_verbs = {w: label for label, words in (("attack", ATTACK_WORDS), ("run", RUN_WORDS))
+                              for w in words if " " not in w}
+
+    def _name_match(self, tokens):
+        best = None
+        for position, _, payloads in self._names.find(tokens):
+            for weight, kind, name in payloads:
+                if best is None or weight > best[0]:
+                    best = (weight, kind, name, position)
+        if best and best[0] > SHARED_WORD:
+            return best
+
+        # Typos: n-grams of the input against the names, spaces ignored ("fire bolt" ~ "firbolt").
+        # Also tried after a shared word only ("helth potion" -> Health Potion, not any potion)
+        for size in (1, 2, 3):
+            for start in range(len(tokens) - size + 1):
+                gram = "".join(tokens[start:start + size])
+                if len(gram) < 4:
+                    continue
+                for match in difflib.get_close_matches(gram, self._squashed, n=1, cutoff=0.8):
+                    ratio = difflib.SequenceMatcher(None, gram, match).ratio()
+                    kind, name, _ = self.names[self._squashed[match]]
+                    if best is None or ratio * FUZZY_WEIGHT > best[0]:
+                        best = (ratio * FUZZY_WEIGHT, kind, name, start)
+        return best
+
+    def classify(self, text, enemy_count=None):
+        tokens = normalize(text)
+        if not tokens:
+            return Intent("attack", confidence=0.0, reason="empty input")
+
+        target = _TARGET.match(" ".join(tokens))
+        if target:
+            value = target.group(1)
+            index = ORDINALS[value] if value in ORDINALS else int(value)
+            if index == -1 and enemy_count:
+                index = enemy_count
+            if index >= 1 and (enemy_count is None or index <= enemy_count):
+                return Intent("target", index - 1, 0.95, "target command")
+            return Intent("target", None, 0.5, "target out of range")
+
+        verbs = {}
+        for position, _, labels in self._verbs.find(tokens):
+            for label in labels:
+                verbs.setdefault(label, position)
+        fuzzy_verb = not verbs
+        if fuzzy_verb:
+            # Misspelled verb ("atack"): same decision, lower confidence
+            for position, token in enumerate(tokens):
+                match = difflib.get_close_matches(token, self._single_verbs, n=1, cutoff=0.8) if len(token) > 3 else []
+                if match:
+                    verbs.setdefault(self._single_verbs[match[0]], position)
+
+        named = self._name_match(tokens)
+        if named:
+            weight, kind, name, _ = named
+            doc = self.names[" ".join(normalize(name))][2]
+            if kind == "skill":
+                bonus = VERB_BONUS if "cast" in verbs else 0.0
+                return Intent("use skill", name, min(1.0, weight + bonus), "skill name")
+            if doc.get("itemType") == "weapon" and "item" not in verbs:
+                # "shoot with my longbow": an attack with the equipped weapon
+                return Intent("attack", None, weight * 0.95, f"weapon name ({name})")
+            bonus = VERB_BONUS if "item" in verbs else 0.0
+            return Intent("use item", name, min(1.0, weight + bonus), "item name")
+
+        # No name: the first verb decides
+        penalty = FUZZY_WEIGHT if fuzzy_verb else 1.0
+        for label in sorted(verbs, key=verbs.get):
+            if label == "run":
+                return Intent("run", confidence=RUN_CONFIDENCE * penalty, reason="run verb")
+            if label == "attack":
+                return Intent("attack", confidence=ATTACK_CONFIDENCE * penalty, reason="attack verb")
+        if verbs:
+            # "drink something" / "cast a spell" without a known name: let the model decide
+            return Intent("attack", confidence=0.3, reason="verb without a known name")
+        return Intent("attack", confidence=0.0, reason="no match")
+
+
+_engines = OrderedDict()
+_MAX_ENGINES = 256
+
+
+def engine_for(skills, items):
+    """Compiled engine for this skill/inventory set, reused across turns and characters."""
+    key = (tuple(s["name"] for s in skills), tuple(i["name"] for i in items))
+    engine = _engines.get(key)
+    if engine is None:
+        engine = IntentEngine(skills, items)
+        _engines[key] = engine
+        if len(_engines) > _MAX_ENGINES:
+            _engines.popitem(last=False)
+    else:
+        _engines.move_to_end(key)
+    return engine
@@ -0,0 +1,272 @@
+import random
+import time
+
+import eventlet
+from eventlet.queue import Empty, LightQueue
+from eventlet.semaphore import BoundedSemaphore
+from openai import BadRequestError, OpenAI
+
+from . import global_config
+from .router import ModelRouter
+
+# LLM client layer used by brain.narrate().
+# The OpenAI client is synchronous: under eventlet it only yields to other rooms if the
+# process is monkey patched (see main.py) and if we never call time.sleep() ourselves.
+# So here: one bounded green semaphore per model (caps in-flight calls to a provider),
+# eventlet.sleep() for the backoff between retries, and a deadline for the whole call.
+#
+# Model choice is delegated to a ModelRouter (see router.py): each call has a call type,
+# models are tried fastest-healthy first, a failing model is left at once for the next
+# one (the backoff is only paid once every model has failed), models with an open
+# circuit are skipped, and a complete() that outlives the p95 of its model is hedged:
+# the next healthy model gets the same request and the first answer wins.
+#
+# Structured output: a call can pass a JSON schema. Models whose listing (GET /models,
+# "supported_parameters") advertises "structured_outputs" get it as response_format
+# json_schema, models with only "response_format" get JSON mode, the others get the
+# plain prompt and the caller's tolerant parsing (see parsing.py). A model that rejects
+# the parameter anyway (HTTP 400 about the response_format) is downgraded one level
+# and retried at once.
+
+# Structured output modes, best first
+STRUCTURED_MODES = ("json_schema", "json_object", None)
+# Words of a 400 that is about the requested output format
+FORMAT_ERROR_HINTS = ("response_format", "json_schema", "json_object", "structured", "json mode")
+
+
+def _rejects_format(error):
+    """Whether a BadRequestError is about the response_format (not the prompt or the other parameters)."""
+    text = str(error).lower()
+    body = getattr(error, "body", None)
+    if body:
+        text += " " + str(body).lower()
+    return any(hint in text for hint in FORMAT_ERROR_HINTS)
+
+
+class LLMUnavailable(Exception):
+    """Every model failed, or the deadline expired before any answered."""
+
+
+class LLMClient:
+    """
+    Args:
+        base_url, api_key: OpenAI-compatible endpoint (OpenRouter by default).
+        models: list of model names, in order of preference. The list is not copied,
+                so editing brain.FREE_MODELS at runtime is picked up.
+    """
+
+    def __init__(self, base_url, api_key, models, max_concurrency=None, retries=None, backoff=None, deadline=None):
+        # Retries are ours (cooperative), not the SDK's (blocking)
+        self._client = OpenAI(base_url=base_url, api_key=api_key, max_retries=0)
+        self.models = models
+        self.max_concurrency = max_concurrency or global_config.config["LLM_MAX_CONCURRENCY_PER_MODEL"]
+        self.retries = retries or global_config.config["LLM_RETRIES"]
+        self.backoff = backoff if backoff is not None else global_config.config["LLM_BACKOFF"]
+        self.deadline = deadline or global_config.config["LLM_CALL_DEADLINE"]
+        self._pools = {}
+        self._modes = {}            # model -> structured output mode (see STRUCTURED_MODES)
+        self._probed_at = None
+        self.router = ModelRouter()
+
+    def _pool(self, model):
+        if model not in self._pools:
+            self._pools[model] = BoundedSemaphore(self.max_concurrency)
+        return self._pools[model]
+
+    # Yields (model, attempt, deadline_at) for every attempt, sleeping between failed rounds.
+    # The caller returns on success; falling through to the next item means it failed.
+    # A round tries every model whose circuit allows it, in the router's order.
+    def _attempts(self, retries, backoff, deadline, models, call_type):
+        retries = retries or self.retries
+        backoff = self.backoff if backoff is None else backoff
+        deadline_at = time.monotonic() + (deadline or self.deadline)
+
+        for attempt in range(retries):
+            for model in self.router.order(models or self.models, call_type):
+                if deadline_at - time.monotonic() <= 0:
+                    raise LLMUnavailable("deadline expired")
+                if not self.router.breaker(model).allow():
+                    continue
+
+                yield model, attempt, deadline_at
+
+            # Exponential backoff with jitter, never past the deadline, never blocking the hub
+            if attempt + 1 < retries:
+                print(f"[INFO] Every model failed, retrying...")
+                pause = backoff * (2 ** attempt) * random.uniform(0.5, 1.0)
+                eventlet.sleep(max(0, min(pause, deadline_at - time.monotonic())))
+
+        raise LLMUnavailable("all models failed")
+
+    def _acquire(self, model, deadline_at):
+        pool = self._pool(model)
+        if not pool.acquire(timeout=max(0, deadline_at - time.monotonic())):
+            raise LLMUnavailable(f"deadline expired waiting for a {model} slot")
+        return pool
+
+    # Capability probe: one GET /models per LLM_CAPABILITY_TTL, shared by every model
+    def _probe(self):
+        now = time.monotonic()
+        if self._probed_at is not None and now - self._probed_at < global_config.config["LLM_CAPABILITY_TTL"]:
+            return
+        self._probed_at = now
+        try:
+            listing = self._client.models.list(timeout=10)
+        except Exception as e:
+            print(f"[WARN] Model capability probe failed, plain prompts only: {e}")
+            return
+        for info in listing:
+            supported = getattr(info, "supported_parameters", None) or []
+            if "structured_outputs" in supported:
+                mode = "json_schema"
+            elif "response_format" in supported:
+                mode = "json_object"
+            else:
+                mode = None
+            # Never upgrade a model that already rejected a mode
+            known = self._modes.get(info.id, mode)
+            self._modes[info.id] = STRUCTURED_MODES[max(STRUCTURED_MODES.index(mode), STRUCTURED_MODES.index(known))]
+
+    def structured_mode(self, model):
+        """Structured output mode of a model: "json_schema", "json_object" or None."""
+        if not global_config.config["LLM_STRUCTURED_OUTPUT"]:
+            return None
+        self._probe()
+        return self._modes.get(model)
+
+    # Steps the model one mode down from `mode`, the mode that was sent. Concurrent calls
+    # rejected with the same mode downgrade it once: the others find it already changed.
+    def _downgrade(self, model, mode, error):
+        if mode is None or self._modes.get(model) != mode:
+            return
+        self._modes[model] = STRUCTURED_MODES[STRUCTURED_MODES.index(mode) + 1]
+        print(f"[WARN] Model {model} rejected {mode} output ({error}), now using {self._modes[model] or 'plain prompts'}")
+
+    # Extra request arguments for a structured output mode and a JSON schema ({"name", "strict", "schema"})
+    @staticmethod
+    def _format_args(mode, json_schema):
+        if mode == "json_schema":
+            return {"response_format": {"type": "json_schema", "json_schema": json_schema}}
+        if mode == "json_object":
+            return {"response_format": {"type": "json_object"}}
+        return {}
+
+    # Calls the model; a 400 about the response_format downgrades the model and retries with
+    # the next mode. Other 400s (context length, bad parameter...) are raised unchanged.
+    def _create(self, model, messages, max_tokens, deadline_at, json_schema, **kwargs):
+        mode = self.structured_mode(model) if json_schema else None
+        extra = self._format_args(mode, json_schema)
+        try:
+            return self._client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                timeout=max(0.1, deadline_at - time.monotonic()),
+                **extra,
+                **kwargs
+                # temperature=0.7   # Tested but not used for now (https://openrouter.ai/docs/api/reference/parameters)
+            )
+        except BadRequestError as e:
+            if not extra or not _rejects_format(e):
+                raise
+            self._downgrade(model, mode, e)
+            return self._create(model, messages, max_tokens, deadline_at, json_schema, **kwargs)
+
+    # One measured call: the outcome and the latency go to the router
+    def _call(self, model, messages, max_tokens, deadline_at, json_schema, call_type):
+        pool = self._acquire(model, deadline_at)
+        start = time.monotonic()
+        try:
+            response = self._create(model, messages, max_tokens, deadline_at, json_schema)
+            text = response.choices[0].message.content
+        except Exception:
+            self.router.record(model, call_type, time.monotonic() - start, ok=False)
+            raise
+        finally:
+            pool.release()
+        self.router.record(model, call_type, time.monotonic() - start, ok=True)
+        return text
+
+    # Next model with a closed circuit, to hedge a slow call
+    def _hedge_partner(self, primary, models, call_type):
+        for model in self.router.order(models or self.models, call_type):
+            if model != primary and self.router.breaker(model).state == "closed":
+                return model
+        return None
+
+    # The primary call, plus the same request to a second model if the primary is slower
+    # than expected (see ModelRouter.hedge_delay). First answer wins; the slower call
+    # finishes in the background.
+    def _hedged(self, primary, models, messages, max_tokens, deadline_at, json_schema, call_type):
+        results = LightQueue()
+
+        def run(model):
+            try:
+                results.put((model, self._call(model, messages, max_tokens, deadline_at, json_schema, call_type), None))
+            except Exception as e:
+                results.put((model, None, e))
+
+        eventlet.spawn_n(run, primary)
+        pending, hedged = 1, False
+        secondary = self._hedge_partner(primary, models, call_type)
+        delay = self.router.hedge_delay(primary, secondary, call_type)
+        while True:
+            remaining = max(0, deadline_at - time.monotonic())
+            try:
+                model, text, error = results.get(timeout=remaining if hedged or delay is None else min(delay, remaining))
+            except Empty:
+                if hedged or time.monotonic() >= deadline_at:
+                    raise LLMUnavailable("deadline expired")
+                hedged = True
+                print(f"[INFO] {primary} slower than {delay:.1f}s, hedging with {secondary}")
+                eventlet.spawn_n(run, secondary)
+                pending += 1
+                continue
+            pending -= 1
+            if error is None:
+                return text
+            if pending == 0:
+                raise error
+            print(f"[WARN] Model {model} failed while hedged: {error}")
+
+    # Returns the text of the first successful completion.
+    # Raises LLMUnavailable if no model answers before the deadline.
+    # json_schema: {"name", "strict", "schema"}, sent to the models that support it
+    # call_type: "strict", "flavor", "summary", "parser"... latencies are tracked per type
+    def complete(self, messages, max_tokens=400, retries=None, backoff=None, deadline=None, models=None,
+                 json_schema=None, call_type="default"):
+        for model, attempt, deadline_at in self._attempts(retries, backoff, deadline, models, call_type):
+            try:
+                return self._hedged(model, models, messages, max_tokens, deadline_at, json_schema, call_type)
+            except Exception as e:
+                print(f"[WARN] Model {model} failed attempt {attempt+1}: {e}")
+
+    # Same as complete() but yields the text deltas as the model produces them.
+    # Fallback to other models is only possible before the first delta: once text
+    # has reached the player an interrupted stream raises LLMUnavailable.
+    # Streams are not hedged; their latency is the time to the first delta.
+    def stream(self, messages, max_tokens=400, retries=None, backoff=None, deadline=None, models=None,
+               json_schema=None, call_type="default"):
+        for model, attempt, deadline_at in self._attempts(retries, backoff, deadline, models, call_type):
+            pool = self._acquire(model, deadline_at)
+            started = False
+            start = time.monotonic()
+            try:
+                response = self._create(model, messages, max_tokens, deadline_at, json_schema, stream=True)
+                for chunk in response:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        if not started:
+                            started = True
+                            self.router.record(model, call_type, time.monotonic() - start, ok=True)
+                        yield delta
+                return
+            except Exception as e:
+                self.router.record(model, call_type, time.monotonic() - start, ok=False)
+                if started:
+                    raise LLMUnavailable(f"{model} stream interrupted: {e}")
+                print(f"[WARN] Model {model} failed attempt {attempt+1}: {e}")
+            finally:
+                pool.release()
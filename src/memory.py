@@ -0,0 +1,123 @@
+import eventlet
+from eventlet.queue import LightQueue
+from flask import current_app
+
+from . import global_config
+from .llm import LLMUnavailable
+
+# Background compaction of the long-term memory.
+# summarise_memory used to run inside the player's turn every 10 turns (and called the
+# model twice). Now the turn only queues a job; a few green workers do the model call
+# and write the result to the session and to MongoDB.
+#
+# The memory is hierarchical (see GameSession):
+#   memory_epoch   one summary of the whole adventure up to the oldest chunk
+#   memory_chunks  summaries of the latest chunks of turns
+# A job summarises the pending events into a new chunk, or, when MEMORY_MAX_CHUNKS
+# chunks already exist, rolls the epoch, the chunks and the pending events into a new
+# epoch summary. Either way: exactly one model call per compaction.
+
+CHUNK_PROMPT = (
+    "You are a reporter. Summarise the most important facts of these events of a fantasy "
+    "adventure (places, characters met, items, quests, decisions) in at most {words} words. "
+    "Output only the summary."
+)
+EPOCH_PROMPT = (
+    "You are a reporter. Merge the story so far, the latest chapter summaries and the latest "
+    "events into a single summary of the adventure, keeping what matters for the rest of the "
+    "story (places, characters met, items, quests, decisions), in at most {words} words. "
+    "Output only the summary."
+)
+
+
+def format_events(events):
+    return "\n".join(f"{e['role']}: {e['content']}" for e in events)
+
+
+class MemoryCompactor:
+    """
+    Args:
+        complete: callable(messages, max_tokens) -> text, raises on failure (LLMClient.complete)
+    """
+
+    def __init__(self, complete, workers=None, max_chunks=None):
+        self._complete = complete
+        self.workers = workers or global_config.config["MEMORY_COMPACTION_WORKERS"]
+        self.max_chunks = max_chunks or global_config.config["MEMORY_MAX_CHUNKS"]
+        self._queue = LightQueue()
+        self._started = False
+
+    # Called from the turn: never blocks on the model
+    def schedule(self, session):
+        if session.compacting or not session.pending_events:
+            return False
+        if not self._started:
+            for _ in range(self.workers):
+                eventlet.spawn_n(self._worker)
+            self._started = True
+
+        session.compacting = True
+        events, session.pending_events = session.pending_events, []
+        self._queue.put((current_app._get_current_object(), session, events))
+        return True
+
+    def _worker(self):
+        while True:
+            app, session, events = self._queue.get()
+            try:
+                with app.app_context():
+                    self.compact(session, events)
+            except Exception as e:
+                # Events go back to the session: the next compaction will include them
+                print(f"[WARN] Memory compaction failed for {session.key}: {e}")
+                session.pending_events[:0] = events
+            finally:
+                session.compacting = False
+
+    def compact(self, session, events):
+        words = global_config.config["MEMORY_SUMMARY_WORDS"]
+        if len(session.memory_chunks) < self.max_chunks:
+            messages = [
+                {"role": "system", "content": CHUNK_PROMPT.format(words=words)},
+                {"role": "user", "content": f"Events:\n{format_events(events)}"}
+            ]
+            session.memory_chunks.append(self._summary(messages, words))
+        else:
+            chapters = "\n".join(f"- {c}" for c in session.memory_chunks)
+            messages = [
+                {"role": "system", "content": EPOCH_PROMPT.format(words=words * 2)},
+                {"role": "user", "content": (
+                    f"Story so far:\n{session.memory_epoch}\n\n"
+                    f"Latest chapters:\n{chapters}\n\n"
+                    f"Latest events:\n{format_events(events)}"
+                )}
+            ]
+            session.memory_epoch = self._summary(messages, words * 2)
+            session.memory_chunks = []
+
+        self._persist(session)
+
+    def _summary(self, messages, words):
+        summary = self._complete(messages, max_tokens=words * 2)
+        if not summary or not summary.strip():
+            raise LLMUnavailable("empty summary")
+        return summary.strip()
+
+    # The memory is written at once, without waiting for the session write-behind
+    def _persist(self, session):
+        try:
+            current_app.db['Sessions'].update_one(
+                {"_id": session.key},
+                {"$set": {
+                    "room": session.room,
+                    "character_id": session.character_id,
+                    "long_term_memory": session.long_term_memory,
+                    "memory_epoch": session.memory_epoch,
+                    "memory_chunks": session.memory_chunks,
+                    "pending_events": session.pending_events
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            # Still in the session: the next write-behind flush saves it
+            print(f"[ERROR] Could not save the memory of {session.key}: {e}")
@@ -0,0 +1,62 @@
+import base64
+import io
+
+from PIL import Image
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+
+from .catalog import NAMED_CATALOGS, backfill_names
+
+# Startup migrations, run by create_app.
+# Every step must be idempotent: it runs at each start of every worker.
+
+
+# Adds the normalized `name_lc` field to Items/Skills/Enemies and a unique index on it.
+# Name lookups become an exact indexed equality instead of an anchored case-insensitive
+# $regex, which cannot use an index and breaks on names like "Potion (Greater)".
+# The index is partial (string name_lc only): documents without a name do not collide
+# as nulls. Documents written later without name_lc get it from the catalog watcher
+# (see catalog.py).
+NAME_LC_FILTER = {"name_lc": {"$type": "string"}}
+
+
+def migrate_catalog_names(db):
+    for collection_name in NAMED_CATALOGS:
+        collection = db[collection_name]
+        try:
+            # Only documents without an up to date name_lc are touched (none after the first run)
+            updated = backfill_names(collection)
+            if updated:
+                print(f"[MIGRATION] {collection_name}: name_lc set on {updated} documents")
+
+            # The first version of the index was not partial: replace it
+            index = collection.index_information().get("name_lc_unique")
+            if index is not None and index.get("partialFilterExpression") != NAME_LC_FILTER:
+                collection.drop_index("name_lc_unique")
+            collection.create_index([("name_lc", ASCENDING)], unique=True, name="name_lc_unique",
+                                    partialFilterExpression=NAME_LC_FILTER)
+        except OperationFailure as e:
+            # Usually two documents with the same name: the index is not created, lookups still work
+            print(f"[ERROR] Could not index {collection_name}.name_lc (duplicate names?): {e}")
+        except Exception as e:
+            print(f"[ERROR] name_lc migration failed for {collection_name}: {e}")
+
+
+# Moves the base64 avatars still embedded in Character documents to the avatar store:
+# the document keeps only `avatar_hash`. Thumbnails are generated on the way.
+def migrate_avatars(db, store):
+    moved = 0
+    for doc in db['Characters'].find({"avatar_base64": {"$exists": True}}, {"avatar_base64": 1}):
+        try:
+            digest = None
+            if doc["avatar_base64"]:
+                digest = store.put(Image.open(io.BytesIO(base64.b64decode(doc["avatar_base64"]))))
+            db['Characters'].update_one(
+                {"_id": doc["_id"]},
+                {"$set": {"avatar_hash": digest}, "$unset": {"avatar_base64": ""}}
+            )
+            moved += 1
+        except Exception as e:
+            print(f"[ERROR] Could not move the avatar of character {doc['_id']}: {e}")
+    if moved:
+        print(f"[MIGRATION] Characters: {moved} avatars moved to the avatar store")
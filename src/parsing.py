@@ -0,0 +1,316 @@
+import json
+import re
+
+# Tolerant JSON extraction for model outputs.
+# extract_json used a greedy \{.*\} regex: any text after the object containing a "}"
+# (a second object, a remark in braces), a trailing comma or a truncated tail made
+# json.loads fail, and narrate_strict paid a second model call to "repair" the output.
+# JsonScanner reads the output once, character by character (it can be fed chunk by
+# chunk while streaming), stops at the end of the first balanced object, and rewrites
+# the common defects into strict JSON on the way:
+#   code fences and text around the object, trailing and missing commas, single quotes,
+#   unquoted keys, Python literals (True/None), raw newlines in strings, // comments,
+#   and truncated tails (open strings and brackets are closed, a dangling key is dropped).
+# conform() then checks the object against a schema and fills in the defaults, so the
+# model is only asked to repair an output with no usable object at all.
+
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?\Z")
+_LITERALS = {"true": "true", "false": "false", "null": "null", "none": "null"}
+_ESCAPES = set('"\\/bfnrtu')
+_WORD = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_+-.")
+_CLOSERS = {"{": "}", "[": "]"}
+# Start positions tried before giving up ("Here is the {json}: {...}")
+MAX_STARTS = 5
+
+
+class JsonScanner:
+    """
+    Incremental parser of the first JSON object in a text.
+
+    feed() returns True once the object is complete (the rest of the input is ignored),
+    finish() returns the parsed object and raises ValueError if there is none.
+    fixes lists the defects that were corrected.
+    """
+
+    def __init__(self):
+        self._out = []
+        self._stack = []
+        self._quote = None          # quote char of the open string, None outside strings
+        self._escape = False
+        self._word = []
+        self._comment = None        # None, "line" or "block"
+        self._slash = False
+        self._after_value = False   # a value just ended: the next one needs a comma
+        self._snapshots = []        # (output length, stack) after each comma, to cut a truncated tail
+        self.started = False
+        self.done = False
+        self.fixes = set()
+
+    def feed(self, chunk):
+        for ch in chunk:
+            if self.done:
+                break
+            self._step(ch)
+        return self.done
+
+    def _step(self, ch):
+        if not self.started:
+            if ch == "{":
+                self.started = True
+                self._open("{")
+            elif not ch.isspace():
+                self.fixes.add("text before the object")
+            return
+        if self._quote:
+            self._string_char(ch)
+            return
+        if self._comment:
+            if self._comment == "line" and ch == "\n":
+                self._comment = None
+            elif self._comment == "block" and ch == "/" and self._slash:
+                self._comment = None
+            self._slash = ch == "*"
+            return
+        if self._slash:
+            self._slash = False
+            if ch in "/*":
+                self._flush_word(None)
+                self._comment = "line" if ch == "/" else "block"
+                self.fixes.add("comment")
+                return
+        if ch == "/":
+            self._slash = True
+            return
+
+        if ch in _WORD:
+            if not self._word:
+                self._value_start()
+            self._word.append(ch)
+            return
+        self._flush_word(ch)
+
+        if ch in "\"'":
+            self._value_start()
+            if ch == "'":
+                self.fixes.add("single quotes")
+            self._quote = ch
+            self._out.append('"')
+        elif ch in "{[":
+            self._value_start()
+            self._open(ch)
+        elif ch in "}]":
+            self._close(ch)
+        elif ch == ",":
+            if self._out[-1] in ",[{":
+                self.fixes.add("extra comma")
+            else:
+                self._comma()
+        elif ch == ":":
+            self._out.append(":")
+            self._after_value = False
+        # whitespace and stray characters outside strings are dropped
+
+    def _string_char(self, ch):
+        out = self._out
+        if self._escape:
+            self._escape = False
+            if ch == "'":
+                out.append("'")
+            elif ch in _ESCAPES:
+                out.append("\\" + ch)
+            else:
+                out.append("\\\\" + ch)
+                self.fixes.add("invalid escape")
+        elif ch == "\\":
+            self._escape = True
+        elif ch == self._quote:
+            out.append('"')
+            self._quote = None
+            self._after_value = True
+        elif ch == '"':
+            out.append('\\"')
+        elif ch < " ":
+            out.append(json.dumps(ch)[1:-1])
+            self.fixes.add("control character in string")
+        else:
+            out.append(ch)
+
+    def _value_start(self):
+        if self._after_value:
+            self.fixes.add("missing comma")
+            self._comma()
+
+    def _comma(self):
+        self._out.append(",")
+        self._after_value = False
+        self._snapshots.append((len(self._out), tuple(self._stack)))
+
+    def _open(self, ch):
+        self._stack.append(ch)
+        self._out.append(ch)
+        self._after_value = False
+
+    def _close(self, ch):
+        if not self._stack:
+            return
+        if self._out[-1] == ",":
+            self._out.pop()
+            self.fixes.add("trailing comma")
+        # "}" closing a "[" (or the reverse): the missing bracket is added
+        while self._stack and _CLOSERS[self._stack[-1]] != ch:
+            self._out.append(_CLOSERS[self._stack.pop()])
+            self.fixes.add("mismatched bracket")
+        if self._stack:
+            self._out.append(_CLOSERS[self._stack.pop()])
+        self._after_value = True
+        if not self._stack:
+            self.done = True
+
+    def _flush_word(self, next_ch):
+        if not self._word:
+            return
+        word = "".join(self._word)
+        self._word = []
+        self._after_value = True
+        if word.lower() in _LITERALS:
+            if word != word.lower() or word.lower() == "none":
+                self.fixes.add("python literal")
+            self._out.append(_LITERALS[word.lower()])
+            return
+        if _NUMBER.match(word):
+            self._out.append(word)
+            return
+        try:
+            number = float(word)   # +5, .5, 05
+        except ValueError:
+            self._out.append(json.dumps(word))
+            self.fixes.add("unquoted key" if next_ch == ":" or self._out[-2] in "{," else "unquoted string")
+            return
+        self._out.append(str(int(number)) if number.is_integer() else repr(number))
+        self.fixes.add("number format")
+
+    def finish(self):
+        if not self.started:
+            raise ValueError("No JSON object found in the text")
+        if not self.done:
+            self._flush_word(None)
+            self.fixes.add("truncated")
+            if self._quote:
+                self._out.append('"')
+                self._quote = None
+            # Whole tail first, then cut back to the last complete member
+            candidates = [(len(self._out), tuple(self._stack))] + [
+                (end - 1, stack) for end, stack in reversed(self._snapshots)
+            ]
+            for end, stack in candidates:
+                text = "".join(self._out[:end]).rstrip(",:")
+                text += "".join(_CLOSERS[c] for c in reversed(stack))
+                try:
+                    return json.loads(text)
+                except ValueError:
+                    continue
+            raise ValueError("Truncated JSON object could not be closed")
+        return json.loads("".join(self._out))
+
+
+def extract_object(text):
+    """
+    The first JSON object of a model output, and the set of defects fixed to read it.
+    Raises ValueError if the text contains no usable object.
+    """
+    start = text.find("{")
+    error = ValueError("No JSON object found in the text")
+    for _ in range(MAX_STARTS):
+        if start < 0:
+            break
+        scanner = JsonScanner()
+        scanner.feed(text[start:])
+        try:
+            value = scanner.finish()
+        except ValueError as e:
+            error = e
+        else:
+            if isinstance(value, dict):
+                if text[:start].strip():
+                    scanner.fixes.add("text before the object")
+                return value, scanner.fixes
+        start = text.find("{", start + 1)
+    raise error
+
+
+def _coerce(value, default):
+    """value converted to the type of default, or default if it cannot be."""
+    kind = type(default)
+    if kind is bool:
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.strip().lower() in ("true", "yes", "false", "no"):
+            return value.strip().lower() in ("true", "yes")
+        if isinstance(value, (int, float)):
+            return bool(value)
+    elif kind in (int, float):
+        if isinstance(value, bool):
+            return default
+        if isinstance(value, (int, float)):
+            return kind(value)
+        if isinstance(value, str):
+            match = re.search(r"[-+]?\d+(?:\.\d+)?", value)
+            if match:
+                return kind(float(match.group()))
+    elif kind is list:
+        if isinstance(value, list):
+            return value
+        if isinstance(value, str):
+            return [value] if value.strip() else []
+    elif kind is str or default is None:
+        if value is None or isinstance(value, str):
+            return value
+        if isinstance(value, (int, float)):
+            return str(value)
+    return default
+
+
+def conform(value, schema):
+    """
+    A copy of value with every field of schema: {field: default}.
+    Missing fields get their default, wrong types are coerced (or reset to the default);
+    extra fields are kept. Returns (object, names of the fields that were filled or fixed).
+    """
+    result = dict(value)
+    changed = []
+    for field, default in schema.items():
+        if field not in result:
+            result[field] = list(default) if isinstance(default, list) else default
+            changed.append(field)
+            continue
+        coerced = _coerce(result[field], default)
+        if coerced is not result[field] and coerced != result[field]:
+            result[field] = list(coerced) if coerced is default and isinstance(default, list) else coerced
+            changed.append(field)
+    return result, changed
+
+
+def json_schema(name, defaults):
+    """
+    Strict JSON schema ({"name", "strict", "schema"}, as response_format expects it)
+    of an object with the fields of defaults: {field: default}, as used by conform().
+    """
+    types = {bool: "boolean", int: "integer", float: "number", str: "string"}
+    properties = {}
+    for field, default in defaults.items():
+        if default is None:
+            properties[field] = {"type": ["string", "null"]}
+        elif isinstance(default, list):
+            properties[field] = {"type": "array", "items": {"type": "string"}}
+        else:
+            properties[field] = {"type": types[type(default)]}
+    return {
+        "name": name,
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": properties,
+            "required": list(defaults),
+            "additionalProperties": False
+        }
+    }
@@ -0,0 +1,93 @@
+import time
+from contextlib import contextmanager
+
+import eventlet
+from flask import copy_current_request_context, current_app, has_app_context, has_request_context
+
+from . import global_config
+
+# Turn pipeline helpers.
+# A turn used to chain its model calls: parse the combat action, then narrate the
+# round, then (on victory) narrate the aftermath. Calls that do not depend on each
+# other now run in green threads (spawn), and a slow parse is overlapped with a
+# speculative round: the likely outcome is rolled on copies and narrated while the
+# parser is still thinking, and kept only if the parser agrees (see brain.py).
+# TurnTimer records every stage so the gain is visible in the logs (TURN_TIMINGS).
+
+
+class TurnTimer:
+    def __init__(self, label="turn"):
+        self.label = label
+        self.started = time.monotonic()
+        self.stages = []    # (name, start, end), in order of completion
+
+    @contextmanager
+    def stage(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.stages.append((name, start, time.monotonic()))
+
+    def spawn(self, name, fn, *args, **kwargs):
+        """Runs fn in a green thread, as a timed stage, with the caller's app/request context."""
+        def run():
+            with self.stage(name):
+                return fn(*args, **kwargs)
+        return spawn(run)
+
+    def report(self):
+        wall = time.monotonic() - self.started
+        busy = sum(end - start for _, start, end in self.stages)
+        report = {
+            "wall": round(wall, 3),
+            "sequential": round(busy, 3),
+            "stages": [(name, round(end - start, 3)) for name, start, end in self.stages]
+        }
+        if global_config.config["TURN_TIMINGS"] and self.stages:
+            stages = ", ".join(f"{name} {duration:.2f}s" for name, duration in report["stages"])
+            print(f"[INFO] Turn timings ({self.label}): {stages} | wall {wall:.2f}s, stages sum {busy:.2f}s")
+        return report
+
+
+def spawn(fn, *args, **kwargs):
+    """eventlet.spawn keeping the request context (socket emits) or the app context (database)."""
+    if has_request_context():
+        fn = copy_current_request_context(fn)
+    elif has_app_context():
+        app = current_app._get_current_object()
+        inner = fn
+
+        def fn(*a, **kw):
+            with app.app_context():
+                return inner(*a, **kw)
+    return eventlet.spawn(fn, *args, **kwargs)
+
+
+class SpeculativeStream:
+    """
+    Holds the deltas of a speculative narration until it is confirmed.
+    confirm() flushes them to on_delta and forwards the next ones directly,
+    cancel() drops them.
+    """
+
+    def __init__(self, on_delta):
+        self._on_delta = on_delta
+        self._buffer = []
+        self.state = "pending"
+
+    def feed(self, delta):
+        if self.state == "confirmed":
+            self._on_delta(delta)
+        elif self.state == "pending":
+            self._buffer.append(delta)
+
+    def confirm(self):
+        self.state = "confirmed"
+        for delta in self._buffer:
+            self._on_delta(delta)
+        self._buffer = []
+
+    def cancel(self):
+        self.state = "cancelled"
+        self._buffer = []
@@ -0,0 +1,55 @@
+# Per-room presence registry.
+# Joins and leaves used to broadcast the whole active_users map (every room, every
+# user) to the room, so each change cost O(users) per recipient. Now a client gets
+# one snapshot of its own room when it connects, then small deltas:
+#   {"room", "version", "op": "add",    "sid", "user": {...}}
+#   {"room", "version", "op": "remove", "sid"}
+#   {"room", "version", "op": "update", "sid", "fields": {...}}
+# Every delta bumps the room version by one, and versions never go back, even when a
+# room empties; a client that sees a gap asks for a new snapshot ('presence_sync').
+
+# Fields of active_users that the other players need
+PUBLIC_FIELDS = ("user_id", "character_id", "username", "avatar_hash", "life_percentage")
+
+
+class PresenceRegistry:
+    def __init__(self):
+        self._rooms = {}        # room -> {sid: public fields}
+        # room -> last version. Kept when a room empties: a client still holding the
+        # old version must see a gap, not deltas that happen to continue it.
+        self._versions = {}
+
+    def _delta(self, room, op, sid, **payload):
+        version = self._versions[room] = self._versions.get(room, 0) + 1
+        return {"room": room, "version": version, "op": op, "sid": sid, **payload}
+
+    def snapshot(self, room):
+        return {"room": room, "version": self._versions.get(room, 0), "users": dict(self._rooms.get(room, {}))}
+
+    def join(self, room, sid, user_data):
+        user = {field: user_data.get(field) for field in PUBLIC_FIELDS}
+        self._rooms.setdefault(room, {})[sid] = user
+        return self._delta(room, "add", sid, user=user)
+
+    # Returns None if the sid was not in the room
+    def leave(self, room, sid):
+        users = self._rooms.get(room)
+        if not users or users.pop(sid, None) is None:
+            return None
+        if not users:
+            del self._rooms[room]
+        return self._delta(room, "remove", sid)
+
+    # Returns None if nothing changed
+    def update(self, room, sid, **fields):
+        user = self._rooms.get(room, {}).get(sid)
+        if user is None:
+            return None
+        changed = {k: v for k, v in fields.items() if k in PUBLIC_FIELDS and user.get(k) != v}
+        if not changed:
+            return None
+        user.update(changed)
+        return self._delta(room, "update", sid, fields=changed)
+
+
+presence = PresenceRegistry()
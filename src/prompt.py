@@ -0,0 +1,107 @@
+import json
+
+from . import global_config
+
+# Prompt assembly for the narrator.
+# Providers cache the longest prompt prefix they have already seen, so the messages
+# are ordered from the most stable to the most volatile:
+#   rules, alignment -> memory -> character sheet -> state -> retrieved world knowledge -> recent history
+# The character sheet is sent as compact JSON without the fields the model has no
+# use for (ids, avatar...), and the whole prompt is kept under PROMPT_TOKEN_BUDGET
+# by dropping the oldest history messages first.
+# Token counts use tiktoken when it is installed, ~4 characters per token otherwise.
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:   # not installed, or the encoding cannot be downloaded
+    _encoding = None
+
+# Character document fields never sent to the model
+HIDDEN_FIELDS = ("_id", "creator_id", "avatar_base64", "avatar_hash")
+# Per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD = 4
+
+
+def estimate_tokens(text):
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def message_tokens(messages):
+    return sum(estimate_tokens(m["content"]) + MESSAGE_OVERHEAD for m in messages)
+
+
+def compact_json(value):
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)   # ObjectId, datetime...
+
+
+def clean_character(character):
+    """The character sheet as the model needs it: no ids, no avatar."""
+    return {k: v for k, v in character.items() if k not in HIDDEN_FIELDS}
+
+
+class PromptBuilder:
+    """
+    Args:
+        static_messages: system messages identical for every turn and every player
+                         (rules, alignment...). They always come first.
+        budget: max prompt tokens (PROMPT_TOKEN_BUDGET by default)
+    """
+
+    def __init__(self, static_messages, budget=None):
+        self.static_messages = list(static_messages)
+        self.budget = budget or global_config.config["PROMPT_TOKEN_BUDGET"]
+        self.turns = 0
+        self.total_tokens = 0
+        self.last_report = None
+
+    def build(self, recent_history, context=(), memory=None, character=None, state=None, knowledge=(), label="turn"):
+        """
+        Returns the message list for a turn.
+
+        recent_history: the latest user/assistant messages, oldest first
+        context: extra system messages that rarely change, kept in the stable prefix
+        knowledge: system messages retrieved for this turn (world knowledge), after the state
+        """
+        prefix = self.static_messages + list(context)
+        volatile = []
+        if memory:
+            volatile.append({"role": "system", "content": f"Memory: {memory}"})
+        if character is not None:
+            volatile.append({"role": "system", "content": f"Sheet: {compact_json(clean_character(character))}"})
+        if state is not None:
+            volatile.append({"role": "system", "content": f"State: {compact_json(state)}"})
+        volatile.extend(knowledge)
+
+        history = list(recent_history)
+        prefix_tokens = message_tokens(prefix)
+        fixed_tokens = prefix_tokens + message_tokens(volatile)
+        history_tokens = [message_tokens([m]) for m in history]
+
+        # Oldest messages go first; the latest one (the player's input) always stays
+        dropped = 0
+        while len(history) > 1 and fixed_tokens + sum(history_tokens) > self.budget:
+            history.pop(0)
+            history_tokens.pop(0)
+            dropped += 1
+
+        total = fixed_tokens + sum(history_tokens)
+        self.turns += 1
+        self.total_tokens += total
+        self.last_report = {
+            "tokens": total,
+            "prefix_tokens": prefix_tokens,
+            "history_tokens": sum(history_tokens),
+            "dropped_messages": dropped,
+            "budget": self.budget
+        }
+        if global_config.config["PROMPT_REPORT"]:
+            over = " OVER BUDGET" if total > self.budget else ""
+            print(f"[INFO] Prompt ({label}): {total} tokens, {prefix_tokens} in the stable prefix, "
+                  f"{dropped} old messages dropped{over} (avg {self.total_tokens // self.turns}/turn)")
+
+        return prefix + volatile + history
@@ -0,0 +1,163 @@
+import time
+from collections import deque
+
+from . import global_config
+
+# Model routing for the LLM client.
+# The client used to walk the model list in order, waiting out every retry of a dead
+# model before trying the next one. The router keeps, per model and per call type
+# ("strict", "flavor", "summary", "parser"...), a rolling window of latencies and
+# outcomes, and per model a circuit breaker:
+#   closed     the model is used normally
+#   open       LLM_BREAKER_FAILURES failures in a row: skipped for LLM_BREAKER_COOLDOWN seconds
+#   half-open  after the cooldown one call goes through; success closes, failure reopens
+# order() puts the healthy models first, fastest (p50, weighted by the error rate)
+# first; a model without measurements ranks as the median measured one, so new models
+# get tried, and ties keep the order of the list.
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ModelStats:
+    def __init__(self, window):
+        self.latencies = deque(maxlen=window)   # seconds, successful calls only
+        self.outcomes = deque(maxlen=window)    # True = success
+
+    def record(self, latency, ok):
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(latency)
+
+    @property
+    def error_rate(self):
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def p50(self):
+        return percentile(self.latencies, 0.5)
+
+    def p95(self):
+        return percentile(self.latencies, 0.95)
+
+
+class CircuitBreaker:
+    def __init__(self, failures, cooldown):
+        self.max_failures = failures
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial_at = None    # start of the half-open call in flight
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return "open"
+        return "half-open"
+
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return True
+        # One trial at a time; a trial that never reported back expires after a cooldown
+        now = time.monotonic()
+        if state == "half-open" and (self._trial_at is None or now - self._trial_at > self.cooldown):
+            self._trial_at = now
+            return True
+        return False
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_at = None
+
+    def failure(self):
+        self.failures += 1
+        self._trial_at = None
+        if self.opened_at is not None or self.failures >= self.max_failures:
+            self.opened_at = time.monotonic()
+
+
+class ModelRouter:
+    def __init__(self, window=None, failures=None, cooldown=None):
+        self.window = window or global_config.config["LLM_LATENCY_WINDOW"]
+        self.failures = failures or global_config.config["LLM_BREAKER_FAILURES"]
+        self.cooldown = cooldown or global_config.config["LLM_BREAKER_COOLDOWN"]
+        self._stats = {}        # (call_type, model) -> ModelStats
+        self._breakers = {}     # model -> CircuitBreaker
+
+    def stats(self, model, call_type):
+        key = (call_type, model)
+        if key not in self._stats:
+            self._stats[key] = ModelStats(self.window)
+        return self._stats[key]
+
+    def breaker(self, model):
+        if model not in self._breakers:
+            self._breakers[model] = CircuitBreaker(self.failures, self.cooldown)
+        return self._breakers[model]
+
+    def record(self, model, call_type, latency, ok):
+        self.stats(model, call_type).record(latency, ok)
+        if ok:
+            self.breaker(model).success()
+        else:
+            breaker = self.breaker(model)
+            was_open = breaker.opened_at is not None
+            breaker.failure()
+            if breaker.opened_at is not None and not was_open:
+                print(f"[WARN] Circuit opened for {model} after {breaker.failures} failures")
+
+    def _score(self, model, call_type):
+        stats = self.stats(model, call_type)
+        p50 = stats.p50()
+        if p50 is None:
+            # Never answered: unknown, or last if it has only failed so far
+            return float("inf") if stats.outcomes else None
+        return p50 * (1 + 4 * stats.error_rate)
+
+    def order(self, models, call_type):
+        """Models to try for a call, best first. Models with an open circuit come last."""
+        position = {model: i for i, model in enumerate(models)}
+        measured = [self._score(m, call_type) for m in models]
+        known = sorted(s for s in measured if s is not None and s != float("inf"))
+        # Unmeasured models are ranked as if they were as fast as the median measured one
+        neutral = known[len(known) // 2] if known else 0.0
+
+        def key(model):
+            score = self._score(model, call_type)
+            return (self.breaker(model).state == "open", neutral if score is None else score, position[model])
+
+        return sorted(models, key=key)
+
+    def hedge_delay(self, model, partner, call_type):
+        """
+        Seconds before partner is asked the same question as model, None = never.
+        The p95 of model, or of partner if it is faster: a model that is always slow
+        is hedged as soon as a faster one would usually have answered. A partner that
+        was never measured is tried at the floor delay.
+        """
+        if not global_config.config["LLM_HEDGING"] or partner is None:
+            return None
+        floor = global_config.config["LLM_HEDGE_MIN_DELAY"]
+        own, theirs = self.stats(model, call_type).p95(), self.stats(partner, call_type).p95()
+        if theirs is None:
+            return floor
+        return max(floor, min(theirs, own if own is not None else theirs))
+
+    def report(self):
+        report = {}
+        for (call_type, model), stats in self._stats.items():
+            p50, p95 = stats.p50(), stats.p95()
+            report.setdefault(model, {"circuit": self.breaker(model).state})[call_type] = {
+                "calls": len(stats.outcomes),
+                "error_rate": round(stats.error_rate, 3),
+                "p50": None if p50 is None else round(p50, 3),
+                "p95": None if p95 is None else round(p95, 3)
+            }
+        return report
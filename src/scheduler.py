@@ -0,0 +1,154 @@
+import time
+
+import eventlet
+from eventlet.semaphore import Semaphore
+
+from . import global_config
+from .pipeline import spawn
+
+# Turn scheduler for party combat.
+# A room is a party, but every character used to fight its own copy of the encounter,
+# one model call (or more) per player per round. An encounter met while other players
+# are in the room now opens one PartyCombat for the room: the player who met it fights
+# first, the others join with their first message while the fight is open (players who
+# say nothing are never dragged in) and act last in the initiative order. Initiative is
+# rolled once for players and enemies, each player's message only registers their
+# action (parsed by their own request, in parallel), and the round is resolved in one
+# batch when every member has acted or PARTY_TURN_WINDOW seconds after the first
+# action. The round is narrated
+# by a single model call for the whole party, so the model cost of a round grows with
+# the number of unclear actions to parse, not with the party size.
+
+
+class PartyCombat:
+    """
+    Shared state of one room fight.
+
+    members: {character_id: GameSession} still fighting (fallen and escaped players leave)
+    roster: {character_id: GameSession} everyone who took part
+    order: initiative order, ("player", character_id) and ("enemy", index in enemies)
+    rng: random.Random of the fight (rolls of a round do not belong to one player)
+    """
+
+    def __init__(self, room, members, enemies, order, rng, location):
+        self.room = room
+        self.members = members
+        self.roster = dict(members)
+        self.enemies = enemies
+        self.order = order
+        self.rng = rng
+        self.location = location
+        self.round = 1
+        self.actions = {}           # character_id -> action of the current round
+        self.opened_at = None       # time of the first action of the round
+        self.finished = False
+        self._lock = Semaphore()    # one round resolved at a time
+
+    @property
+    def waiting(self):
+        """Character ids of the members that have not acted this round."""
+        return [cid for cid in self.members if cid not in self.actions]
+
+    def join(self, session):
+        """Adds a player who opted in: they act after everyone already in the order."""
+        self.members[session.character_id] = session
+        self.roster[session.character_id] = session
+        if ("player", session.character_id) not in self.order:
+            self.order.append(("player", session.character_id))
+        session.state["in_combat"] = True
+        session.state["combat_enemies"] = self.enemies
+
+    def remove(self, character_id):
+        """
+        Takes a member out of the fight (fallen, escaped, left the room). Its session no
+        longer fights, so it is saved out of combat, not with the party's enemies.
+        Returns the session, None if it was not a member.
+        """
+        session = self.members.pop(character_id, None)
+        if session is not None:
+            session.state["in_combat"] = False
+            session.state["combat_enemies"] = None
+        self.actions.pop(character_id, None)
+        return session
+
+    def names(self, character_ids):
+        return [self.members[cid].character["name"] for cid in character_ids if cid in self.members]
+
+
+class TurnScheduler:
+    """
+    PartyCombats by room.
+
+    Args:
+        resolve_round: callable(combat, actions, on_chunk) -> outputs; plays one round
+                       and sets combat.finished when the fight is over
+        window: seconds a round waits for the missing actions (PARTY_TURN_WINDOW)
+    """
+
+    def __init__(self, resolve_round, window=None):
+        self._resolve_round = resolve_round
+        self.window = window or global_config.config["PARTY_TURN_WINDOW"]
+        self._combats = {}
+        # callable(room, outputs): delivers a round closed by the window, outside any
+        # player's request (set by the socket layer)
+        self.on_round = None
+
+    def __len__(self):
+        return len(self._combats)
+
+    def active(self, room):
+        return self._combats.get(room)
+
+    def start(self, combat):
+        self._combats[combat.room] = combat
+
+    def submit(self, room, character_id, action, on_chunk=None):
+        """
+        Registers a member's action. Returns the outputs of the round if this action
+        completed it, None if the round is still waiting for other members.
+        """
+        combat = self._combats.get(room)
+        if combat is None or character_id not in combat.members:
+            return None
+        combat.actions[character_id] = action
+        if combat.opened_at is None:
+            combat.opened_at = time.monotonic()
+            spawn(self._expire, combat, combat.opened_at)
+        if combat.waiting:
+            return None
+        return self._close(combat, on_chunk)
+
+    def leave(self, room, character_id):
+        """A member left the room: the round may now be complete (outputs, or None)."""
+        combat = self._combats.get(room)
+        if combat is None or combat.remove(character_id) is None:
+            return None
+        if not combat.members:
+            self._combats.pop(room, None)
+            return None
+        if combat.actions and not combat.waiting:
+            return self._close(combat)
+        return None
+
+    # Closes the round opened at `opened_at` if it is still waiting after the window
+    def _expire(self, combat, opened_at):
+        eventlet.sleep(self.window)
+        if combat.finished or combat.opened_at != opened_at:
+            return
+        missing = ", ".join(combat.names(combat.waiting))
+        print(f"[INFO] Party round {combat.round} in {combat.room}: window expired, {missing} skipped")
+        outputs = self._close(combat)
+        if outputs and self.on_round:
+            self.on_round(combat.room, outputs)
+
+    def _close(self, combat, on_chunk=None):
+        with combat._lock:
+            if combat.finished or not combat.actions:
+                return None     # another closer got here first
+            actions, combat.actions = combat.actions, {}
+            combat.opened_at = None
+            outputs = self._resolve_round(combat, actions, on_chunk)
+            combat.round += 1
+            if combat.finished:
+                self._combats.pop(combat.room, None)
+            return outputs
@@ -5,23 +5,43 @@ from bson.objectid import ObjectId
 
 bp = Blueprint('selection', __name__, url_prefix='/selection')
 
+# Per-user character list for the selection page: only _id, name and avatar hash, the
+# images are fetched (and cached) by the browser from /avatars/<hash>.
+# Entries are dropped by creation.upload and delete_character, and also rebuilt if the
+# user's Characters array no longer matches (e.g. changed by another worker), since
+# g.user is reloaded at every request.
+_character_lists = {}
+
+def invalidate_character_list(user_id):
+    _character_lists.pop(str(user_id), None)
+
+def get_character_list(user):
+    character_ids = list(user.get("Characters", []))
+    cached = _character_lists.get(str(user["_id"]))
+    if cached and cached[0] == character_ids:
+        return cached[1]
+
+    # One $in query for every character instead of a find_one each
+    docs = current_app.db['Characters'].find({"_id": {"$in": character_ids}}, {"name": 1, "avatar_hash": 1})
+    by_id = {doc["_id"]: doc for doc in docs}
+    characters = [
+        {
+            "id": char_id,
+            "_id": str(char_id),
+            "name": by_id[char_id].get("name", ""),
+            "avatar_hash": by_id[char_id].get("avatar_hash")
+        }
+        for char_id in character_ids if char_id in by_id
+    ]
+    _character_lists[str(user["_id"])] = (character_ids, characters)
+    return characters
+
 @bp.route('/', methods=('GET', 'POST'))
 def selection():
     if g.user is None:
             return redirect(url_for('auth.login'))
 
-    characters_id = g.user["Characters"]
-
-    player_characters = []
-    for char_id in characters_id:
-        char_query = current_app.db['Characters'].find_one({"_id": char_id})
-        if char_query:
-            player_characters.append({
-                "id" : char_id,
-                "name": char_query["name"],
-                "_id": str(char_query["_id"]),
-                "avatar_base64": char_query["avatar_base64"]
-            })
+    player_characters = get_character_list(g.user)
     
     return render_template('character_selection/character_selection.html', characters=player_characters)
 
@@ -56,6 +76,7 @@ def delete_character():
             {"_id": g.user["_id"]},
             {"$pull": {"Characters": char_id}}
         )
+        invalidate_character_list(g.user["_id"])
         
         flash("Personaggio eliminato.", "info")
 
@@ -0,0 +1,241 @@
+import random
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+from . import global_config
+from .enemies import enemies_from_documents, enemies_to_documents
+
+# Per-session game state.
+# Before this module main_modular kept turn_count, recent_history, long_term_memory,
+# character and state as module globals, so every socket on the worker shared them.
+# Now each (room, character_id) pair gets its own GameSession, held in a bounded
+# in-memory store (LRU + idle TTL) and written back to MongoDB lazily (write-behind).
+
+DEFAULT_LOCATION = "Taverna Iniziale"
+DEFAULT_QUEST = "Nessuna"
+#! Make sure to change the start point, so you can get the places from the approved database
+DEFAULT_MEMORY = "The character is located in the Initial Tavern. No relevant events so far."
+
+
+def session_key(room, character_id):
+    return f"{room}:{character_id}"
+
+
+def stored_character(character):
+    """
+    The character as it is saved: without the transient keys the game keeps on it
+    during a fight ("_combat_target_idx", "_selected_skill"...). "_id" is kept.
+    """
+    return {k: v for k, v in character.items() if k == "_id" or not k.startswith("_")}
+
+
+class GameSession:
+    def __init__(self, room, character_id):
+        self.room = room
+        self.character_id = str(character_id)
+        self.turn_count = 0
+        self.recent_history = []
+        # Long-term memory (see memory.py): an epoch summary of everything older,
+        # then the summaries of the latest chunks of turns, oldest first
+        self.memory_epoch = DEFAULT_MEMORY
+        self.memory_chunks = []
+        # Messages not yet summarised, drained by the memory compactor
+        self.pending_events = []
+        self.compacting = False
+        self.character = None
+        self.state = {
+            "location": DEFAULT_LOCATION,
+            "quest": DEFAULT_QUEST,
+            "in_combat": False,
+            "combat_enemies": None
+        }
+        # Dice RNG of the session (see dice.py): seeded and saved, so fights can be replayed
+        self.rng_seed = random.getrandbits(32)
+        self.rng = random.Random(self.rng_seed)
+        self.last_seen = time.monotonic()
+        # Turns played since the last write to MongoDB
+        self.dirty_turns = 0
+
+    @property
+    def key(self):
+        return session_key(self.room, self.character_id)
+
+    @property
+    def long_term_memory(self):
+        return "\n".join([self.memory_epoch] + self.memory_chunks)
+
+    # Replacing the whole memory (e.g. the CLI summary) drops the chunk summaries
+    @long_term_memory.setter
+    def long_term_memory(self, value):
+        self.memory_epoch = value
+        self.memory_chunks = []
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
+    def add_message(self, role, content):
+        self.recent_history.append({"role": role, "content": content})
+        self.pending_events.append({"role": role, "content": content})
+        # Bounded too, in case compactions keep failing
+        pending_limit = global_config.config["MEMORY_MAX_PENDING_EVENTS"]
+        if len(self.pending_events) > pending_limit:
+            del self.pending_events[:-pending_limit]
+        # Keep the history bounded: the prompt only uses the tail anyway
+        limit = global_config.config["RECENT_HISTORY_LIMIT"]
+        if len(self.recent_history) > limit:
+            del self.recent_history[:-limit]
+
+    def mark_dirty(self):
+        self.dirty_turns += 1
+
+    # Serialises everything except the character (it has its own collection)
+    def to_document(self):
+        return {
+            "_id": self.key,
+            "room": self.room,
+            "character_id": self.character_id,
+            "turn_count": self.turn_count,
+            "recent_history": self.recent_history,
+            "long_term_memory": self.long_term_memory,
+            "memory_epoch": self.memory_epoch,
+            "memory_chunks": self.memory_chunks,
+            "pending_events": self.pending_events,
+            # Enemies are saved as {"template": name, ...} (see enemies.py)
+            "state": dict(self.state, combat_enemies=enemies_to_documents(self.state["combat_enemies"])),
+            "rng_seed": self.rng_seed,
+            "rng_state": _encode_rng_state(self.rng.getstate())
+        }
+
+    def load_document(self, doc):
+        self.turn_count = doc.get("turn_count", 0)
+        self.recent_history = doc.get("recent_history", [])
+        # Documents written before the memory compactor only have long_term_memory
+        self.memory_epoch = doc.get("memory_epoch", doc.get("long_term_memory", DEFAULT_MEMORY))
+        self.memory_chunks = doc.get("memory_chunks", [])
+        self.pending_events = doc.get("pending_events", [])
+        self.state.update(doc.get("state", {}))
+        self.state["combat_enemies"] = enemies_from_documents(self.state.get("combat_enemies"))
+        # Documents written before the session RNG keep the fresh seed
+        if "rng_seed" in doc:
+            self.rng_seed = doc["rng_seed"]
+            self.rng.seed(self.rng_seed)
+        if doc.get("rng_state"):
+            self.rng.setstate(_decode_rng_state(doc["rng_state"]))
+
+
+# random.Random state as BSON-friendly lists: (version, (625 ints), gauss_next)
+def _encode_rng_state(state):
+    version, internal, gauss_next = state
+    return [version, list(internal), gauss_next]
+
+
+def _decode_rng_state(doc):
+    version, internal, gauss_next = doc
+    return version, tuple(internal), gauss_next
+
+
+class SessionStore:
+    """
+    Bounded in-memory store of GameSession objects.
+
+    Args:
+        load_character: callable(character_id) -> dict or None
+        save_character: callable(character_dict) -> bool
+    """
+
+    def __init__(self, load_character, save_character, max_sessions=None, idle_ttl=None, flush_every=None):
+        self._sessions = OrderedDict()  # key -> GameSession, least recently used first
+        self._load_character = load_character
+        self._save_character = save_character
+        self.max_sessions = max_sessions or global_config.config["SESSION_MAX_ACTIVE"]
+        self.idle_ttl = idle_ttl or global_config.config["SESSION_IDLE_TTL"]
+        self.flush_every = flush_every or global_config.config["SESSION_FLUSH_EVERY"]
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, key):
+        return key in self._sessions
+
+    # Returns the live session, resuming it from MongoDB if it was evicted.
+    # Returns None if the character does not exist.
+    def get(self, room, character_id):
+        key = session_key(room, character_id)
+        self._expire_idle()
+
+        session = self._sessions.get(key)
+        if session is not None:
+            self._sessions.move_to_end(key)
+            session.touch()
+            return session
+
+        character = self._load_character(character_id)
+        if not character:
+            return None
+
+        session = GameSession(room, character_id)
+        session.character = character
+        session.character.setdefault("current_hp", character.get("max_hp", 50))
+
+        try:
+            doc = current_app.db['Sessions'].find_one({"_id": key})
+            if doc:
+                session.load_document(doc)
+        except Exception as e:
+            print(f"[ERROR] Could not resume session {key}: {e}")
+
+        self._sessions[key] = session
+        self._evict_overflow()
+        return session
+
+    def in_room(self, room):
+        """Live sessions of a room (its connected players)."""
+        return [s for s in self._sessions.values() if s.room == room]
+
+    # Called after every turn: writes back only every `flush_every` turns
+    def commit(self, session):
+        session.mark_dirty()
+        if session.dirty_turns >= self.flush_every:
+            self.flush(session)
+
+    def flush(self, session):
+        if session.dirty_turns == 0:
+            return True
+        try:
+            current_app.db['Sessions'].replace_one(
+                {"_id": session.key}, session.to_document(), upsert=True
+            )
+            if session.character is not None:
+                self._save_character(stored_character(session.character))
+            session.dirty_turns = 0
+            return True
+        except Exception as e:
+            print(f"[ERROR] Failed to flush session {session.key}: {e}")
+            return False
+
+    # Flushes and forgets a session (e.g. when the player disconnects)
+    def release(self, room, character_id):
+        session = self._sessions.pop(session_key(room, character_id), None)
+        if session is not None:
+            self.flush(session)
+
+    def flush_all(self):
+        for session in list(self._sessions.values()):
+            self.flush(session)
+
+    def _evict_overflow(self):
+        while len(self._sessions) > self.max_sessions:
+            _, session = self._sessions.popitem(last=False)
+            self.flush(session)
+
+    # The OrderedDict is kept in access order, so idle sessions are at the front
+    def _expire_idle(self):
+        now = time.monotonic()
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_seen < self.idle_ttl:
+                break
+            self._sessions.popitem(last=False)
+            self.flush(session)
@@ -0,0 +1,111 @@
+from collections.abc import Mapping
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Persistent TF-IDF index over a catalog (Items, Skills, Classes).
+# brain.find_most_similar_item refits a TfidfVectorizer on the whole corpus at every
+# call; here the vectorizer is fitted once and the document vectors are kept, so a
+# query only has to transform the query text.
+# Depends on: scikit-learn
+
+
+# Same document text as find_most_similar_item: the name twice gives it more weight
+def document_text(doc):
+    return f"{doc['name']} {doc['name']} {doc.get('description', '')}"
+
+
+class SimilarityIndex:
+    def __init__(self, documents):
+        self.documents = list(documents)
+        self._rows = {doc["name"].lower(): i for i, doc in enumerate(self.documents)}
+        self._vectorizer = None
+        self._matrix = None
+
+        if self.documents:
+            vectorizer = TfidfVectorizer(stop_words='english')
+            try:
+                # Rows are L2-normalised, so the cosine similarity is a dot product
+                self._matrix = vectorizer.fit_transform([document_text(d) for d in self.documents])
+                self._vectorizer = vectorizer
+            except ValueError:
+                # Empty vocabulary (only stop words): every score will be 0
+                pass
+
+    def __len__(self):
+        return len(self.documents)
+
+    # Rows of the candidates (documents or names) that are in the index
+    def _candidate_rows(self, candidates):
+        if candidates is None:
+            return list(range(len(self.documents)))
+        rows = []
+        for candidate in candidates:
+            name = candidate["name"] if isinstance(candidate, Mapping) else candidate
+            row = self._rows.get(name.lower())
+            if row is not None:
+                rows.append(row)
+        return rows
+
+    # scores[i][j] = similarity between texts[i] and documents[rows[j]]
+    def _scores(self, texts, rows):
+        if self._vectorizer is None or not rows:
+            return np.zeros((len(texts), len(rows)))
+        queries = self._vectorizer.transform(texts)
+        return (queries @ self._matrix[rows].T).toarray()
+
+    def query(self, text, candidates=None):
+        """
+        Most similar document to `text`, optionally restricted to a subset of the
+        catalog (documents or names). Returns (document, score) or (None, 0.0).
+        """
+        rows = self._candidate_rows(candidates)
+        if not rows:
+            return None, 0.0
+        scores = self._scores([text], rows)[0]
+        best = int(scores.argmax())
+        return self.documents[rows[best]], float(scores[best])
+
+    def top_k(self, texts, k=5, candidates=None):
+        """
+        Batched query: for every text, the k most similar documents as a list of
+        (document, score), best first.
+        """
+        rows = self._candidate_rows(candidates)
+        if not rows:
+            return [[] for _ in texts]
+
+        k = min(k, len(rows))
+        scores = self._scores(list(texts), rows)
+        results = []
+        for row_scores in scores:
+            # argpartition finds the top k in O(n), then only those k get sorted
+            best = np.argpartition(-row_scores, k - 1)[:k]
+            best = best[np.argsort(-row_scores[best], kind="stable")]
+            results.append([(self.documents[rows[j]], float(row_scores[j])) for j in best])
+        return results
+
+
+class IndexRegistry:
+    """
+    One SimilarityIndex per catalog, fitted on first use and kept until invalidated.
+
+    Args:
+        loader: callable(catalog_name) -> list of documents
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._indexes = {}
+
+    def get(self, name):
+        if name not in self._indexes:
+            self._indexes[name] = SimilarityIndex(self._loader(name))
+        return self._indexes[name]
+
+    # Call when a catalog changes; without a name every index is dropped
+    def invalidate(self, name=None):
+        if name is None:
+            self._indexes.clear()
+        else:
+            self._indexes.pop(name, None)
@@ -0,0 +1,161 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+from .effects import compile_attacks, compile_effects
+
+# Headless combat simulator for balance analysis.
+# Plays the rules of combat_loop_modular (brain.py) for a whole batch of fights at once:
+# every fight is a row of NumPy arrays and a round is a handful of vector operations, so
+# a million fights of a matchup take about as long as a few turns of the live game.
+#
+# Rules mirrored (player first, then every enemy, like the live loop):
+#   weapon attack  d20 + STR (DEX for ranged) modifier >= 10 + target DEX modifier,
+#                  damage = weapon damage dice (no stat bonus)
+#   skill          magic/buff/debuff always hit if the mana is there, damage = damage dice
+#                  + INT (magic) or STR (attack) modifier; "attack" skills go through the
+#                  physical hit check without a weapon, so they always miss (as in the game)
+#   enemy attack   random attack, physical hit check against the player's DEX,
+#                  damage = first effect dice + STR (DEX for ranged) modifier
+# The player targets the first living enemy and falls back to the weapon when a skill
+# costs more mana than is left. Players are the class presets of json_exp/archetypes.json.
+
+JSON_PATH = Path(__file__).resolve().parent / "json_exp"
+MAX_ROUNDS = 100
+
+
+def roll(rng, dice, size):
+    """Vector of `size` rolls of a compiled dice expression (0 for None)."""
+    if dice is None:
+        return np.zeros(size, dtype=np.int32)
+    return dice.roll_many(size, rng).astype(np.int32)
+
+
+def modifier(stat):
+    return (stat - 10) // 2
+
+
+def load_catalog(source="json", db=None):
+    """Skills, items and enemies by name, from json_exp/*.json or from a MongoDB database."""
+    catalog = {}
+    for collection, filename in (("Skills", "skill.json"), ("Items", "item.json"), ("Enemies", "enemies.json")):
+        if source == "mongo":
+            docs = list(db[collection].find({}, {"_id": 0}))
+        else:
+            docs = json.loads((JSON_PATH / filename).read_text(encoding="utf-8"))
+        catalog[collection] = {doc["name"]: doc for doc in docs}
+    return catalog
+
+
+class Simulator:
+    def __init__(self, catalog, seed=None):
+        self.skills = catalog["Skills"]
+        self.items = catalog["Items"]
+        self.enemies = catalog["Enemies"]
+        self.rng = np.random.default_rng(seed)
+
+    # One player build with one action policy against `count` copies of an enemy
+    def run(self, player, enemy_name, fights=100000, skill=None, count=1):
+        rng = self.rng
+        enemy = self.enemies[enemy_name]
+        weapon = self.items.get(player["weapon"], {})
+        weapon_dice = [e.dice for e in compile_effects(weapon).damage]
+        weapon_stat = player["stats"]["DEX" if weapon.get("subType") == "ranged" else "STR"]
+
+        skill_doc = self.skills.get(skill) if skill else None
+        if skill_doc:
+            skill_effects = compile_effects(skill_doc)
+            skill_dice = [e.dice for e in skill_effects.damage]
+            skill_cost = skill_effects.mana_cost
+            skill_scaling = {"attack": modifier(player["stats"]["STR"]),
+                             "magic": modifier(player["stats"]["INT"])}.get(skill_doc["type"], 0)
+            skill_hits = skill_doc["type"] in ("magic", "buff", "debuff")
+
+        hp_range = enemy["max_hp"]
+        enemy_hp = (rng.integers(hp_range["min"], hp_range["max"] + 1, size=(fights, count), dtype=np.int32)
+                    if isinstance(hp_range, dict) else np.full((fights, count), hp_range, dtype=np.int32))
+        player_hp = np.full(fights, player["max_hp"], dtype=np.int32)
+        mana = np.full(fights, player["mana"], dtype=np.int32)
+        player_defense = 10 + modifier(player["stats"]["DEX"])
+        enemy_defense = 10 + modifier(enemy["stats"]["DEX"])
+        attacks = [(attack.damage[0].dice if attack.damage else None,
+                    modifier(enemy["stats"]["DEX" if attack.sub_type == "ranged" else "STR"]))
+                   for attack in compile_attacks(enemy)]
+
+        rounds = np.zeros(fights, dtype=np.int32)
+        active = np.ones(fights, dtype=bool)
+        hits = []           # damage of every successful player hit
+        taken = np.zeros(fights, dtype=np.int32)
+        index = np.arange(fights)
+
+        for round_number in range(1, MAX_ROUNDS + 1):
+            live = np.flatnonzero(active)
+            if live.size == 0:
+                break
+            n = live.size
+            rounds[live] = round_number
+
+            # Player: skill if affordable, weapon otherwise
+            damage = np.zeros(n, dtype=np.int32)
+            hit = np.zeros(n, dtype=bool)
+            casting = np.zeros(n, dtype=bool)
+            if skill_doc:
+                casting = mana[live] >= skill_cost
+                if skill_hits:
+                    mana[live[casting]] -= skill_cost
+                    skill_damage = sum((roll(rng, d, n) for d in skill_dice), np.zeros(n, dtype=np.int32))
+                    skill_damage = np.maximum(0, skill_damage + skill_scaling)
+                    hit |= casting
+                    damage = np.where(casting, skill_damage, damage)
+            swinging = ~casting
+            weapon_hit = rng.integers(1, 21, size=n) + modifier(weapon_stat) >= enemy_defense
+            weapon_damage = sum((roll(rng, d, n) for d in weapon_dice), np.zeros(n, dtype=np.int32))
+            hit |= swinging & weapon_hit
+            damage = np.where(swinging & weapon_hit, weapon_damage, damage)
+            if skill_doc and not skill_hits:
+                hit &= swinging     # "attack" skills never hit without a weapon
+                damage = np.where(casting, 0, damage)
+            hits.append(damage[hit])
+
+            # Damage goes to the first living enemy
+            alive = enemy_hp[live] > 0
+            target = alive.argmax(axis=1)
+            enemy_hp[live, target] = np.maximum(0, enemy_hp[live, target] - damage)
+
+            # Enemies still standing attack
+            alive = enemy_hp[live] > 0
+            if attacks:
+                choice = rng.integers(0, len(attacks), size=(n, count))
+                attack_damage = np.zeros((n, count), dtype=np.int32)
+                for i, (dice, bonus) in enumerate(attacks):
+                    rolled = np.maximum(0, roll(rng, dice, n * count).reshape(n, count) + bonus)
+                    attack_damage = np.where(choice == i, rolled, attack_damage)
+                enemy_stat = np.array([bonus for _, bonus in attacks])[choice]
+                landed = alive & (rng.integers(1, 21, size=(n, count)) + enemy_stat >= player_defense)
+                total = np.where(landed, attack_damage, 0).sum(axis=1).astype(np.int32)
+                taken[live] += np.minimum(total, player_hp[live])
+                player_hp[live] = np.maximum(0, player_hp[live] - total)
+
+            won = ~alive.any(axis=1)
+            lost = player_hp[live] <= 0
+            active[live[won | lost]] = False
+
+        won = (enemy_hp <= 0).all(axis=1) & (player_hp > 0)
+        lost = player_hp <= 0
+        hits = np.concatenate(hits) if hits else np.zeros(0, dtype=np.int32)
+        win_rounds = rounds[index[won]]
+        return {
+            "fights": fights,
+            "win_rate": float(won.mean()),
+            "loss_rate": float(lost.mean()),
+            "timeout_rate": float((~won & ~lost).mean()),
+            "rounds_to_kill": {p: int(np.percentile(win_rounds, q)) if win_rounds.size else None
+                               for p, q in (("p10", 10), ("p50", 50), ("p90", 90))},
+            "damage_taken_mean": float(taken.mean()),
+            "hit_damage_histogram": np.bincount(hits).tolist() if hits.size else []
+        }
+
+
+def load_archetypes():
+    return json.loads((JSON_PATH / "archetypes.json").read_text(encoding="utf-8"))
@@ -0,0 +1,81 @@
+import json
+import re
+
+# Helpers for streaming narration to the clients while the model is still writing.
+
+_NARRATION_KEY = re.compile(r'"narration"\s*:\s*"')
+_SIMPLE_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class NarrationExtractor:
+    """
+    Pulls the value of the "narration" field out of a JSON object that arrives in pieces.
+
+    feed() returns the narration text decoded so far from the new chunk (possibly ""),
+    so the player can read the scene before the rest of the object (found_items,
+    location, ...) has been generated. The full output is still parsed with
+    extract_json once the stream ends.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._in_string = False
+        self.done = False
+
+    def feed(self, chunk):
+        if self.done:
+            return ""
+        self._buffer += chunk
+
+        if not self._in_string:
+            match = _NARRATION_KEY.search(self._buffer)
+            if not match:
+                return ""
+            self._buffer = self._buffer[match.end():]
+            self._in_string = True
+
+        return self._decode()
+
+    # Decodes as much of the JSON string as possible, keeping an incomplete
+    # escape sequence (e.g. a lone backslash at the end of a chunk) for later
+    def _decode(self):
+        out = []
+        i = 0
+        buf = self._buffer
+        while i < len(buf):
+            ch = buf[i]
+            if ch == '"':
+                self.done = True
+                i += 1
+                break
+            if ch != '\\':
+                out.append(ch)
+                i += 1
+                continue
+
+            if i + 1 >= len(buf):
+                break
+            code = buf[i + 1]
+            if code == 'u':
+                if i + 6 > len(buf):
+                    break
+                # Surrogate pairs (emoji...) come as two escapes: wait for both
+                size = 6
+                try:
+                    if 0xD800 <= int(buf[i + 2:i + 6], 16) <= 0xDBFF:
+                        size = 12
+                except ValueError:
+                    pass
+                if i + size > len(buf):
+                    break
+                try:
+                    out.append(json.loads(f'"{buf[i:i + size]}"'))
+                except ValueError:
+                    pass
+                i += size
+            else:
+                out.append(_SIMPLE_ESCAPES.get(code, code))
+                i += 2
+
+        self._buffer = buf[i:]
+        return "".join(out)
@@ -0,0 +1,30 @@
+import os
+import random
+
+import pytest
+
+# src.brain builds its LLM client at import time: it only needs a key, never a real one
+os.environ.setdefault("OPENROUTER_API_KEY", "test")
+
+
+def make_character(name, hp=40):
+    return {
+        "name": name, "current_hp": hp, "max_hp": hp, "mana": 10, "level": 1, "xp": 0, "gold": 0,
+        "stats": {"STR": 14, "DEX": 12, "CON": 10, "INT": 10, "WIS": 10, "CHA": 10},
+        "skills": [], "inventory": [], "equipped_weapon": "Short Sword", "ac": 12,
+    }
+
+
+def make_enemy_doc(name="Goblin", hp=8, **extra):
+    doc = {
+        "name": name, "max_hp": hp, "ac": 10, "level": 1, "cr": 1,
+        "stats": {"STR": 10, "DEX": 10, "CON": 10, "INT": 10, "WIS": 10, "CHA": 10},
+        "attacks": [{"name": "Stab", "effects": [{"kind": "damage", "value": "1d4"}]}],
+    }
+    doc.update(extra)
+    return doc
+
+
+@pytest.fixture
+def rng():
+    return random.Random(1234)
@@ -0,0 +1,52 @@
+import pytest
+
+from src import cache as cache_module
+from src import global_config
+from src.cache import ResponseCache, response_cache
+
+PROMPT = [{"role": "user", "content": "Attack  the GOBLIN"}]
+
+
+def test_fingerprint_ignores_case_and_whitespace():
+    same = [{"role": "user", "content": "attack the goblin "}]
+    assert ResponseCache.fingerprint(PROMPT, max_tokens=10) == ResponseCache.fingerprint(same, max_tokens=10)
+    assert ResponseCache.fingerprint(PROMPT, max_tokens=10) != ResponseCache.fingerprint(PROMPT, max_tokens=20)
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = ResponseCache("test", max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("1", "3")
+
+
+def test_expired_entries_are_misses(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    cache = ResponseCache("test", ttl=10)
+    cache.put("a", "1")
+
+    assert cache.get("a") == "1"
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_persisted_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "responses.sqlite")
+    ResponseCache("parser", path=path).put("a", "1")
+
+    assert ResponseCache("parser", path=path).get("a") == "1"
+    assert ResponseCache("flavor", path=path).get("a") is None
+
+
+def test_disabled_site_has_no_cache(monkeypatch):
+    monkeypatch.setattr(cache_module, "_caches", {})
+    monkeypatch.setitem(global_config.config, "RESPONSE_CACHES", {"parser": {"enabled": True}, "flavor": {}})
+
+    assert isinstance(response_cache("parser"), ResponseCache)
+    assert response_cache("flavor") is None
@@ -0,0 +1,89 @@
+import mongomock
+import pytest
+from flask import Flask
+
+from src.catalog import Catalog
+
+
+class FlakyCollection:
+    """A collection whose next `failures` reads raise, like a dropped connection."""
+
+    def __init__(self, collection, failures):
+        self._collection = collection
+        self.failures = failures
+
+    def find(self, *args, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("connection reset")
+        return self._collection.find(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+
+class FlakyDatabase(dict):
+    def __init__(self, db):
+        super().__init__()
+        self._db = db
+
+    def __missing__(self, name):
+        return self._db[name]
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.db = FlakyDatabase(mongomock.MongoClient().db)
+    app.db._db.Items.insert_many([
+        {"name": "Health Potion", "name_lc": "health potion", "effects": [{"kind": "heal", "value": "2d4"}]},
+        {"name": "Rope", "name_lc": "rope"},
+    ])
+    with app.app_context():
+        yield app
+
+
+def test_a_failed_load_is_retried_on_the_next_access(app):
+    app.db["Items"] = FlakyCollection(app.db._db.Items, failures=2)   # the load and the read-through
+    catalog = Catalog()
+    reloads = []
+    catalog.on_change(reloads.append)
+
+    assert catalog.get("Items", "Rope") is None
+    assert reloads == [] and catalog.epoch == 0
+
+    assert catalog.get("Items", "rope")["name"] == "Rope"
+    assert reloads == ["Items"]
+    assert len(catalog.all("Items")) == 2
+
+
+def test_invalidate_reloads_on_next_access(app):
+    catalog = Catalog()
+    assert catalog.names("Items") == ["Health Potion", "Rope"]
+    app.db._db.Items.insert_one({"name": "Torch", "name_lc": "torch"})
+
+    catalog.invalidate("Items")
+    assert catalog.contains("Items", "TORCH")
+
+
+def test_lookups_share_one_read_only_document(app):
+    catalog = Catalog()
+    potion = catalog.get("Items", "health potion")
+
+    assert catalog.get("Items", "Health Potion") is potion
+    assert catalog.get_many("Items", ["HEALTH POTION"])["HEALTH POTION"] is potion
+    with pytest.raises(TypeError):
+        potion["uses"] = 3
+    assert potion["effects"][0]["kind"] == "heal"
+    assert isinstance(potion["effects"], tuple)
+
+
+def test_read_through_documents_are_frozen(app):
+    catalog = Catalog()
+    catalog.all("Items")
+    app.db._db.Items.insert_one({"name": "Torch", "name_lc": "torch", "tags": ["light"]})
+
+    torch = catalog.get("Items", "Torch")
+    assert torch["tags"] == ("light",)
+    with pytest.raises(TypeError):
+        torch["name"] = "Lamp"
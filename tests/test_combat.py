@@ -0,0 +1,47 @@
+import pytest
+
+from src.intent import Intent
+
+from .conftest import make_character
+
+
+@pytest.fixture
+def brain():
+    from src import brain
+    return brain
+
+
+def test_adopt_copies_back_only_the_round_fields(brain):
+    player = make_character("Ayla")
+    speculative = dict(player, current_hp=31, _combat_target_idx=1)
+    player["_selected_skill"] = "Fire Bolt"     # set by the parser while the round was rolled
+
+    brain._adopt(player, speculative)
+
+    assert player["current_hp"] == 31
+    assert player["_combat_target_idx"] == 1
+    assert player["_selected_skill"] == "Fire Bolt"
+
+
+def test_adopt_drops_a_field_the_round_removed(brain):
+    player = dict(make_character("Ayla"), _combat_target_idx=2)
+    speculative = make_character("Ayla")
+
+    brain._adopt(player, speculative)
+
+    assert "_combat_target_idx" not in player
+
+
+def test_parser_reuses_the_callers_loadout_and_intent(monkeypatch, brain):
+    def fail(*args, **kwargs):
+        raise AssertionError("loadout or intent computed twice")
+
+    monkeypatch.setattr(brain, "combat_loadout", fail)
+    monkeypatch.setattr(brain, "engine_for", fail)
+    player = make_character("Ayla")
+
+    action = brain.get_action_from_ai("fire bolt", player, 1, loadout=([], []),
+                                      intent=Intent("use skill", "Fire Bolt", confidence=1.0))
+
+    assert action == "use skill"
+    assert player["_selected_skill"] == "Fire Bolt"
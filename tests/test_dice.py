@@ -0,0 +1,65 @@
+import random
+
+import numpy as np
+import pytest
+
+from src import dice
+from src.dice import DiceError, compile_dice
+
+
+@pytest.mark.parametrize("expr, minimum, maximum", [
+    ("d20", 1, 20),
+    ("2d6+3", 5, 15),
+    ("4d6kh3", 3, 18),
+    ("4d6kl1", 1, 6),
+    ("1d8+1d6-1", 1, 13),
+    ("5", 5, 5),
+])
+def test_bounds(expr, minimum, maximum, rng):
+    compiled = compile_dice(expr)
+    assert (compiled.minimum, compiled.maximum) == (minimum, maximum)
+    totals = [compiled.roll(rng)[0] for _ in range(2000)]
+    assert min(totals) >= minimum and max(totals) <= maximum
+    many = compiled.roll_many(2000, np.random.default_rng(0))
+    assert many.min() >= minimum and many.max() <= maximum
+
+
+@pytest.mark.parametrize("expr", ["", "d", "2d0", "4d6kh5", "2d6+", "1d6 x", "abc"])
+def test_invalid_expressions(expr):
+    with pytest.raises(DiceError):
+        compile_dice(expr)
+
+
+def test_keep_highest_returns_the_kept_dice(rng):
+    total, kept = compile_dice("4d6kh3").roll(rng)
+    assert len(kept) == 3 and total == sum(kept)
+
+
+def test_compiled_once():
+    assert compile_dice("2d6+3") is compile_dice("2d6+3")
+    assert compile_dice(" 2D6 + 3 ").text == "2d6+3"
+
+
+def test_same_seed_same_rolls():
+    explicit = random.Random(42)
+    first = [dice.roll("3d6+1", explicit) for _ in range(20)]
+    with dice.use_rng(random.Random(42)):
+        second = [dice.roll("3d6+1") for _ in range(20)]
+    assert first == second
+
+
+def test_use_rng_scopes_the_turn_rng():
+    outer = dice.rng()
+    session_rng = random.Random(5)
+    with dice.use_rng(session_rng):
+        assert dice.rng() is session_rng
+        rolls = [dice.roll("d20")[0] for _ in range(10)]
+    assert dice.rng() is outer
+
+    replay = random.Random(5)
+    assert rolls == [compile_dice("d20").roll(replay)[0] for _ in range(10)]
+
+
+def test_rolls_are_uniform(rng):
+    counts = np.bincount([compile_dice("d6").roll(rng)[0] for _ in range(60000)], minlength=7)[1:]
+    assert np.all(np.abs(counts / 60000 - 1 / 6) < 0.01)
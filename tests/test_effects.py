@@ -0,0 +1,63 @@
+import random
+
+from src import dice
+from src.effects import EffectPipeline, PipelineCache, compile_attacks, compile_effects
+
+FIREBALL = {
+    "name": "Fireball", "type": "magic",
+    "effects": [
+        {"kind": "damage", "value": "8d6", "element": "fire", "mana_cost": 3},
+        {"kind": "debuff", "value": "1", "duration": "1d4", "mana_cost": 2},
+        {"kind": "damage", "value": "2"},
+        {"kind": "teleport"},
+    ],
+}
+
+
+def test_pipeline_splits_effects_by_kind():
+    pipeline = compile_effects(FIREBALL)
+    assert pipeline.mana_cost == 5
+    assert pipeline.element == "fire"
+    assert [e.dice.text for e in pipeline.damage] == ["8d6", "2"]
+    assert len(pipeline.debuff) == 1 and len(pipeline.other) == 1
+    assert pipeline.sub_type == "melee"
+
+
+def test_roll_sums_the_damage_dice():
+    pipeline = compile_effects(FIREBALL)
+    with dice.use_rng(random.Random(3)):
+        total, rolls = EffectPipeline.roll(pipeline.damage)
+    assert len(rolls) == 8 and total == sum(rolls) + 2
+    assert 1 <= EffectPipeline.duration(pipeline.debuff) <= 4
+    assert EffectPipeline.duration(pipeline.damage) == 0
+
+
+def test_a_value_that_is_not_dice_counts_as_zero():
+    pipeline = compile_effects({"effects": [{"kind": "heal", "value": "a lot"}]})
+    assert EffectPipeline.roll(pipeline.heal) == (0, [])
+
+
+def test_attacks_are_compiled_by_index():
+    attacks = compile_attacks({"attacks": [{"name": "Bite", "effects": [{"kind": "damage", "value": "1d6"}]},
+                                           {"name": "Shot", "subType": "ranged", "effects": []}]})
+    assert [a.name for a in attacks] == ["Bite", "Shot"]
+    assert attacks[1].sub_type == "ranged" and attacks[1].damage == ()
+
+
+def test_cache_compiles_once_per_name_and_invalidates_by_source():
+    cache = PipelineCache()
+    first = cache.get("Skills", FIREBALL)
+    assert cache.get("Skills", dict(FIREBALL, name=" fireball ")) is first
+    assert cache.get("Items", FIREBALL) is not first
+
+    cache.invalidate("Items")
+    assert cache.get("Skills", FIREBALL) is first
+    cache.invalidate("Skills")
+    assert cache.get("Skills", FIREBALL) is not first
+    assert len(cache) == 1
+
+
+def test_nameless_documents_are_not_cached():
+    cache = PipelineCache()
+    cache.get("Skills", {"effects": []})
+    assert len(cache) == 0
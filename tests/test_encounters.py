@@ -0,0 +1,76 @@
+from collections import Counter
+
+import pytest
+
+from src.encounters import AliasTable, EncounterIndex, biome_of
+from src.enemies import EnemyTemplate
+
+from .conftest import make_enemy_doc
+
+
+def test_alias_table_follows_the_weights(rng):
+    table = AliasTable("abcd", [1, 2, 3, 4])
+    counts = Counter(table.sample(rng) for _ in range(100000))
+    for item, weight in zip("abcd", [1, 2, 3, 4]):
+        assert counts[item] / 100000 == pytest.approx(weight / 10, abs=0.01)
+
+
+def test_alias_table_with_one_item(rng):
+    assert AliasTable(["only"], [3]).sample(rng) == "only"
+
+
+@pytest.mark.parametrize("location, biome", [
+    ("Dark Forest", "forest"),
+    ("The Old Mines", "cave"),
+    ("Città di Pietra", "town"),
+    ("Sotto terra, nel buio", "cave"),
+    ("Ruined towers on the hills", "mountain"),     # the first biome in BIOME_KEYWORDS wins
+    ("A determined bishop", "wilderness"),          # "mine", "shop": substrings, not words
+    ("The season turns", "wilderness"),
+    ("Workshop", "wilderness"),
+    ("", "wilderness"),
+])
+def test_biome_of_matches_whole_words(location, biome):
+    assert biome_of(location) == biome
+
+
+@pytest.fixture
+def index():
+    templates = [
+        EnemyTemplate(make_enemy_doc("Rat", level=1, cr=1, biomes=["cave", "town"])),
+        EnemyTemplate(make_enemy_doc("Wolf", level=2, cr=2, biomes=["forest"])),
+        EnemyTemplate(make_enemy_doc("Bear", level=4, cr=4, biomes=["forest"], weight=3)),
+        EnemyTemplate(make_enemy_doc("Ghost", level=1, cr=1, weight=0)),
+        EnemyTemplate(make_enemy_doc("Dragon", level=10, cr=10)),
+    ]
+    return EncounterIndex(loader=lambda: templates)
+
+
+def names(table):
+    return sorted(t.name for t in table.items)
+
+
+def test_tables_by_biome_and_band(index):
+    assert names(index.table("Dark Forest", 1)) == ["Wolf"]      # empty band: the weakest of the biome
+    assert names(index.table("Dark Forest", 4)) == ["Bear", "Wolf"]
+    assert names(index.table("Old Mine", 3)) == ["Rat"]
+    assert names(index.table("Old Mine", 50)) == ["Dragon", "Rat"]   # capped at ENCOUNTER_MAX_LEVEL
+
+
+def test_zero_weight_never_spawns(index, rng):
+    assert all(index.single("Plains road", 10, rng).name != "Ghost" for _ in range(500))
+
+
+def test_groups_stay_within_the_budget(index, rng):
+    for _ in range(200):
+        group = index.group("Dark Forest", 6, max_size=3, rng=rng)
+        assert 1 <= len(group) <= 3
+        assert sum(t.cr for t in group) <= 6 or len(group) == 1
+
+
+def test_invalidate_rebuilds_from_the_loader(index):
+    index.table("forest", 1)
+    index.invalidate("Items")
+    assert index._tables is not None
+    index.invalidate("Enemies")
+    assert index._tables is None
@@ -0,0 +1,86 @@
+import copy
+
+import pytest
+
+from src.enemies import EnemyInstance, EnemyTemplate, TemplateRegistry, enemies_to_documents
+
+from .conftest import make_enemy_doc
+
+
+@pytest.fixture
+def template():
+    return EnemyTemplate(make_enemy_doc("Goblin", hp={"min": 5, "max": 9}, skills=["Sneak"]))
+
+
+def test_instances_read_through_the_template(template, rng):
+    goblin = template.spawn(rng)
+    assert 5 <= goblin["current_hp"] == goblin["max_hp"] <= 9
+    assert goblin["name"] == "Goblin" and goblin.get("missing", 1) == 1
+    assert "stats" in goblin and "current_hp" in goblin
+    assert set(goblin) >= {"name", "stats", "current_hp", "status"}
+
+
+def test_writes_stay_on_the_instance(template, rng):
+    first, second = template.spawn(rng), template.spawn(rng)
+    first["current_hp"] = 0
+    first["ac"] = 99
+    first["status"] = ({"name": "poisoned"},)
+
+    assert second["ac"] == 10 and second["status"] == ()
+    assert template.doc["ac"] == 10
+    assert first["ac"] == 99
+
+
+def test_the_template_is_read_only(template, rng):
+    goblin = template.spawn(rng)
+    with pytest.raises(TypeError):
+        goblin["stats"]["STR"] = 99
+    with pytest.raises(AttributeError):
+        goblin["skills"].append("Fireball")
+
+
+def test_deepcopy_shares_only_the_template(template, rng):
+    goblin = template.spawn(rng)
+    goblin["loot"] = ["Rope"]
+    clone = copy.deepcopy(goblin)
+    clone["current_hp"] = 1
+    clone["loot"].append("Gold")
+
+    assert clone.template is goblin.template
+    assert goblin["current_hp"] != 1 and goblin["loot"] == ["Rope"]
+
+    goblin.adopt(clone)
+    assert goblin["current_hp"] == 1 and goblin["loot"] == ["Rope", "Gold"]
+
+
+def test_documents_round_trip(template, rng):
+    registry = TemplateRegistry()
+    registry.load([make_enemy_doc("Goblin")])
+    goblin = registry.get("Goblin").spawn(rng)
+    goblin["current_hp"] = 3
+    goblin["taunted"] = True
+
+    doc = enemies_to_documents([goblin])[0]
+    restored = registry.instance_from_document(doc)
+
+    assert doc["template"] == "Goblin" and "stats" not in doc
+    assert (restored["current_hp"], restored["max_hp"], restored["taunted"]) == (3, goblin["max_hp"], True)
+
+
+def test_legacy_full_documents_are_still_read():
+    registry = TemplateRegistry()
+    enemy = registry.instance_from_document(dict(make_enemy_doc("Old Troll", hp=30), current_hp=12))
+    assert isinstance(enemy, EnemyInstance)
+    assert (enemy["name"], enemy["current_hp"], enemy["max_hp"]) == ("Old Troll", 12, 30)
+
+
+def test_a_reload_keeps_the_templates_of_saved_enemies(rng):
+    registry = TemplateRegistry()
+    registry.load([make_enemy_doc("Goblin"), make_enemy_doc("Kobold")])   # enemies.json
+    doc = registry.get("Kobold").spawn(rng).to_document()
+
+    registry.load([make_enemy_doc("Goblin", hp=12)])                     # the catalog takes over
+
+    assert [t.name for t in registry.all()] == ["Goblin"] and len(registry) == 1
+    assert registry.get("Goblin").doc["max_hp"] == 12
+    assert registry.instance_from_document(doc)["name"] == "Kobold"
@@ -0,0 +1,41 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from src import global_config
+from src.intent import engine_for
+
+JSON_PATH = Path(__file__).resolve().parent.parent / "src" / "json_exp"
+CORPUS = json.loads((JSON_PATH / "intent_corpus.json").read_text(encoding="utf-8"))
+THRESHOLD = global_config.config["INTENT_CONFIDENCE_THRESHOLD"]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    skills = {s["name"]: s for s in json.loads((JSON_PATH / "skill.json").read_text(encoding="utf-8"))}
+    items = {i["name"]: i for i in json.loads((JSON_PATH / "item.json").read_text(encoding="utf-8"))}
+    loadout = CORPUS["loadout"]
+    return engine_for([skills[n] for n in loadout["skills"]], [items[n] for n in loadout["inventory"]])
+
+
+def classify(engine, case):
+    return engine.classify(case["input"], enemy_count=CORPUS["loadout"]["enemies"])
+
+
+@pytest.mark.parametrize("case", CORPUS["cases"], ids=lambda case: case["input"])
+def test_confident_intents_are_right(engine, case):
+    intent = classify(engine, case)
+    if intent.confidence < THRESHOLD:
+        pytest.skip("left to the model")
+    assert (intent.action, intent.target) == (case["action"], case.get("target"))
+
+
+def test_most_of_the_corpus_is_resolved_locally(engine):
+    local = sum(classify(engine, case).confidence >= THRESHOLD for case in CORPUS["cases"])
+    assert local / len(CORPUS["cases"]) >= 0.9
+
+
+def test_engines_are_shared_per_loadout(engine):
+    skills = [{"name": "Fire Bolt", "effects": []}]
+    assert engine_for(skills, []) is engine_for(skills, [])
@@ -0,0 +1,159 @@
+import json
+import time
+from types import SimpleNamespace
+
+import eventlet
+import pytest
+from openai import BadRequestError
+
+from src import global_config
+from src.llm import LLMClient, LLMUnavailable
+
+
+def bad_request(message):
+    # The SDK builds these from an HTTP response; the client only reads the message and body
+    error = BadRequestError.__new__(BadRequestError)
+    Exception.__init__(error, message)
+    error.body = {"message": message}
+    return error
+
+
+class FakeProvider:
+    """
+    In-process stand-in for the OpenAI client: per model a latency, an outage flag, the
+    response_format types it accepts and the parameters its listing advertises.
+    """
+
+    def __init__(self, **models):
+        self.models = models
+        self.in_flight = {}
+        self.max_in_flight = {}
+        self.sent = []          # (model, response_format type) of every request
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def model(self, name):
+        return dict({"latency": 0.01, "down": False, "formats": (), "advertised": ["max_tokens"]}, **self.models[name])
+
+    def list(self, timeout=None):
+        return [SimpleNamespace(id=name, supported_parameters=self.model(name)["advertised"]) for name in self.models]
+
+    def create(self, model, messages, max_tokens, timeout, response_format=None, **kwargs):
+        spec = self.model(model)
+        kind = response_format["type"] if response_format else None
+        self.sent.append((model, kind))
+        self.in_flight[model] = self.in_flight.get(model, 0) + 1
+        self.max_in_flight[model] = max(self.max_in_flight.get(model, 0), self.in_flight[model])
+        try:
+            eventlet.sleep(min(spec["latency"], timeout))
+            if spec["latency"] > timeout:
+                raise TimeoutError(f"{model} timed out")
+            if spec["down"]:
+                raise RuntimeError(f"{model} is down")
+            if kind is not None and kind not in spec["formats"]:
+                raise bad_request(f"response_format {kind} is not supported by {model}")
+            content = json.dumps({"narration": model}) if kind else f"plain answer from {model}"
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+        finally:
+            self.in_flight[model] -= 1
+
+
+@pytest.fixture
+def make_client(monkeypatch):
+    monkeypatch.setitem(global_config.config, "LLM_HEDGE_MIN_DELAY", 0.1)
+
+    def make(provider, models=None, **kwargs):
+        client = LLMClient("http://fake/v1", "fake-key", models or list(provider.models), **kwargs)
+        client._client = SimpleNamespace(chat=provider.chat, models=SimpleNamespace(list=provider.list))
+        return client
+    return make
+
+
+SCHEMA = {"name": "narration", "strict": True,
+          "schema": {"type": "object", "properties": {"narration": {"type": "string"}},
+                     "required": ["narration"], "additionalProperties": False}}
+MESSAGES = [{"role": "user", "content": "look"}]
+
+
+def test_pool_caps_in_flight_calls_per_model(make_client):
+    provider = FakeProvider(m={"latency": 0.05})
+    client = make_client(provider, max_concurrency=4)
+
+    start = time.monotonic()
+    pool = eventlet.GreenPool(20)
+    answers = list(pool.imap(lambda _: client.complete(MESSAGES), range(20)))
+    elapsed = time.monotonic() - start
+
+    assert len(answers) == 20
+    assert provider.max_in_flight["m"] == 4
+    # 20 calls through 4 slots: 5 waves, not 20 sequential calls
+    assert 0.2 <= elapsed < 0.6
+
+
+def test_deadline_bounds_the_whole_call(make_client):
+    client = make_client(FakeProvider(slow={"latency": 5}), backoff=0.05)
+
+    start = time.monotonic()
+    with pytest.raises(LLMUnavailable):
+        client.complete(MESSAGES, deadline=0.3)
+    assert time.monotonic() - start < 1
+
+
+def test_capabilities_pick_the_structured_mode(make_client):
+    provider = FakeProvider(
+        schema={"formats": ("json_schema", "json_object"), "advertised": ["response_format", "structured_outputs"]},
+        json={"formats": ("json_object",), "advertised": ["response_format"]},
+        plain={},
+    )
+    client = make_client(provider)
+
+    assert [client.structured_mode(m) for m in ("schema", "json", "plain")] == ["json_schema", "json_object", None]
+    assert client.complete(MESSAGES, json_schema=SCHEMA, models=["plain"]) == "plain answer from plain"
+    assert provider.sent[-1] == ("plain", None)
+
+
+def test_concurrent_rejections_downgrade_once(make_client):
+    # Advertises structured outputs but only accepts JSON mode
+    provider = FakeProvider(liar={"latency": 0.05, "formats": ("json_object",),
+                                  "advertised": ["response_format", "structured_outputs"]})
+    client = make_client(provider)
+
+    pool = eventlet.GreenPool(2)
+    answers = list(pool.imap(lambda _: client.complete(MESSAGES, json_schema=SCHEMA), range(2)))
+
+    assert answers == ['{"narration": "liar"}'] * 2
+    assert client.structured_mode("liar") == "json_object"
+    assert provider.sent.count(("liar", "json_schema")) == 2
+
+
+def test_unrelated_bad_request_keeps_the_mode(make_client):
+    provider = FakeProvider(m={"formats": ("json_schema",), "advertised": ["structured_outputs"]})
+    client = make_client(provider)
+    client.structured_mode("m")
+
+    def too_long(**kwargs):
+        raise bad_request("This model's maximum context length is 8192 tokens")
+    provider.chat.completions.create = too_long
+
+    with pytest.raises(BadRequestError):
+        client._create("m", MESSAGES, 10, time.monotonic() + 1, SCHEMA)
+    assert client.structured_mode("m") == "json_schema"
+
+
+def test_dead_model_is_left_at_once(make_client):
+    client = make_client(FakeProvider(down={"down": True}, fast={}), backoff=5)
+
+    start = time.monotonic()
+    assert client.complete(MESSAGES) == "plain answer from fast"
+    # No backoff paid: the next model is tried in the same round
+    assert time.monotonic() - start < 1
+    assert client.router.order(client.models, "default") == ["fast", "down"]
+
+
+def test_slow_model_is_hedged(make_client):
+    client = make_client(FakeProvider(slow={"latency": 0.6}, fast={"latency": 0.02}))
+
+    start = time.monotonic()
+    assert client.complete(MESSAGES) == "plain answer from fast"
+    assert time.monotonic() - start < 0.4
+    eventlet.sleep(0.6)     # the slow call completes in the background and is measured
+    assert client.router.order(client.models, "default")[0] == "fast"
@@ -0,0 +1,45 @@
+import mongomock
+import pytest
+
+from src.catalog import backfill_names
+from src.migrations import NAME_LC_FILTER, migrate_catalog_names
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient().db
+
+
+def test_names_are_normalised_and_indexed(db):
+    db.Items.insert_many([{"name": " Potion (Greater) "}, {"name": "Rope", "name_lc": "old"}])
+
+    migrate_catalog_names(db)
+
+    assert sorted(d["name_lc"] for d in db.Items.find()) == ["potion (greater)", "rope"]
+    index = db.Items.index_information()["name_lc_unique"]
+    assert index["unique"] and index["partialFilterExpression"] == NAME_LC_FILTER
+
+
+def test_documents_without_a_name_do_not_collide(db):
+    migrate_catalog_names(db)
+
+    db.Items.insert_one({"description": "nameless"})
+    db.Items.insert_one({"description": "nameless too"})
+    assert db.Items.count_documents({}) == 2
+
+
+def test_the_first_unique_index_is_replaced(db):
+    db.Skills.create_index("name_lc", unique=True, name="name_lc_unique")
+
+    migrate_catalog_names(db)
+
+    assert db.Skills.index_information()["name_lc_unique"]["partialFilterExpression"] == NAME_LC_FILTER
+
+
+def test_backfill_skips_duplicate_names(db):
+    migrate_catalog_names(db)
+    db.Enemies.insert_many([{"name": "Goblin"}, {"name": "goblin "}, {"name": "Orc"}])
+
+    assert backfill_names(db.Enemies) == 2
+    assert backfill_names(db.Enemies) == 0
+    assert db.Enemies.count_documents({"name_lc": "goblin"}) == 1
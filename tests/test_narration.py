@@ -0,0 +1,44 @@
+import pytest
+
+
+@pytest.fixture
+def brain():
+    from src import brain
+    return brain
+
+
+def scripted(monkeypatch, brain, answers):
+    calls = []
+
+    def narrate(messages, schema=None, call_type=None, **kwargs):
+        calls.append(call_type)
+        return answers.pop(0)
+
+    monkeypatch.setattr(brain, "narrate", narrate)
+    return calls
+
+
+def test_narrator_failure_is_retried_without_repair(monkeypatch, brain):
+    calls = scripted(monkeypatch, brain, [brain.NARRATOR_OUT_OF_VOICE, '{"narration": "The door opens."}'])
+
+    data = brain.narrate_strict([])
+
+    assert data["narration"] == "The door opens."
+    assert calls == ["strict", "strict"]
+
+
+@pytest.mark.parametrize("failure", ["", "   "])
+def test_empty_output_is_a_failed_attempt(monkeypatch, brain, failure):
+    scripted(monkeypatch, brain, [failure, failure])
+
+    data = brain.narrate_strict([])
+
+    assert data["narration"] == brain.NARRATOR_OUT_OF_VOICE
+    assert data["encounter"] is False
+
+
+def test_plain_prose_is_the_narration(monkeypatch, brain):
+    calls = scripted(monkeypatch, brain, ["The wind howls."])
+
+    assert brain.narrate_strict([])["narration"] == "The wind howls."
+    assert calls == ["strict"]
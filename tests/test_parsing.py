@@ -0,0 +1,42 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from src.parsing import conform, extract_object, json_schema
+
+CORPUS = json.loads(
+    (Path(__file__).resolve().parent.parent / "src" / "json_exp" / "malformed_outputs.json").read_text(encoding="utf-8")
+)
+DEFAULTS = {"narration": "", "found_items": [], "location": None, "xp_gained": 0, "encounter": False}
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=lambda case: case["name"])
+def test_malformed_outputs(case):
+    if case.get("expect_failure"):
+        with pytest.raises(ValueError):
+            extract_object(case["output"])
+        return
+    value, _ = extract_object(case["output"])
+    assert {k: value.get(k) for k in case.get("expect", {})} == case.get("expect", {})
+
+
+def test_conform_fills_and_coerces():
+    value, changed = conform({"narration": "Hi", "xp_gained": "15 xp", "encounter": "yes", "extra": 1}, DEFAULTS)
+
+    assert value == {"narration": "Hi", "found_items": [], "location": None, "xp_gained": 15,
+                     "encounter": True, "extra": 1}
+    assert sorted(changed) == ["encounter", "found_items", "location", "xp_gained"]
+
+
+def test_conform_does_not_share_list_defaults():
+    first, _ = conform({}, DEFAULTS)
+    first["found_items"].append("Rope")
+    assert conform({}, DEFAULTS)[0]["found_items"] == []
+
+
+def test_json_schema_is_strict():
+    schema = json_schema("narration", DEFAULTS)["schema"]
+    assert set(schema["required"]) == set(schema["properties"]) == set(DEFAULTS)
+    assert schema["additionalProperties"] is False
+    assert schema["properties"]["location"] == {"type": ["string", "null"]}
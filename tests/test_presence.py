@@ -0,0 +1,26 @@
+from src.presence import PresenceRegistry
+
+
+def test_deltas_follow_the_snapshot_version():
+    presence = PresenceRegistry()
+    presence.join("tavern", "a", {"username": "ayla", "secret": "x"})
+    snapshot = presence.snapshot("tavern")
+    assert snapshot["users"] == {"a": {"user_id": None, "character_id": None, "username": "ayla",
+                                       "avatar_hash": None, "life_percentage": None}}
+
+    delta = presence.update("tavern", "a", life_percentage=50)
+
+    assert delta["version"] == snapshot["version"] + 1
+    assert presence.update("tavern", "a", life_percentage=50) is None
+
+
+def test_versions_stay_monotonic_when_a_room_empties():
+    presence = PresenceRegistry()
+    presence.join("tavern", "a", {"username": "ayla"})
+    stale = presence.snapshot("tavern")["version"]
+    presence.leave("tavern", "a")
+
+    delta = presence.join("tavern", "b", {"username": "bren"})
+
+    assert presence.snapshot("tavern")["version"] == delta["version"] == stale + 2
+    assert presence.leave("tavern", "nobody") is None
@@ -0,0 +1,38 @@
+import time
+
+from src.router import CircuitBreaker, ModelRouter
+
+
+def test_breaker_opens_half_opens_and_closes():
+    breaker = CircuitBreaker(failures=2, cooldown=0.05)
+    breaker.failure()
+    assert breaker.state == "closed" and breaker.allow()
+
+    breaker.failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()      # one trial at a time
+
+    breaker.failure()               # the trial failed: open again
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_order_prefers_fast_healthy_models():
+    router = ModelRouter(window=10, failures=3, cooldown=30)
+    for _ in range(3):
+        router.record("slow", "strict", 2.0, ok=True)
+        router.record("fast", "strict", 0.2, ok=True)
+        router.record("broken", "strict", 0.0, ok=False)
+
+    assert router.order(["broken", "slow", "fast"], "strict") == ["fast", "slow", "broken"]
+    assert router.breaker("broken").state == "open"
+    # A new model ranks as the median measured one (here "slow"), ties keep the list order
+    assert router.order(["new", "slow", "fast"], "strict") == ["fast", "new", "slow"]
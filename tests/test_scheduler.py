@@ -0,0 +1,118 @@
+import random
+
+import eventlet
+import pytest
+
+from src.enemies import EnemyTemplate
+from src.session import GameSession
+
+from .conftest import make_character, make_enemy_doc
+
+WEAPON = {"name": "Short Sword", "itemType": "weapon", "subType": "melee",
+          "effects": [{"kind": "damage", "value": "1d8+1"}]}
+
+
+@pytest.fixture
+def brain(monkeypatch):
+    from src import brain
+
+    narrations = []
+
+    def narrate_flavor(prompt, max_tokens=300, on_delta=None, cache=None):
+        narrations.append(prompt)
+        return "Round narrated."
+
+    monkeypatch.setattr(brain, "get_action_from_ai", lambda *a, **k: "attack")
+    monkeypatch.setattr(brain, "narrate_flavor", narrate_flavor)
+    monkeypatch.setattr(brain, "get_item_by_name", lambda *a, **k: WEAPON)
+    monkeypatch.setattr(brain, "get_skill_by_name", lambda *a, **k: None)
+    monkeypatch.setattr(brain.sessions, "commit", lambda session: None)
+    monkeypatch.setattr(brain.sessions, "_sessions", {})
+    monkeypatch.setattr(brain.turn_scheduler, "_combats", {})
+    monkeypatch.setattr(brain.turn_scheduler, "window", 0.2)
+    brain.narrations = narrations
+    yield brain
+    brain.turn_scheduler.on_round = None
+
+
+def player_session(brain, name):
+    session = GameSession("room", name)
+    session.character = make_character(name.upper())
+    session.recent_history = [{"role": "user", "content": "hi"}]
+    brain.sessions._sessions[session.key] = session
+    return session
+
+
+def texts(outputs):
+    return [o["text"] if isinstance(o, dict) and "text" in o else o for o in outputs]
+
+
+def start(brain, session, hp=200):
+    enemies = [EnemyTemplate(make_enemy_doc(hp=hp)).spawn(random.Random(0))]
+    brain.start_party_combat("room", [session], enemies, "cave")
+    return brain.turn_scheduler.active("room")
+
+
+def test_idle_players_are_not_enrolled(brain):
+    a, b = player_session(brain, "a"), player_session(brain, "b")
+    combat = start(brain, a)
+
+    assert list(combat.members) == ["a"]
+    assert not b.state["in_combat"]
+
+
+def test_alone_in_the_fight_a_round_closes_at_once(brain):
+    a, _ = player_session(brain, "a"), player_session(brain, "b")
+    combat = start(brain, a)
+
+    assert "Round narrated." in texts(brain.play_turn(a, "hit it", "room"))
+    assert combat.round == 2
+
+
+def test_player_joins_with_their_first_action(brain):
+    a, b = player_session(brain, "a"), player_session(brain, "b")
+    combat = start(brain, a)
+
+    outputs = brain.play_turn(b, "I help A", "room")
+
+    assert outputs[0] == "B joins the fight!"
+    assert outputs[1].startswith("B is ready. Waiting for A")
+    assert list(combat.members) == ["a", "b"]
+    assert combat.order[-1] == ("player", "b")
+    assert b.state["combat_enemies"] is combat.enemies
+    # A's action completes the round: one narration for the whole party
+    assert "Round narrated." in texts(brain.play_turn(a, "hit it", "room"))
+    assert len(brain.narrations) == 1 and combat.round == 2
+
+
+def test_window_closes_the_round_and_hands_it_to_on_round(brain):
+    a, b = player_session(brain, "a"), player_session(brain, "b")
+    combat = start(brain, a)
+    brain.play_turn(b, "I join", "room")
+    brain.play_turn(a, "hit it", "room")
+    delivered = []
+    brain.turn_scheduler.on_round = lambda room, outputs: delivered.append((room, outputs))
+
+    brain.play_turn(a, "hit it again", "room")      # round 2: B stays silent
+    eventlet.sleep(0.4)
+
+    assert len(delivered) == 1 and delivered[0][0] == "room"
+    assert len(brain.narrations) == 2 and combat.round == 3
+    assert any("B hesitates." in prompt for prompt in brain.narrations[1:])
+
+
+def test_leaving_member_is_saved_out_of_combat(brain):
+    a, b = player_session(brain, "a"), player_session(brain, "b")
+    combat = start(brain, a)
+    brain.play_turn(b, "I join", "room")
+
+    brain.turn_scheduler.leave("room", "b")
+
+    assert "b" not in combat.members
+    assert not b.state["in_combat"] and b.state["combat_enemies"] is None
+
+
+def test_initiative_order_terminates_on_ties(brain, monkeypatch):
+    monkeypatch.setattr(brain, "roll_d20", lambda: 10)
+    actors = [make_character("X"), make_character("Y")]
+    assert sorted(a["name"] for a in brain.initiative_order(actors)) == ["X", "Y"]
@@ -0,0 +1,39 @@
+import mongomock
+import pytest
+from flask import Flask
+
+from src.session import SessionStore
+
+from .conftest import make_character
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.db = mongomock.MongoClient().db
+    with app.app_context():
+        yield app
+
+
+def save_to(db):
+    def save(character):
+        update = {k: v for k, v in character.items() if k != "_id"}
+        db["Characters"].update_one({"_id": character["_id"]}, {"$set": update})
+        return True
+    return save
+
+
+def test_flush_does_not_store_transient_character_keys(app):
+    character = dict(make_character("Aria"), _id="c1")
+    app.db["Characters"].insert_one(dict(character))
+    store = SessionStore(lambda cid: dict(character), save_to(app.db), flush_every=1)
+
+    session = store.get("room", "c1")
+    session.character.update(_combat_target_idx=0, _selected_skill="Fireball", current_hp=12)
+    store.commit(session)
+
+    stored = app.db["Characters"].find_one({"_id": "c1"})
+    assert stored["current_hp"] == 12
+    assert not [k for k in stored if k.startswith("_") and k != "_id"]
+    # The live character keeps them for the rest of the fight
+    assert session.character["_combat_target_idx"] == 0
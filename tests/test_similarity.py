@@ -0,0 +1,54 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from src.similarity import IndexRegistry, SimilarityIndex
+
+ITEMS = json.loads((Path(__file__).resolve().parent.parent / "src" / "json_exp" / "item.json").read_text(encoding="utf-8"))
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SimilarityIndex(ITEMS)
+
+
+@pytest.mark.parametrize("query", [ITEMS[0]["description"], ITEMS[3]["description"], ITEMS[-1]["description"]])
+def test_agrees_with_the_per_call_refit(index, query):
+    from src.brain import find_most_similar_item
+
+    expected, expected_score = find_most_similar_item(query, ITEMS)
+    found, score = index.query(query)
+    assert found["name"] == expected["name"]
+    assert score == pytest.approx(expected_score, rel=0.3)
+
+
+def test_candidates_restrict_the_search(index):
+    subset = [ITEMS[1]["name"], ITEMS[2]["name"].upper()]
+    found, _ = index.query(ITEMS[0]["description"], subset)
+    assert found["name"] in (ITEMS[1]["name"], ITEMS[2]["name"])
+    assert index.query("anything", ["Not An Item"]) == (None, 0.0)
+
+
+def test_top_k_is_sorted_and_consistent_with_query(index):
+    texts = [ITEMS[0]["description"], "a healing potion"]
+    results = index.top_k(texts, k=3)
+    assert [len(r) for r in results] == [3, 3]
+    for text, ranked in zip(texts, results):
+        scores = [score for _, score in ranked]
+        assert scores == sorted(scores, reverse=True)
+        assert ranked[0][0] is index.query(text)[0]
+
+
+def test_stop_words_only_catalog_scores_zero():
+    index = SimilarityIndex([{"name": "the", "description": "and of"}])
+    assert index.query("the")[1] == 0.0
+
+
+def test_registry_fits_once_until_invalidated():
+    loads = []
+    registry = IndexRegistry(lambda name: loads.append(name) or ITEMS)
+    assert registry.get("Items") is registry.get("Items")
+    registry.invalidate("Items")
+    registry.get("Items")
+    assert loads == ["Items", "Items"]
@@ -0,0 +1,43 @@
+import pytest
+
+from src.effects import compile_effects
+from src.simulator import Simulator, load_archetypes, load_catalog
+
+FIGHTS = 5000
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return load_catalog()
+
+
+@pytest.fixture(scope="module")
+def warrior():
+    return next(a for a in load_archetypes() if a["class"] == "Warrior")
+
+
+def test_seeded_runs_are_reproducible(catalog, warrior):
+    first = Simulator(catalog, seed=7).run(warrior, "Goblin", fights=FIGHTS)
+    second = Simulator(catalog, seed=7).run(warrior, "Goblin", fights=FIGHTS)
+    assert first == second
+
+
+def test_outcomes_add_up(catalog, warrior):
+    report = Simulator(catalog, seed=1).run(warrior, "Orc", fights=FIGHTS)
+    assert report["win_rate"] + report["loss_rate"] + report["timeout_rate"] == pytest.approx(1.0)
+    ttk = report["rounds_to_kill"]
+    assert ttk["p10"] <= ttk["p50"] <= ttk["p90"]
+
+
+def test_weapon_hits_stay_within_the_weapon_dice(catalog, warrior):
+    report = Simulator(catalog, seed=2).run(warrior, "Goblin", fights=FIGHTS)
+    maximum = sum(e.dice.maximum for e in compile_effects(catalog["Items"][warrior["weapon"]]).damage)
+    assert 0 < len(report["hit_damage_histogram"]) - 1 <= maximum
+
+
+def test_difficulty_orders_the_win_rates(catalog, warrior):
+    simulator = Simulator(catalog, seed=3)
+    one = simulator.run(warrior, "Goblin", fights=FIGHTS)["win_rate"]
+    pack = simulator.run(warrior, "Goblin", fights=FIGHTS, count=3)["win_rate"]
+    dragon = simulator.run(warrior, "Red Dragon", fights=FIGHTS)["win_rate"]
+    assert one > pack > dragon